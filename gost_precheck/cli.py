@@ -1,25 +1,73 @@
 # gost_precheck/cli.py
 from __future__ import annotations
 
+import time
+_T0 = time.perf_counter()  # для --startup-profile: начало импорта cli
+
 import os
 import sys
-import glob
 import argparse
-from typing import Dict, Iterable, List, Tuple
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from .core.config import load_all
-from .core.engine import analyze_file
-from .core.reporting import write_reports
-from .core.watcher import watch_folder
+# Тяжёлые модули (engine/checks, reporting, watcher, coalesce) импортируются внутри
+# команд: быстрый путь (пересылка демону, --help) их не загружает
 
 try:
     from .core.constants import VERSION as APP_VERSION
 except Exception:
     APP_VERSION = "GOST-21_34-PLUS"
 
+_T_IMPORTED = time.perf_counter()
+
 
 # ------------------------------- utils --------------------------------- #
 
+def _since_process_start_ms() -> Optional[float]:
+    """Сколько мс прошло с запуска процесса (Linux /proc; точность — тик ядра)."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return (uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")) * 1000
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+@contextmanager
+def _nullstage():
+    yield
+
+
+class _StartupProfile:
+    """Разбивка времени старта: интерпретатор, импорты, конфиг (check --startup-profile)."""
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        age = _since_process_start_ms()
+        elapsed = (time.perf_counter() - _T0) * 1000
+        if age is not None:
+            self.stages.append(("интерпретатор и site (≈)", max(0.0, age - elapsed)))
+        self.stages.append(("импорт cli", (_T_IMPORTED - _T0) * 1000))
+        self.stages.append(("main: аргументы", (time.perf_counter() - _T_IMPORTED) * 1000))
+
+    @contextmanager
+    def stage(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - t) * 1000))
+
+    def lines(self) -> List[str]:
+        w = max(len(n) for n, _ in self.stages)
+        out = [f"[STARTUP] {n:<{w}} {ms:8.1f} мс" for n, ms in self.stages]
+        out.append(f"[STARTUP] {'итого':<{w}} {sum(ms for _, ms in self.stages):8.1f} мс")
+        return out
+
+
 def _fmt_loader_debug(stats: dict, file_hint: str = "") -> str:
     # stats может содержать parts как int или как list — поддержим оба
     parts_obj = stats.get("parts", [])
@@ -40,12 +88,34 @@ def _fmt_loader_debug(stats: dict, file_hint: str = "") -> str:
         f"tabs={stats.get('tabs', 0)} "
         f"br={stats.get('br', 0)} "
         f"parts={parts_count}"
+        + (f" skipped=style:{stats.get('skipped_style', 0)}/field:{stats.get('skipped_fields', 0)}"
+           if stats.get("skipped_style") or stats.get("skipped_fields") else "")
+        + (f" {stats['backend']}={stats.get('mb_s', 0)}MB/s" if stats.get("backend") else "")
         + (f"  file: {os.path.basename(file_hint)}" if file_hint else "")
     )
 
 
+def _fmt_plan_debug(plan: dict) -> str:
+    """Исполнители этапов и откуда взялось число воркеров (CPU/квота cgroup/память)."""
+    w = plan.get("workers", {})
+    stages = " ".join(
+        f"{st}={plan.get(st)}" + (f"×{w.get(st)}" if w.get(st) else "")
+        for st in ("regex", "spell") if plan.get(st)
+    )
+    r = plan.get("resources", {})
+    out = f"[DEBUG] exec: {stages} cpus={r.get('cpus', '?')}"
+    if r.get("cgroup_cpu_quota") is not None:
+        out += f" (cgroup quota={r['cgroup_cpu_quota']:g})"
+    if "per_worker_mb" in r:
+        out += (f" mem_avail={r.get('memory_available_mb', '?')}MB"
+                f" per_worker={r['per_worker_mb']}MB mem_cap={r.get('memory_cap')}")
+    return out
+
+
 
 def _enumerate_targets(paths: Iterable[str], recursive: bool) -> List[str]:
+    import glob
+
     files: List[str] = []
     patterns = ("*.docx", "*.txt")
     for p in paths:
@@ -68,66 +138,345 @@ def _enumerate_targets(paths: Iterable[str], recursive: bool) -> List[str]:
 
 
 def _calc_gate(issues) -> Dict:
-    errors = sum(1 for i in issues if getattr(i, "severity", "") == "ошибка")
-    warnings = sum(1 for i in issues if getattr(i, "severity", "") == "предупреждение")
+    counts = getattr(issues, "by_severity", None)  # spill.SpilledIssues — без чтения с диска
+    if counts is not None:
+        errors, warnings = counts.get("ошибка", 0), counts.get("предупреждение", 0)
+    else:
+        errors = sum(1 for i in issues if getattr(i, "severity", "") == "ошибка")
+        warnings = sum(1 for i in issues if getattr(i, "severity", "") == "предупреждение")
     return {"errors": errors, "warnings": warnings, "pass": errors == 0}
 
 
 # ------------------------------ commands -------------------------------- #
 
-def do_check(paths, cfg_root=None, recursive=False, debug=False) -> int:
-    cfg = load_all(cfg_root)
+def _gate_line(gate: Dict) -> str:
+    return (f"Ошибок: {gate['errors']}; Предупреждений: {gate['warnings']}; "
+            f"gate: {'PASS' if gate['pass'] else 'BLOCK'}")
+
+
+def _finish_file(f: str, res, err, debug: bool, journal=None) -> Tuple[List[str], int, Any]:
+    """
+    Пишет отчёты по результату analyze_file;
+    -> (строки для консоли, код: 0/2/3, (gate, by_category) или текст ошибки).
+    """
+    from .core.reporting import write_reports
+
+    if err is not None:
+        return [f"[ERR] {f}: {err}"], 3, str(err)  # внутренняя ошибка
+    try:
+        issues, by_cat, debug_meta = res
+        gate = _calc_gate(issues)
+
+        # пишем отчёты (.rep / .rep.json)
+        write_reports(f, issues, by_cat, gate, APP_VERSION, debug_meta)
+        if journal is not None:
+            journal.record(f, gate, by_cat)  # только после того, как отчёты на диске
+
+        base, _ = os.path.splitext(f)
+        rep, repj = base + ".rep", base + ".rep.json"
+        lines = [f"[OK] {f} ⇒ {rep} / {repj} | {_gate_line(gate)}"]
+
+        # Печать диагностической сводки по загрузчику:
+        loader_stats = (debug_meta or {}).get("loader_stats", {})
+        if debug or loader_stats.get("kept", 0) == 0:
+            lines.append(_fmt_loader_debug(loader_stats, file_hint=f))
+        if debug and (debug_meta or {}).get("plan"):
+            lines.append(_fmt_plan_debug(debug_meta["plan"]))
+
+        return lines, (2 if gate["errors"] else 0), (gate, by_cat)  # 2 — есть ошибки правил
+    except Exception as e:
+        return [f"[ERR] {f}: {e}"], 3, str(e)
+    finally:
+        close = getattr(res[0], "close", None) if res else None
+        if close is not None:
+            close()  # временные файлы замечаний (bounded_memory)
+
+
+def _fmt_summary(summary: Dict) -> List[str]:
+    lines = [
+        f"Итого: файлов {summary['files']} (PASS: {summary['pass']}, BLOCK: {summary['block']}"
+        + (f", не проверено: {summary['failed']}" if summary.get("failed") else "")
+        + f"); Ошибок: {summary['errors']}; Предупреждений: {summary['warnings']}"
+    ]
+    cats = sorted(summary["by_category"].items(), key=lambda kv: (-kv[1], kv[0]))
+    if cats:
+        lines.append("По категориям: " + "; ".join(f"{k}: {v}" for k, v in cats))
+    return lines
+
+
+class _Collector:
+    """
+    Результаты по файлам списка: отчёты пишутся по готовности, консольный вывод
+    и код возврата — строго в порядке списка (как при последовательной проверке),
+    сводка по корпусу копится попутно.
+    """
+
+    def __init__(self, files: List[str], debug: bool, journal=None):
+        self.files = files
+        self.debug = debug
+        self.journal = journal
+        self.rc = 0
+        self._ready: Dict[int, Tuple[List[str], int]] = {}
+        self._results: Dict[int, Any] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _flush(self):
+        while self._next in self._ready:
+            lines, code = self._ready.pop(self._next)
+            for ln in lines:
+                print(ln)
+            if code:
+                self.rc = code
+            self._next += 1
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def skip(self, i: int, gate: Dict, by_cat: Dict[str, int]):
+        """Файл уже проверен в прошлом прогоне (журнал)."""
+        f = self.files[i]
+        with self._lock:
+            self._ready[i] = [f"[SKIP] {f} — уже в журнале | {_gate_line(gate)}"], (2 if gate["errors"] else 0)
+            self._results[i] = (gate, by_cat)
+
+    def put(self, i: int, f: str, res, err):
+        lines, code, rec = _finish_file(f, res, err, self.debug, self.journal)
+        with self._lock:
+            self._ready[i] = lines, code
+            self._results[i] = rec
+            self._flush()
+
+    def finish(self, summary_out: str = None, cfg: Dict = None, **meta):
+        """Печатает итог; с summary_out — пишет JSON-сводку (для merge-reports)."""
+        from .core import summary as summ
+        from .core.config import config_fingerprint
+
+        total = summ.new_summary()
+        for i in sorted(self._results):
+            rec = self._results[i]
+            if isinstance(rec, tuple):
+                summ.add_file(total, self.files[i], *rec)
+            else:
+                summ.add_failed(total, self.files[i], rec)
+        for ln in _fmt_summary(total):
+            print(ln)
+        if summary_out:
+            summ.write_summary(summary_out, total, version=APP_VERSION,
+                               cfg=config_fingerprint(cfg) if cfg else None, **meta)
+
+
+def do_check(paths, cfg_root=None, recursive=False, debug=False, jobs: int = 1,
+             journal_path: str = None, resume: bool = False,
+             shard: str = None, summary_out: str = None, cfg: Dict = None, pools=None,
+             startup_profile: bool = False) -> int:
+    """
+    jobs — сколько файлов проверять одновременно (0 — по числу CPU). При jobs > 1
+    файлы берутся в работу от больших к меньшим, отчёты пишутся по готовности,
+    а консольный вывод и код возврата — в порядке списка файлов, как при jobs=1.
+
+    journal_path — журнал проверенных файлов (JSONL); с resume файлы, уже
+    записанные в журнал с тем же конфигом и содержимым, не перепроверяются,
+    а их вклад в итоговую сводку берётся из журнала.
+
+    shard — "i/N": проверить только i-ю из N частей корпуса (разбиение по размеру
+    файлов, одинаковое на всех машинах). summary_out — JSON-сводка прогона
+    для merge-reports.
+
+    cfg/pools — уже загруженный конфиг и общие пулы (тёплый демон).
+    startup_profile — в конце напечатать в stderr, на что ушло время старта.
+    """
+    prof = _StartupProfile() if startup_profile else None
+    with prof.stage("импорт engine/checks") if prof else _nullstage():
+        from .core.config import load_all, config_fingerprint
+        from .core.scheduler import run_batch, parse_shard, shard_files
+        from .core.journal import Journal
+
+    with prof.stage("конфиг") if prof else _nullstage():
+        cfg = cfg if cfg is not None else load_all(cfg_root)
+    if prof:
+        name, ms = prof.stages.pop()
+        prof.stages.append((f"{name} ({cfg.get('__source', 'готовый')})", ms))
     files = _enumerate_targets(paths, recursive)
+    if shard:
+        files = shard_files(files, *parse_shard(shard))
+        if not files:
+            # пустой шард (файлов меньше, чем шардов) — не ошибка прогона
+            print(f"Шард {shard}: файлов нет")
+            _Collector(files, debug).finish(summary_out, cfg, shard=shard)
+            return 0
 
     if not files:
         print("Нет файлов для проверки")
         return 4  # «no input»
 
-    rc = 0
-    for f in files:
-        try:
-            issues, by_cat, debug_meta = analyze_file(f, cfg)
-            gate = _calc_gate(issues)
+    journal = Journal(journal_path, config_fingerprint(cfg), resume) if journal_path else None
+    col = _Collector(files, debug, journal)
 
-            # пишем отчёты (.rep / .rep.json)
-            write_reports(f, issues, by_cat, gate, APP_VERSION, debug_meta)
+    todo = list(range(len(files)))
+    if journal is not None and resume:
+        todo = []
+        for i, f in enumerate(files):
+            e = journal.done(f)
+            if e is None:
+                todo.append(i)
+            else:
+                col.skip(i, e["gate"], e.get("by_category") or {})
 
-            base, _ = os.path.splitext(f)
-            rep, repj = base + ".rep", base + ".rep.json"
-            print(
-                f"[OK] {f} ⇒ {rep} / {repj} | "
-                f"Ошибок: {gate['errors']}; Предупреждений: {gate['warnings']}; "
-                f"gate: {'PASS' if gate['pass'] else 'BLOCK'}"
-            )
+    t_run = time.perf_counter()
+    try:
+        col.flush()
+        run_batch([files[i] for i in todo], cfg, jobs,
+                  lambda j, f, res, err: col.put(todo[j], f, res, err), pools=pools,
+                  largest_first=jobs != 1,
+                  on_start=(lambda j, f: journal.begin(f)) if journal is not None else None)
+    finally:
+        if journal is not None:
+            journal.close()
+    if prof:
+        for ln in prof.lines():
+            print(ln, file=sys.stderr)
+        print(f"[STARTUP] (сама проверка: {(time.perf_counter() - t_run) * 1000:.1f} мс)", file=sys.stderr)
+
+    if journal is not None or shard or summary_out:
+        col.finish(summary_out, cfg, shard=shard)
+    return col.rc
+
+
+def do_serve_work(paths, listen: str, cfg_root=None, recursive=False, debug=False,
+                  summary_out: str = None, token: str = None) -> int:
+    """Координатор: раздаёт файлы воркерам (gost-precheck worker), пишет отчёты и сводку."""
+    from .core.config import load_all, config_fingerprint
+    from .core.distributed import Coordinator, parse_addr, is_loopback, TOKEN_ENV
+
+    host, port = parse_addr(listen)
+    token = token or os.environ.get(TOKEN_ENV) or None
+    if not token and not is_loopback(host):
+        # воркеру после hello отдаётся содержимое любого документа из очереди
+        print(f"[ERR] адрес {host} доступен извне: задайте --token или {TOKEN_ENV}")
+        return 2
 
-            # Печать диагностической сводки по загрузчику:
-            loader_stats = (debug_meta or {}).get("loader_stats", {})
-            if debug or loader_stats.get("kept", 0) == 0:
-                print(_fmt_loader_debug(loader_stats, file_hint=f))
+    cfg = load_all(cfg_root)
+    files = _enumerate_targets(paths, recursive)
+    if not files:
+        print("Нет файлов для проверки")
+        return 4  # «no input»
 
-            if gate["errors"]:
-                rc = 2  # есть ошибки правил
+    col = _Collector(files, debug)
+    coord = Coordinator(files, config_fingerprint(cfg), col.put, token=token)
+    coord.serve(host, port, on_listen=lambda a: print(f"[WORK] {len(files)} файлов, ждём воркеров на {a[0]}:{a[1]}"))
 
-        except Exception as e:
-            print(f"[ERR] {f}: {e}")
-            rc = 3  # внутренняя ошибка
+    for w, n in sorted(coord.workers.items()):
+        print(f"[WORK] {w}: {n}")
+    col.finish(summary_out, cfg)
+    return col.rc
 
-    return rc
 
+def do_worker(addr: str, cfg_root=None, jobs: int = 1, fetch: bool = False, token: str = None) -> int:
+    from .core.config import load_all
+    from .core.distributed import run_worker
 
-def do_watch(folder: str, cfg_root=None, interval: float = 2.0, debug=False) -> None:
     cfg = load_all(cfg_root)
 
+    def on_task(path, err):
+        print(f"[ERR] {path}: {err}" if err else f"[OK] {path}")
+
+    try:
+        n = run_worker(addr, cfg, jobs=jobs, fetch=fetch, on_task=on_task, token=token)
+    except Exception as e:
+        print(f"[ERR] координатор {addr}: {e}")
+        return 3
+    print(f"[WORK] обработано файлов: {n}")
+    return 0
+
+
+def do_merge_reports(paths: List[str], out_json: str = None) -> int:
+    """Объединяет JSON-сводки шардов (check --summary-out) в сводку по корпусу."""
+    from .core import summary as summ
+
+    parts = summ.read_summaries(paths)
+    if not parts:
+        print("Нет сводок для объединения")
+        return 4
+
+    cfgs = {p.get("cfg") for p in parts}
+    if len(cfgs) > 1:
+        print("[WARN] сводки получены с разными конфигами — итог может быть несопоставим")
+    shards = [p.get("shard") for p in parts if p.get("shard")]
+    if shards:
+        n = {s.split("/", 1)[1] for s in shards}
+        seen = {s.split("/", 1)[0] for s in shards}
+        if len(n) == 1:
+            missing = sorted(set(map(str, range(1, int(next(iter(n))) + 1))) - seen, key=int)
+            if missing:
+                print(f"[WARN] нет сводок шардов: {', '.join(missing)} из {next(iter(n))}")
+        else:
+            print(f"[WARN] сводки из разных разбиений: {', '.join(sorted(n))}")
+        if len(seen) < len(shards):
+            print("[WARN] один и тот же шард передан несколько раз")
+
+    total = summ.merge(parts)
+    for ln in _fmt_summary(total):
+        print(ln)
+    if out_json:
+        summ.write_summary(out_json, total, version=APP_VERSION, shards=sorted(shards),
+                           cfg=next(iter(cfgs)) if len(cfgs) == 1 else None)
+    if total["failed"]:
+        return 3
+    return 2 if total["errors"] else 0
+
+
+def do_watch(folder: str, cfg_root=None, interval: float = 2.0, debug=False,
+             recursive: bool = True, debounce: float = 1.0, workers: int = 2, backend: str = "auto",
+             state_path: str | None = None) -> None:
+    from .core.config import load_all, config_fingerprint
+    from .core.coalesce import AnalysisCoalescer
+    from .core.reporting import write_reports
+    from .core.utils import file_stamp
+    from .core.watcher import watch_folder
+
+    cfg = load_all(cfg_root)
+    # повторные события по тому же (неизменённому) файлу не пересчитываются
+    coalescer = AnalysisCoalescer(ttl=max(interval * 2, 5.0))
+
+    # состояние между перезапусками: неизменённые файлы (stat/SHA-1 + тот же конфиг) не перепроверяем
+    state = None
+    if state_path != "":
+        from .core.watch_state import WatchState, DEFAULT_STATE_NAME
+        state = WatchState(state_path or os.path.join(folder, DEFAULT_STATE_NAME))
+        pruned = state.prune_missing()
+        print(f"[WATCH] состояние: {state.db_path} (записей: {len(state)}, удалено устаревших: {pruned})")
+    cfg_hash = config_fingerprint(cfg)
+
     def on_file(path: str):
         if not path.lower().endswith((".docx", ".txt")):
             return
         try:
-            issues, by_cat, debug_meta = analyze_file(path, cfg)
-            gate = _calc_gate(issues)
-            write_reports(path, issues, by_cat, gate, APP_VERSION, debug_meta)
-
             base, _ = os.path.splitext(path)
             rep, repj = base + ".rep", base + ".rep.json"
+
+            stamp = None
+            if state is not None:
+                if os.path.exists(repj):
+                    need, stamp = state.needs_check(path, cfg_hash)
+                    if not need:
+                        if debug:
+                            print(f"[WATCH-SKIP] {path}: без изменений")
+                        return
+                else:
+                    stamp = file_stamp(path)  # до анализа, а не после
+
+            res = coalescer.analyze(path, cfg)
+            try:
+                issues, by_cat, debug_meta = res
+                gate = _calc_gate(issues)
+                write_reports(path, issues, by_cat, gate, APP_VERSION, debug_meta)
+            finally:
+                coalescer.release(res)
+            if state is not None:
+                state.record(path, cfg_hash, {"gate": gate, "by_category": by_cat}, stamp)
+
             print(
                 f"[WATCH] {path} ⇒ {rep} / {repj} | "
                 f"Ошибок: {gate['errors']}; Предупреждений: {gate['warnings']}; "
@@ -140,13 +489,19 @@ def do_watch(folder: str, cfg_root=None, interval: float = 2.0, debug=False) ->
         except Exception as e:
             print(f"[WATCH-ERR] {path}: {e}")
 
-    print(f"Наблюдение за {folder} (интервал {interval}s) …")
-    watch_folder(folder, on_file, interval=interval)
+    print(f"Наблюдение за {folder} (интервал {interval}s, обработчиков: {workers}) …")
+    try:
+        watch_folder(folder, on_file, interval=interval, recursive=recursive, debounce=debounce,
+                     workers=workers, backend=backend)
+    finally:
+        if state is not None:
+            state.close()
 
 
-def do_terms(paths: Iterable[str], recursive: bool, out_json: str, out_csv: str) -> int:
+def do_terms(paths: Iterable[str], recursive: bool, out_json: str, out_csv: str, jobs: int = 0) -> int:
     """
     Лёгкий сборщик терминов/акронимов (если модуль terms присутствует).
+    jobs — процессов разбора (0 — по числу CPU); ход работы — в stderr.
     """
     try:
         from .core.terms import scan_files, write_terms_json_csv  # ленивый импорт
@@ -159,26 +514,88 @@ def do_terms(paths: Iterable[str], recursive: bool, out_json: str, out_csv: str)
         print("Нет файлов для извлечения терминов")
         return 4
 
-    bank = scan_files(files, cfg=None)  # жёсткая загрузка без фильтров
+    last = [0.0]
+    failed = [0]
+
+    def on_progress(done, total, path, err):
+        if err:
+            failed[0] += 1
+            print(f"[TERMS] пропущен {path}: {err}", file=sys.stderr)
+        now = time.monotonic()
+        if done == total or now - last[0] >= 1.0:  # не чаще раза в секунду
+            last[0] = now
+            print(f"[TERMS] {done}/{total} файлов", file=sys.stderr)
+
+    bank = scan_files(files, cfg=None, jobs=jobs, on_progress=on_progress)  # жёсткая загрузка без фильтров
     write_terms_json_csv(bank, out_json, out_csv)
-    print(f"[TERMS] собрано терминов: {len(bank)} → {out_json}, {out_csv}")
+    print(f"[TERMS] собрано терминов: {len(bank)} → {out_json}, {out_csv}"
+          + (f" (не прочитано файлов: {failed[0]})" if failed[0] else ""))
     return 0
 
 
-# -------------------------------- main ---------------------------------- #
+def do_loadtest(log_path: str, url: str | None, concurrency: int, rate: float, repeat: int,
+                port: int, out_json: str | None = None) -> int:
+    """
+    Прогон журнала запросов (JSONL) против сервиса. Без --url поднимает
+    локальный service.py на --port и гасит его после прогона.
+    """
+    import json
+    from .core.loadtest import read_request_log, run_load, start_service, format_report
 
-def main():
-    from multiprocessing import freeze_support
+    reqs, skipped = read_request_log(log_path)
+    if not reqs:
+        print(f"[LOAD] в {log_path} нет запросов (пропущено строк: {skipped})")
+        return 4
 
-    # поддержка frozen-приложений (PyInstaller + multiprocessing)
-    freeze_support()
+    proc = None
+    try:
+        if not url:
+            proc = start_service(port)
+            url = f"http://127.0.0.1:{port}"
+        rep = run_load(url, reqs, concurrency=concurrency, rate=rate, repeat=repeat)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    rep["skipped"] = skipped
+    print(format_report(rep))
+    if out_json:
+        with open(out_json, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=2)
+    return 0 if not rep["errors"] else 2
+
+
+def do_daemon(ap: argparse.ArgumentParser, ap_check: argparse.ArgumentParser, sock_path: str,
+              cfg_root=None, idle_timeout: float = 0.0) -> int:
+    """Держит конфиг и пулы загруженными и выполняет пересланные check (по одному)."""
+    from .core import daemon
+
+    warm = daemon.WarmState()
+    warm.config(cfg_root)  # прогрев профиля по умолчанию
+
+    def run(argv: List[str]) -> int:
+        args, _unknown = ap.parse_known_args(argv)
+        if args.cmd != "check":
+            print(f"[ERR] демон выполняет только check, получено: {args.cmd}", file=sys.stderr)
+            return 2
+        cfg = warm.config(args.config)
+        return _run_check(args, ap_check, cfg=cfg, pools=warm.pools(cfg))
+
+    try:
+        daemon.serve(sock_path, run, idle_timeout=idle_timeout,
+                     on_ready=lambda p: print(f"[DAEMON] слушаю {p}", flush=True))
+    except RuntimeError as e:
+        print(f"[ERR] {e}")
+        return 1
+    finally:
+        warm.close()
+    return 0
 
-    # санитизация argv: убираем внутренние аргументы PyInstaller/MP
-    bad_prefixes = ("parent_pid=", "--multiprocessing", "--pyi-")
-    sys.argv = [sys.argv[0]] + [
-        a for a in sys.argv[1:] if not any(a.startswith(p) for p in bad_prefixes)
-    ]
 
+# -------------------------------- main ---------------------------------- #
+
+def _build_parser() -> Tuple[argparse.ArgumentParser, Dict[str, argparse.ArgumentParser]]:
     ap = argparse.ArgumentParser(
         prog="gost-precheck",
         description=f"GOST 2.105/34 precheck (v{APP_VERSION}, high-performance, offline)"
@@ -191,12 +608,32 @@ def main():
     ap_check.add_argument("--config", help="Папка с конфигами JSON (профиль)", default=None)
     ap_check.add_argument("--recursive", action="store_true", help="Рекурсивно обходить папки")
     ap_check.add_argument("--debug", action="store_true", help="Диагностика loader/внутр.ошибок")
+    ap_check.add_argument("--jobs", type=int, default=1,
+                          help="Сколько файлов проверять параллельно (0 — по числу CPU)")
+    ap_check.add_argument("--journal", help="Журнал проверенных файлов (JSONL) для продолжения прогона")
+    ap_check.add_argument("--resume", action="store_true",
+                          help="Продолжить прогон: пропустить файлы, уже записанные в --journal")
+    ap_check.add_argument("--shard", default=None,
+                          help="Проверить только часть i/N корпуса (разбиение по размеру файлов)")
+    ap_check.add_argument("--summary-out", default=None, help="JSON-сводка прогона (для merge-reports)")
+    ap_check.add_argument("--startup-profile", action="store_true",
+                          help="Показать в stderr время старта: импорты, конфиг")
+    ap_check.add_argument("--daemon", action="store_true",
+                          help="Выполнить в запущенном gost-precheck daemon (если его нет — локально)")
 
     # watch
     ap_watch = sub.add_parser("watch", help="Следить за папкой и проверять изменения")
     ap_watch.add_argument("folder", help="Папка для наблюдения")
     ap_watch.add_argument("--config", help="Папка с конфигами JSON (профиль)", default=None)
     ap_watch.add_argument("--interval", type=float, default=2.0, help="Интервал опроса (сек)")
+    ap_watch.add_argument("--debounce", type=float, default=1.0, help="Сколько секунд файл должен не меняться")
+    ap_watch.add_argument("--workers", type=int, default=2, help="Параллельных обработчиков")
+    ap_watch.add_argument("--backend", choices=("auto", "inotify", "poll"), default="auto",
+                          help="Источник событий: inotify (Linux) или опрос")
+    ap_watch.add_argument("--no-recursive", action="store_true", help="Не следить за подпапками")
+    ap_watch.add_argument("--state", default=None,
+                          help="Файл состояния SQLite (по умолчанию <папка>/.gost-precheck-watch.sqlite)")
+    ap_watch.add_argument("--no-state", action="store_true", help="Не сохранять состояние между запусками")
     ap_watch.add_argument("--debug", action="store_true", help="Диагностика loader/внутр.ошибок")
 
     # terms
@@ -205,18 +642,129 @@ def main():
     ap_terms.add_argument("--recursive", action="store_true", help="Рекурсивно обходить папки")
     ap_terms.add_argument("--out", default="terms.json", help="JSON-вывод (банк терминов)")
     ap_terms.add_argument("--out-csv", default="terms.csv", help="CSV-вывод (для Excel)")
+    ap_terms.add_argument("--jobs", type=int, default=0,
+                          help="Сколько процессов разбирают файлы (0 — по числу CPU, 1 — без пула)")
+
+    # loadtest
+    ap_load = sub.add_parser("loadtest", help="Нагрузочный прогон service.py по журналу запросов JSONL")
+    ap_load.add_argument("log", nargs="?", default="requests.jsonl", help="Журнал запросов (JSONL)")
+    ap_load.add_argument("--url", default=None, help="Адрес сервиса; без него поднимается локальный service.py")
+    ap_load.add_argument("--port", type=int, default=8766, help="Порт локального service.py")
+    ap_load.add_argument("--concurrency", type=int, default=4, help="Одновременных соединений")
+    ap_load.add_argument("--rate", type=float, default=0.0, help="Запросов в секунду (0 — без ограничения)")
+    ap_load.add_argument("--repeat", type=int, default=1, help="Сколько раз проиграть журнал")
+    ap_load.add_argument("--out", default=None, help="JSON-отчёт о прогоне")
+
+    # serve-work / worker
+    ap_serve = sub.add_parser("serve-work", help="Координатор: раздать файлы воркерам по сети")
+    ap_serve.add_argument("paths", nargs="+", help="Файлы и/или папки")
+    ap_serve.add_argument("--listen", default="127.0.0.1:8770",
+                          help="Адрес host:port для воркеров (не loopback — только с --token)")
+    ap_serve.add_argument("--token", default=None,
+                          help="Общий секрет для воркеров (по умолчанию GOST_PRECHECK_WORK_TOKEN)")
+    ap_serve.add_argument("--config", help="Папка с конфигами JSON (профиль)", default=None)
+    ap_serve.add_argument("--recursive", action="store_true", help="Рекурсивно обходить папки")
+    ap_serve.add_argument("--debug", action="store_true", help="Диагностика loader/внутр.ошибок")
+    ap_serve.add_argument("--summary-out", default=None, help="JSON-сводка прогона")
+
+    ap_worker = sub.add_parser("worker", help="Воркер: брать файлы у serve-work и проверять")
+    ap_worker.add_argument("--connect", required=True, help="Адрес координатора host:port")
+    ap_worker.add_argument("--config", help="Папка с конфигами JSON (должен совпадать с координатором)",
+                           default=None)
+    ap_worker.add_argument("--jobs", type=int, default=1, help="Сколько файлов проверять параллельно (0 — по числу CPU)")
+    ap_worker.add_argument("--fetch", action="store_true",
+                           help="Всегда получать документы по сети (нет общей файловой системы)")
+    ap_worker.add_argument("--token", default=None,
+                           help="Общий секрет координатора (по умолчанию GOST_PRECHECK_WORK_TOKEN)")
+
+    # daemon
+    ap_daemon = sub.add_parser("daemon", help="Тёплый демон для быстрых check --daemon (Unix-сокет)")
+    ap_daemon.add_argument("--socket", default=None, help="Путь сокета (по умолчанию в XDG_RUNTIME_DIR или /tmp)")
+    ap_daemon.add_argument("--config", help="Профиль, загружаемый заранее", default=None)
+    ap_daemon.add_argument("--idle-timeout", type=float, default=0.0,
+                           help="Завершиться после стольких секунд без запросов (0 — не завершаться)")
+
+    # merge-reports
+    ap_merge = sub.add_parser("merge-reports", help="Объединить сводки шардов (check --summary-out)")
+    ap_merge.add_argument("summaries", nargs="+", help="JSON-сводки шардов")
+    ap_merge.add_argument("--out", default=None, help="Итоговая JSON-сводка по корпусу")
+
+    return ap, {"check": ap_check}
+
+
+def _run_check(args, ap_check: argparse.ArgumentParser, cfg: Dict = None, pools=None) -> int:
+    if args.resume and not args.journal:
+        ap_check.error("--resume требует --journal")
+    if args.shard:
+        from .core.scheduler import parse_shard
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            ap_check.error(str(e))
+    return do_check(args.paths, cfg_root=args.config, recursive=args.recursive, debug=args.debug,
+                    jobs=args.jobs, journal_path=args.journal, resume=args.resume,
+                    shard=args.shard, summary_out=args.summary_out, cfg=cfg, pools=pools,
+                    startup_profile=args.startup_profile)
+
+
+def main():
+    # поддержка frozen-приложений (PyInstaller + multiprocessing); вне frozen — no-op,
+    # поэтому multiprocessing там не импортируем (экономия на старте)
+    if getattr(sys, "frozen", False):
+        from multiprocessing import freeze_support
+        freeze_support()
 
+    # санитизация argv: убираем внутренние аргументы PyInstaller/MP
+    bad_prefixes = ("parent_pid=", "--multiprocessing", "--pyi-")
+    sys.argv = [sys.argv[0]] + [
+        a for a in sys.argv[1:] if not any(a.startswith(p) for p in bad_prefixes)
+    ]
+
+    # быстрый путь: пересылка check тёплому демону — до разбора аргументов и загрузки конфига
+    from .core import daemon
+    target = daemon.client_target(sys.argv[1:])
+    if target is not None:
+        reply = daemon.forward(*target)
+        if reply is not None:
+            sys.stdout.write(reply.get("out", ""))
+            sys.stderr.write(reply.get("err", ""))
+            sys.exit(int(reply.get("rc", 0)))
+        # демон не запущен — проверяем локально
+
+    ap, subs = _build_parser()
     args, _unknown = ap.parse_known_args()
 
     if args.cmd == "check":
-        sys.exit(do_check(args.paths, cfg_root=args.config, recursive=args.recursive, debug=args.debug))
+        sys.exit(_run_check(args, subs["check"]))
+
+    if args.cmd == "daemon":
+        sys.exit(do_daemon(ap, subs["check"], args.socket or daemon.default_socket_path(),
+                           cfg_root=args.config, idle_timeout=args.idle_timeout))
+
+    if args.cmd == "serve-work":
+        sys.exit(do_serve_work(args.paths, args.listen, cfg_root=args.config, recursive=args.recursive,
+                               debug=args.debug, summary_out=args.summary_out, token=args.token))
+
+    if args.cmd == "worker":
+        sys.exit(do_worker(args.connect, cfg_root=args.config, jobs=args.jobs, fetch=args.fetch,
+                           token=args.token))
+
+    if args.cmd == "merge-reports":
+        sys.exit(do_merge_reports(args.summaries, out_json=args.out))
 
     if args.cmd == "watch":
-        do_watch(args.folder, cfg_root=args.config, interval=args.interval, debug=args.debug)
+        do_watch(args.folder, cfg_root=args.config, interval=args.interval, debug=args.debug,
+                 recursive=not args.no_recursive, debounce=args.debounce, workers=args.workers,
+                 backend=args.backend, state_path="" if args.no_state else args.state)
         return
 
     if args.cmd == "terms":
-        sys.exit(do_terms(args.paths, recursive=args.recursive, out_json=args.out, out_csv=args.out_csv))
+        sys.exit(do_terms(args.paths, recursive=args.recursive, out_json=args.out, out_csv=args.out_csv,
+                          jobs=args.jobs))
+
+    if args.cmd == "loadtest":
+        sys.exit(do_loadtest(args.log, args.url, args.concurrency, args.rate, args.repeat,
+                             args.port, out_json=args.out))
 
 
 if __name__ == "__main__":
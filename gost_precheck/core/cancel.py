@@ -0,0 +1,62 @@
+# gost_precheck/core/cancel.py
+"""
+Дедлайн/кооперативная отмена для analyze_file.
+
+Токен проверяется между порциями работы (в лоадере и на каждом этапе engine);
+уже запущенную порцию прервать нельзя — она дорабатывает, остальные снимаются.
+В дочерние процессы уходит только дедлайн (remote()) — флаг ручной отмены
+туда не доходит, но незапущенные задачи процессного пула снимаются сразу.
+
+Ограничение: регулярка, застрявшая в backtracking внутри re, держит GIL —
+в потоке её не прервать, дедлайн сработает, когда матч вернёт управление.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+
+class CancelToken:
+    def __init__(self, timeout: Optional[float] = None):
+        # wall-clock, чтобы дедлайн был сравним и в дочерних процессах
+        self.deadline: Optional[float] = (time.time() + timeout) if timeout else None
+        self._event = threading.Event()
+        self._reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled"):
+        if self._reason is None:
+            self._reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.cancel("deadline")
+            return True
+        return False
+
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason
+
+    def remote(self) -> "DeadlineToken":
+        """Сериализуемая копия (только дедлайн) — для ProcessPool."""
+        return DeadlineToken(self.deadline)
+
+
+class DeadlineToken:
+    __slots__ = ("deadline",)
+
+    def __init__(self, deadline: Optional[float]):
+        self.deadline = deadline
+
+    @property
+    def cancelled(self) -> bool:
+        return self.deadline is not None and time.time() >= self.deadline
+
+    @property
+    def reason(self) -> Optional[str]:
+        return "deadline" if self.cancelled else None
@@ -3,12 +3,14 @@ from typing import List, Dict
 from ..issue import Issue
 from ..constants import CATEGORY, SEVERITY_ERROR
 from ..utils import context_slice
-import re
+from ..config import compile_rules
 
 def check(paragraph: str, idx: int, cfg: Dict) -> List[Issue]:
     issues: List[Issue] = []
-    for rule in cfg["brands"]["rules"]:
-        pattern = re.compile(rule["pattern"], flags=re.IGNORECASE if rule.get("ignore_case", True) else 0)
+    rules = cfg.get("__rules")
+    if rules is None:  # cfg собран не через load_all
+        rules = compile_rules(cfg)
+    for pattern, rule in rules.get("brands", ()):
         for m in pattern.finditer(paragraph):
             if "http://" in paragraph or "https://" in paragraph:
                 continue
@@ -4,30 +4,45 @@ from typing import List, Dict
 from ..issue import Issue
 from ..constants import CATEGORY, RID, SEVERITY_WARN
 from ..utils import context_slice
+from .. import normalize
 
-# слово-минус-слово, исключая числа по краям
-RE_DASH_WORDS = re.compile(r'(?<!\d)(?<=\S)\s-\s(?=\S)(?!\d)')
-# также «слепые» случаи без пробелов: слово-слово
+# «слепые» случаи без пробелов: слово-слово (лоадер их не заменяет — только предупреждение)
 RE_DASH_TIGHT  = re.compile(r'(?<!\d)(?<=\S)-(?!\d)(?=\S)')
 
-# "прямые" кавычки
-RE_STRAIGHT_QUOTES = re.compile(r'"([^"\n]{1,200})"')
-
 def check(paragraph: str, idx: int, cfg: Dict) -> List[Issue]:
+    """
+    Предупреждения о том, что нормализация лоадера заменила бы (те же правила —
+    normalize.find), для текста, прочитанного без неё.
+    """
     out: List[Issue] = []
-    pn = cfg.get("settings", {}).get("post_normalize", {})
+    pn = normalize.settings(cfg)
     if not (pn.get("dashes") or pn.get("quotes")):
         return out
 
-    if pn.get("dashes"):
-        for m in RE_DASH_WORDS.finditer(paragraph):
+    for a, b, kind, repl in normalize.find(paragraph, cfg):
+        if kind == "dashes":
+            # «хвост» тире (пробел после минуса) — часть предыдущей находки;
+            # минус между числами — не тире
+            if not repl.strip() or (a and paragraph[a - 1].isdigit()) \
+                    or (b + 1 < len(paragraph) and paragraph[b + 1].isdigit()):
+                continue
             out.append(Issue(
-                idx, m.start(), m.end()-m.start(), SEVERITY_WARN,
+                idx, a, b + 1 - a, SEVERITY_WARN,
                 CATEGORY['NORM'], RID['POSTNORM_DASH'],
                 "Между словами используется минус. Рекомендуется «—» с пробелами.",
-                context_slice(paragraph, m.start()),
-                [" — "]
+                context_slice(paragraph, a),
+                [f"{repl} "]
             ))
+        else:
+            out.append(Issue(
+                idx, a, b - a, SEVERITY_WARN,
+                CATEGORY['NORM'], RID['POSTNORM_QUOTES'],
+                "Прямые кавычки. Рекомендуются «ёлочки».",
+                context_slice(paragraph, a),
+                [repl]
+            ))
+
+    if pn.get("dashes"):
         for m in RE_DASH_TIGHT.finditer(paragraph):
             out.append(Issue(
                 idx, m.start(), 1, SEVERITY_WARN,
@@ -37,15 +52,4 @@ def check(paragraph: str, idx: int, cfg: Dict) -> List[Issue]:
                 ["—"]
             ))
 
-    if pn.get("quotes"):
-        for m in RE_STRAIGHT_QUOTES.finditer(paragraph):
-            repl = f"«{m.group(1)}»"
-            out.append(Issue(
-                idx, m.start(), len(m.group(0)), SEVERITY_WARN,
-                CATEGORY['NORM'], RID['POSTNORM_QUOTES'],
-                "Прямые кавычки. Рекомендуются «ёлочки».",
-                context_slice(paragraph, m.start()),
-                [repl]
-            ))
-
     return out
@@ -1,6 +1,7 @@
 # gost_precheck/core/checks/spell.py
 from __future__ import annotations
 import os
+import time
 from typing import List, Dict, Tuple, Set
 import re
 
@@ -8,6 +9,7 @@ from ..issue import Issue
 from ..utils import context_slice
 from ..constants import CATEGORY, RID, SEVERITY_ERROR
 from ..regexes import RE_RU_WORD
+from .. import metrics
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Пара «быстрых» эвристик, срабатывающих даже без словаря
@@ -176,7 +178,10 @@ def check(paragraph: str, idx: int, cfg: Dict) -> List[Issue]:
     # Кэш словаря на уровень модуля
     global _RU_BASE, _RU_INDEX
     if "_RU_BASE" not in globals():
+        t0 = time.perf_counter()
         _RU_BASE, _RU_INDEX = _load_ru_dictionary(cfg)
+        # в ProcessPool замер остаётся в дочернем процессе; в /metrics он виден при inline-исполнении
+        metrics.observe("gost_dict_load_seconds", time.perf_counter() - t0, dict="spell")
 
     for m in RE_RU_WORD.finditer(paragraph):
         word  = m.group(0)
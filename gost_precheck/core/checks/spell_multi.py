@@ -3,13 +3,14 @@
 # без pyenchant/hunspell. Работает по словарю ru_RU.dic (+ PWL + частотный список).
 
 from __future__ import annotations
-import os, io, re
+import os, io, re, time
 from typing import Dict, List, Set, Tuple, DefaultDict
 from collections import defaultdict
 
 from ..issue import Issue
 from ..constants import CATEGORY, RID, SEVERITY_ERROR
 from ..utils import context_slice
+from .. import metrics
 
 _WORD = re.compile(r"[A-Za-zА-Яа-яЁё\-]{3,}")
 _REPEAT3 = re.compile(r"(.)\1\1+")  # "инструкциии", "поддробные"
@@ -142,8 +143,11 @@ def _load_pwl(cfg: Dict, dict_dir: str | None) -> Set[str]:
 def _build_vocab(cfg: Dict) -> Vocab:
     key = repr(sorted(cfg.get("settings", {}).get("spell", {}).items()))
     if key in _VOCAB_CACHE:
+        metrics.inc("gost_cache_requests_total", cache="vocab", result="hit")
         return _VOCAB_CACHE[key]
+    metrics.inc("gost_cache_requests_total", cache="vocab", result="miss")
 
+    t0 = time.perf_counter()
     dict_dir = _resolve_dict_dir(cfg)
     words: Set[str] = set()
     words.update(_load_ru_dic(dict_dir))
@@ -163,6 +167,7 @@ def _build_vocab(cfg: Dict) -> Vocab:
 
     vocab = Vocab(words)
     _VOCAB_CACHE[key] = vocab
+    metrics.observe("gost_dict_load_seconds", time.perf_counter() - t0, dict="spell_multi")
     return vocab
 
 
@@ -0,0 +1,291 @@
+# gost_precheck/core/coalesce.py
+"""
+Дедупликация одинаковых одновременных анализов + короткоживущий кэш результатов.
+
+Ключ: (идентичность файла, хэш конфига). Идентичность — по stat
+(путь, размер, mtime_ns, inode) или, при identity="content", по SHA-1 содержимого.
+Пока первый запрос («лидер») считает analyze_file, остальные с тем же ключом
+ждут его результат; готовый результат ещё ttl секунд отдаётся из кэша.
+
+Результат общий для всех ожидающих — вызывающий код не должен его мутировать.
+Общий анализ идёт в отдельном потоке без колбэка и токена какого-либо клиента:
+замечания раздаются подписчикам (лидеру наравне с остальными, опоздавшим —
+с начала), ошибка колбэка (клиент отключился) снимает только этого клиента.
+Дедлайн (token) у каждого свой: истёк — клиент уходит с тем, что успел
+получить (truncated). Ушли все — общий анализ отменяется. Частичные
+результаты никому не раздаются и в кэш не попадают.
+
+Результат с close() (spill.SpilledIssues — замечания во временных файлах)
+закрывается, когда он вытеснен из кэша (ttl, max_entries, clear) и его
+больше никто не читает: каждый получивший его вызывающий обязан вернуть
+его через release(result).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cancel import CancelToken
+from .config import config_fingerprint
+from .issue import Issue
+from .spill import sort_key
+from .utils import file_digest
+from . import metrics
+
+Result = Tuple[List[Issue], Dict[str, int], Dict[str, Any]]
+
+
+def file_identity(path: str, identity: str = "stat") -> Tuple:
+    ap = os.path.abspath(path)
+    if identity == "content":
+        return (ap, file_digest(ap))
+    st = os.stat(ap)
+    return (ap, st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class _Subscriber:
+    __slots__ = ("on_issues", "lock", "error", "received")
+
+    def __init__(self, on_issues):
+        self.on_issues = on_issues
+        self.lock = threading.Lock()     # порядок порций: догоняющая выдача, затем живые
+        self.error: Optional[BaseException] = None
+        self.received: List[Issue] = []  # для частичного результата по дедлайну
+
+    def deliver(self, batch: List[Issue]):
+        with self.lock:
+            if self.error is not None:
+                return
+            self.received.extend(batch)
+            if self.on_issues is not None:
+                try:
+                    self.on_issues(batch)
+                except BaseException as e:
+                    self.error = e
+
+
+class _Flight:
+    """Один общий анализ и его подписчики."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.batches: List[List[Issue]] = []
+        self.subs: List[_Subscriber] = []
+        self.token = CancelToken()       # только «ушли все подписчики»
+        self.done = threading.Event()
+        self.result: Optional[Result] = None
+        self.error: Optional[BaseException] = None
+
+    def publish(self, batch: List[Issue]):
+        with self.lock:
+            self.batches.append(batch)
+            subs = list(self.subs)
+        for sub in subs:
+            sub.deliver(batch)
+
+    def join(self, on_issues) -> Optional[_Subscriber]:
+        """-> None, если анализ уже завершён (результат — из кэша, а не отсюда)."""
+        sub = _Subscriber(on_issues)
+        with sub.lock:
+            with self.lock:
+                if self.done.is_set():
+                    return None
+                backlog = list(self.batches)
+                self.subs.append(sub)
+        for batch in backlog:
+            sub.deliver(batch)
+        return sub
+
+    def finish(self, result: Optional[Result], error: Optional[BaseException]) -> bool:
+        """-> True, если результат уже некому отдавать (подписчики ушли раньше)."""
+        with self.lock:
+            self.result, self.error = result, error
+            self.done.set()
+            return not self.subs
+
+    def leave(self, sub: _Subscriber) -> Tuple[bool, bool]:
+        """-> (ушёл последний, анализ уже завершён)."""
+        with self.lock:
+            if sub in self.subs:
+                self.subs.remove(sub)
+            return not self.subs, self.done.is_set()
+
+
+class AnalysisCoalescer:
+    def __init__(self, ttl: float = 10.0, max_entries: int = 256, identity: str = "stat",
+                 analyze: Optional[Callable[..., Result]] = None):
+        if analyze is None:
+            from .engine import analyze_file as analyze
+        self._analyze = analyze
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self.identity = identity
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple, _Flight] = {}
+        self._cache: "OrderedDict[Tuple, Tuple[float, Result]]" = OrderedDict()
+        # id(result) -> [result, читателей, вытеснен] — только для результатов с close()
+        self._held: Dict[int, list] = {}
+
+    def key(self, path: str, cfg: Dict) -> Tuple:
+        return (file_identity(path, self.identity), config_fingerprint(cfg))
+
+    def analyze(self, path: str, cfg: Dict,
+                on_issues: Optional[Callable[[List[Issue]], None]] = None,
+                token: Optional[CancelToken] = None, **kwargs) -> Result:
+        """
+        Как engine.analyze_file, но одинаковые запросы считаются один раз.
+        on_issues каждого вызывающего получает все замечания по мере готовности
+        (из кэша — одной пачкой). token — дедлайн только этого вызывающего.
+        Полученный результат вернуть через release(), когда он больше не нужен.
+        """
+        key = self.key(path, cfg)
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._expire(now)
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                flight: Optional[_Flight] = None
+                result = hit[1]
+                self._acquire(result)
+            else:
+                result = None
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = _Flight()
+        self._close_all(evicted)
+
+        if result is not None:
+            metrics.inc("gost_cache_requests_total", cache="result", result="hit")
+            return self._replay(result, on_issues)
+
+        sub = flight.join(on_issues)
+        if sub is None:
+            # опоздали: анализ завершился между поиском и подпиской
+            return self.analyze(path, cfg, on_issues=on_issues, token=token, **kwargs)
+        metrics.inc("gost_cache_requests_total", cache="result", result="miss" if leader else "coalesced")
+        if leader:
+            threading.Thread(target=self._run, args=(key, flight, path, cfg, kwargs),
+                             name="coalesce", daemon=True).start()
+        try:
+            while not flight.done.wait(0.1 if token is not None else None):
+                if sub.error is not None:
+                    raise sub.error
+                if token is not None and token.cancelled:
+                    return self._partial(sub, token)
+            if sub.error is not None:
+                raise sub.error
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                # пока подписчик не вышел, результат держит ссылка самого анализа — не закрыт
+                self._acquire(flight.result)
+            return flight.result
+        finally:
+            last, done = flight.leave(sub)
+            if last and not done:
+                self._abandon(key, flight)
+            elif last and flight.result is not None:
+                self.release(flight.result)   # ссылка анализа: раздавать больше некому
+
+    def _run(self, key: Tuple, flight: _Flight, path: str, cfg: Dict, kwargs: Dict):
+        try:
+            result = self._analyze(path, cfg, on_issues=flight.publish, token=flight.token, **kwargs)
+            if result[2].get("truncated"):
+                # отменён (ушли все) или лоадер не дочитал — не раздаём и не кэшируем
+                raise RuntimeError(f"анализ прерван: {result[2].get('cancel_reason') or 'truncated'}")
+        except BaseException as e:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.finish(None, e)
+            return
+        evicted = []
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+            if hasattr(result[0], "close"):
+                # ссылка анализа; без кэша результат сразу «вытеснен» — закроет последний читатель
+                self._held[id(result)] = [result, 1, self.ttl <= 0]
+            if self.ttl > 0:
+                self._cache[key] = (time.monotonic() + self.ttl, result)
+                while len(self._cache) > self.max_entries:
+                    evicted += self._evict(self._cache.popitem(last=False)[1][1])
+        self._close_all(evicted)
+        if flight.finish(result, None):
+            self.release(result)
+
+    def _abandon(self, key: Tuple, flight: _Flight):
+        # новые запросы с тем же ключом начнут свой анализ, а не подпишутся на отменённый
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        flight.token.cancel("abandoned")
+
+    @staticmethod
+    def _partial(sub: _Subscriber, token: CancelToken) -> Result:
+        with sub.lock:
+            issues = sorted(sub.received, key=sort_key)
+        by_cat = dict(Counter(it.category for it in issues))
+        return issues, by_cat, {"truncated": True, "cancel_reason": token.reason or "deadline",
+                                "coalesced": True}
+
+    def release(self, result: Result):
+        """Вызывающий закончил читать результат analyze()."""
+        with self._lock:
+            entry = self._held.get(id(result))
+            if entry is None or entry[0] is not result:
+                return
+            entry[1] -= 1
+            done = entry[2] and entry[1] <= 0
+            if done:
+                del self._held[id(result)]
+        if done:
+            result[0].close()
+
+    def clear(self):
+        with self._lock:
+            evicted = []
+            for _exp, result in self._cache.values():
+                evicted += self._evict(result)
+            self._cache.clear()
+        self._close_all(evicted)
+
+    # вызываются под self._lock; закрытие (удаление файлов) — после, в _close_all
+
+    def _acquire(self, result: Result):
+        entry = self._held.get(id(result))
+        if entry is not None and entry[0] is result:
+            entry[1] += 1
+
+    def _evict(self, result: Result) -> List:
+        entry = self._held.get(id(result))
+        if entry is None or entry[0] is not result:
+            return []
+        entry[2] = True
+        if entry[1] > 0:
+            return []
+        del self._held[id(result)]
+        return [result[0]]
+
+    def _expire(self, now: float) -> List:
+        evicted = []
+        for key in [k for k, (exp, _r) in self._cache.items() if exp <= now]:
+            evicted += self._evict(self._cache.pop(key)[1])
+        return evicted
+
+    @staticmethod
+    def _close_all(items: List):
+        for it in items:
+            it.close()
+
+    @staticmethod
+    def _replay(result: Result, on_issues) -> Result:
+        if on_issues and result[0]:
+            on_issues(result[0])
+        return result
@@ -1,7 +1,10 @@
 # gost_precheck/core/config.py
-import json, os
+import json, os, hashlib, pickle, re, sys
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# версия формата снапшота: менять при изменении структуры cfg/__rules
+_SNAPSHOT_VERSION = 3  # 3: __refs — stat словарей вне профиля
 
 def _read_json(path: Path) -> dict:
     with open(path, "r", encoding="utf-8") as f:
@@ -11,7 +14,84 @@ def _read_lines(path: Path) -> List[str]:
     with open(path, "r", encoding="utf-8", errors="ignore") as f:
         return [ln.strip() for ln in f if ln.strip()]
 
-def load_all(cfg_root: str | None) -> Dict[str, Any]:
+def config_stamp(root: Path) -> Tuple:
+    """(имя, размер, mtime_ns) файлов профиля — меняется при любой правке конфига."""
+    try:
+        return tuple(sorted((e.name, e.stat().st_size, e.stat().st_mtime_ns)
+                            for e in os.scandir(root) if e.is_file()))
+    except OSError:
+        return ()
+
+
+def _snapshot_dir() -> Optional[Path]:
+    if os.environ.get("GOST_PRECHECK_NO_CACHE"):
+        return None
+    base = os.environ.get("GOST_PRECHECK_CACHE_DIR")
+    if base:
+        return Path(base)
+    xdg = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(xdg) / "gost-precheck"
+
+
+def _snapshot_path(root: Path) -> Optional[Path]:
+    d = _snapshot_dir()
+    if d is None:
+        return None
+    key = repr((_SNAPSHOT_VERSION, sys.version_info[:2], str(root.resolve()), config_stamp(root)))
+    return d / f"cfg-{hashlib.sha1(key.encode('utf-8')).hexdigest()}.pickle"
+
+
+def compile_rules(cfg: Dict[str, Any]) -> Dict[str, List[Tuple[Any, Dict]]]:
+    """Предкомпилированные правила brands/gost34: [(pattern, rule)]."""
+    out: Dict[str, List[Tuple[Any, Dict]]] = {}
+    for rule in (cfg.get("brands") or {}).get("rules", []):
+        flags = re.IGNORECASE if rule.get("ignore_case", True) else 0
+        out.setdefault("brands", []).append((re.compile(rule["pattern"], flags), rule))
+    for rule in (cfg.get("gost34") or {}).get("rules", []):
+        out.setdefault("gost34", []).append((re.compile(rule["pattern"]), rule))
+    return out
+
+
+def load_all(cfg_root: str | None, snapshot: bool = True) -> Dict[str, Any]:
+    """
+    Загружает профиль. С snapshot=True разобранный конфиг (вместе с
+    предкомпилированными правилами) кладётся в кэш (pickle, ключ — путь и
+    mtime/размеры файлов профиля), и повторные запуски JSON не разбирают.
+    cfg["__source"]: "snapshot" | "json".
+    """
+    root = Path(cfg_root) if cfg_root else Path(__file__).resolve().parent.parent / "config"
+    if not root.exists():
+        raise RuntimeError(f"Папка конфигов не найдена: {root}")
+
+    snap = _snapshot_path(root) if snapshot else None
+    if snap is not None:
+        try:
+            with open(snap, "rb") as fh:
+                cfg = pickle.load(fh)
+        except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+            cfg = None  # нет снапшота или он битый — читаем JSON
+        # словари вне папки профиля (*_path/*_dir) ключ снапшота не покрывает
+        if cfg is not None and not config_stale(cfg):
+            cfg["__source"] = "snapshot"
+            return cfg
+
+    cfg = _load_json_profile(root)
+    cfg["__rules"] = compile_rules(cfg)
+    cfg["__refs"] = _refs_stamp(cfg.get("settings") or {})
+    if snap is not None:
+        try:
+            snap.parent.mkdir(parents=True, exist_ok=True)
+            tmp = snap.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as fh:
+                pickle.dump(cfg, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, snap)
+        except OSError:
+            pass  # кэш — только ускорение
+    cfg["__source"] = "json"
+    return cfg
+
+
+def _load_json_profile(root: Path) -> Dict[str, Any]:
     """
     Структура:
       settings.json                        — обязательный
@@ -19,10 +99,6 @@ def load_all(cfg_root: str | None) -> Dict[str, Any]:
       words_custom.json                     — опциональный список "разрешённых" слов (кастом)
       ru_wordlist.txt                       — опциональный словарь для fallback-орфографии
     """
-    root = Path(cfg_root) if cfg_root else Path(__file__).resolve().parent.parent / "config"
-    if not root.exists():
-        raise RuntimeError(f"Папка конфигов не найдена: {root}")
-
     cfg: Dict[str, Any] = {}
     cfg["__root"] = str(root)
 
@@ -54,4 +130,94 @@ def load_all(cfg_root: str | None) -> Dict[str, Any]:
     ru_wordlist = root / "ru_wordlist.txt"
     cfg["dict_ru_wordlist_path"] = str(ru_wordlist) if ru_wordlist.exists() else None
 
+    cfg["__fingerprint"] = config_fingerprint(cfg)
     return cfg
+
+def _file_digest(path: str) -> Optional[str]:
+    """sha1 содержимого файла (каталога — его файлов по именам); None — не прочитать."""
+    h = hashlib.sha1()
+    try:
+        if os.path.isdir(path):
+            for e in sorted(os.scandir(path), key=lambda e: e.name):
+                if e.is_file():
+                    h.update(e.name.encode("utf-8") + b"\0")
+                    with open(e.path, "rb") as f:
+                        h.update(hashlib.sha1(f.read()).digest())
+        else:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _is_path_key(key: str) -> bool:
+    return key.endswith("_path") or key.endswith("_dir")
+
+
+def _path_refs(obj: Any, key: str = "") -> List[str]:
+    """Значения *_path/*_dir в настройках (файлы/каталоги, от которых зависит проверка)."""
+    if isinstance(obj, dict):
+        return [p for k, v in obj.items() for p in _path_refs(v, k)]
+    if isinstance(obj, list):
+        return [p for v in obj for p in _path_refs(v)]
+    return [obj] if isinstance(obj, str) and _is_path_key(key) else []
+
+
+def _stat_tree(path: str) -> Tuple:
+    try:
+        if os.path.isdir(path):
+            return tuple(sorted((e.name, e.stat().st_size, e.stat().st_mtime_ns)
+                                for e in os.scandir(path) if e.is_file()))
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime_ns)
+    except OSError:
+        return ()
+
+
+def _refs_stamp(settings: Dict[str, Any]) -> Tuple:
+    """(исходное значение, абсолютный путь, stat) каждого *_path/*_dir настроек."""
+    return tuple((p, os.path.abspath(p), _stat_tree(p)) for p in sorted(set(_path_refs(settings))))
+
+
+def config_stale(cfg: Dict[str, Any]) -> bool:
+    """Изменились ли файлы вне папки профиля, на которые ссылаются настройки
+    (тогда __fingerprint и загруженные словари устарели)."""
+    refs = cfg.get("__refs")
+    if refs is None:
+        return False
+    return _refs_stamp(cfg.get("settings") or {}) != refs
+
+
+def _content_only(obj: Any, key: str = "") -> Any:
+    """Пути к файлам/каталогам в настройках — заменяем хэшем их содержимого."""
+    if isinstance(obj, dict):
+        return {k: _content_only(v, k) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_content_only(v) for v in obj]
+    if isinstance(obj, str) and _is_path_key(key):
+        digest = _file_digest(obj)
+        return {"sha1": digest} if digest is not None else obj
+    return obj
+
+
+def config_fingerprint(cfg: Dict[str, Any]) -> str:
+    """
+    Стабильный хэш содержимого конфига (ключ кэшей/дедупликации, сверка
+    журнала и воркеров). Только содержимое: настройки, правила, словари;
+    служебные ключи "__*" и расположение профиля на диске не входят — одна
+    и та же папка, указанная по-разному или скопированная на другой хост,
+    даёт тот же хэш. Для cfg из load_all берётся готовое значение.
+    """
+    fp = cfg.get("__fingerprint")
+    if fp:
+        return fp
+    data = {k: v for k, v in cfg.items() if not k.startswith("__") and k != "dict_ru_wordlist_path"}
+    data["settings"] = _content_only(cfg.get("settings") or {})
+    wordlist = cfg.get("dict_ru_wordlist_path")
+    if wordlist:
+        data["dict_ru_wordlist"] = _file_digest(wordlist)
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False,
+                     default=lambda o: sorted(o) if isinstance(o, (set, frozenset)) else str(o))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
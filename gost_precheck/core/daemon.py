@@ -0,0 +1,228 @@
+# gost_precheck/core/daemon.py
+"""
+Тёплый локальный демон для быстрых вызовов CLI (git-хуки, редакторы).
+
+`gost-precheck daemon` держит загруженный конфиг и пулы исполнителей (с уже
+прочитанными словарями в процессах орфографии) и слушает Unix-сокет.
+`gost-precheck check --daemon ...` (или переменная GOST_PRECHECK_DAEMON)
+пересылает argv и текущую папку демону и печатает его вывод с тем же кодом
+возврата. Если демон недоступен — проверка идёт локально, как обычно.
+
+Запросы выполняются демоном по одному: chdir в папку клиента и перехват
+stdout/stderr — состояние процесса, параллелить их нельзя.
+Протокол — те же кадры с длиной, что у serve-work/worker.
+
+Модуль импортируется на каждом запуске CLI, поэтому на уровне модуля — только
+os/sys; сокеты и прочее подгружаются, когда действительно нужны.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ENV_VAR = "GOST_PRECHECK_DAEMON"
+FORWARD_FLAG = "--daemon"
+FORWARDED_COMMANDS = ("check",)
+
+
+def default_socket_path() -> str:
+    import tempfile
+
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(base, f"gost-precheck-{uid}.sock")
+
+
+def client_target(argv: List[str]) -> Optional[Tuple[str, List[str]]]:
+    """
+    Нужно ли переслать вызов демону; -> (путь сокета, argv без --daemon) или None.
+    GOST_PRECHECK_DAEMON: "1"/"auto" — сокет по умолчанию, иной текст — путь сокета,
+    пусто/"0" — выключено.
+    """
+    if not argv or argv[0] not in FORWARDED_COMMANDS or os.name != "posix":
+        return None
+    env = os.environ.get(ENV_VAR, "").strip()
+    if FORWARD_FLAG in argv:
+        argv = [a for a in argv if a != FORWARD_FLAG]
+    elif env in ("", "0"):
+        return None
+    path = env if env not in ("", "0", "1", "auto") else default_socket_path()
+    return path, argv
+
+
+def _owned_socket(sock_path: str) -> bool:
+    """
+    Сокет наш: сокет по умолчанию лежит в общем tmp (без XDG_RUNTIME_DIR), и
+    чужой процесс мог бы занять путь и отвечать rc=0 в обход проверки.
+    """
+    import stat
+
+    try:
+        st = os.lstat(sock_path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def _peer_is_self(sock) -> bool:
+    """Linux: uid процесса по ту сторону сокета (SO_PEERCRED); иначе — только проверка файла."""
+    import socket
+    import struct
+
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    try:
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    except OSError:
+        return False
+    _, uid, _ = struct.unpack("3i", creds)
+    return uid == os.getuid()
+
+
+def forward(sock_path: str, argv: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Выполнить argv в демоне; None — демон не запущен, оборвал ответ или сокет
+    принадлежит другому пользователю (проверять локально).
+    """
+    import socket
+    from .distributed import send_msg, recv_msg, ProtocolError
+
+    if not _owned_socket(sock_path):
+        return None
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(sock_path)
+    except OSError:
+        return None
+    with sock:
+        if not _peer_is_self(sock):
+            return None
+        try:
+            send_msg(sock, {"argv": argv, "cwd": os.getcwd()})
+            reply, _ = recv_msg(sock)
+        except (OSError, ProtocolError):
+            return None  # демон упал посреди запроса — проверяем локально
+    return reply
+
+
+class WarmState:
+    """Конфиг, перечитываемый только при изменении файлов профиля, и общие пулы под него."""
+
+    def __init__(self):
+        self._cfgs: Dict[str, Tuple[Tuple, Dict]] = {}
+        self._pools = None
+        self._pools_fp: Optional[str] = None
+
+    def config(self, cfg_root: Optional[str]) -> Dict:
+        from pathlib import Path
+        from .config import load_all, config_stamp, config_stale
+
+        root = Path(cfg_root).resolve() if cfg_root else Path(__file__).resolve().parent.parent / "config"
+        stamp = config_stamp(root)
+        hit = self._cfgs.get(str(root))
+        # config_stale: словари вне папки профиля (pwl_path, dict_dir) тоже могли измениться
+        if hit is None or hit[0] != stamp or config_stale(hit[1]):
+            hit = self._cfgs[str(root)] = (stamp, load_all(str(root) if cfg_root else None))
+        return hit[1]
+
+    def pools(self, cfg: Dict):
+        from .config import config_fingerprint
+        from .scheduler import SharedPools
+
+        fp = config_fingerprint(cfg)
+        if self._pools is None or self._pools_fp != fp:
+            if self._pools is not None:
+                self._pools.close()
+            self._pools, self._pools_fp = SharedPools(cfg), fp
+        return self._pools
+
+    def close(self):
+        if self._pools is not None:
+            self._pools.close()
+            self._pools = None
+
+
+def _bind(sock_path: str):
+    import socket
+
+    if os.path.exists(sock_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(sock_path)
+        except OSError:
+            os.unlink(sock_path)  # сокет от упавшего демона
+        else:
+            probe.close()
+            raise RuntimeError(f"демон уже запущен: {sock_path}")
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old = os.umask(0o177)  # сокет доступен только владельцу
+    try:
+        srv.bind(sock_path)
+    finally:
+        os.umask(old)
+    srv.listen(16)
+    return srv
+
+
+def serve(sock_path: str, run: Callable[[List[str]], int], idle_timeout: float = 0.0,
+          on_ready: Optional[Callable[[str], None]] = None):
+    """
+    Обслуживает запросы до Ctrl-C/SIGTERM или idle_timeout секунд простоя.
+    run(argv) -> код возврата; печатает в sys.stdout/sys.stderr как обычный CLI.
+    """
+    import contextlib
+    import io
+    import signal
+    import socket
+    from .distributed import send_msg, recv_msg
+
+    srv = _bind(sock_path)
+    if idle_timeout:
+        srv.settimeout(idle_timeout)
+    def _term(*_):
+        raise KeyboardInterrupt
+
+    prev = signal.signal(signal.SIGTERM, _term)
+    if on_ready:
+        on_ready(sock_path)
+    home = os.getcwd()
+    try:
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except socket.timeout:
+                return  # простой — выходим, следующий клиент проверит локально
+            with conn:
+                conn.settimeout(None)
+                try:
+                    req, _ = recv_msg(conn)
+                except (ConnectionError, ValueError):
+                    continue
+                out, err = io.StringIO(), io.StringIO()
+                rc = 3
+                try:
+                    os.chdir(req.get("cwd") or home)
+                    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                        try:
+                            rc = run(list(req.get("argv") or []))
+                        except SystemExit as e:  # argparse / sys.exit внутри команды
+                            rc = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                        except Exception as e:
+                            print(f"[ERR] {e}", file=sys.stderr)
+                            rc = 3
+                except OSError as e:  # папки клиента нет/недоступна
+                    err.write(f"[ERR] {e}\n")
+                finally:
+                    os.chdir(home)
+                try:
+                    send_msg(conn, {"out": out.getvalue(), "err": err.getvalue(), "rc": rc})
+                except OSError:
+                    pass  # клиент ушёл, не дождавшись
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, prev)
+        srv.close()
+        with contextlib.suppress(OSError):
+            os.unlink(sock_path)
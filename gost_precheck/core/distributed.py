@@ -0,0 +1,387 @@
+# gost_precheck/core/distributed.py
+"""
+Распределённая проверка: координатор держит очередь файлов, воркеры на других
+машинах сами забирают задачи по одной («pull») — быстрый узел просто берёт
+больше, медленный меньше (work stealing без отдельного балансировщика).
+
+Протокол — кадры поверх TCP:
+  4 байта длины (big-endian) + JSON-заголовок (UTF-8);
+  если в заголовке "payload": N — следом N сырых байт (документ) кадрами
+  не длиннее PAYLOAD_CHUNK: размер документа кадром не ограничен.
+
+  воркер → {"op": "hello", "worker": имя, "cfg": отпечаток конфига, "token": общий секрет}
+  коорд. → {"op": "welcome"} | {"op": "reject", "error": ...}
+  воркер → {"op": "next"}
+  коорд. → {"op": "task", "id", "path", "size", "mtime_ns", "sha1"} | {"op": "wait", "delay"} | {"op": "done"}
+  воркер → {"op": "fetch", "id"}            (файла по этому пути у воркера нет или SHA-1 другой)
+  коорд. → {"op": "data", "id", "payload": N} + N байт
+  воркер → {"op": "result", "id", "issues", "by_category", "debug_meta"}
+         | {"op": "error", "id", "error"}
+
+Задачи отвалившегося воркера (разрыв соединения) возвращаются в очередь.
+Координатор отдаёт содержимое документов любому, кто прошёл hello, поэтому
+по умолчанию слушает только 127.0.0.1; на внешнем адресе обязателен общий
+токен (--token / GOST_PRECHECK_WORK_TOKEN). Токен идёт открытым текстом —
+вне доверенной сети нужен туннель (ssh/VPN).
+Отчёты (.rep/.rep.json) пишет координатор — рядом с исходными файлами.
+"""
+from __future__ import annotations
+
+import collections
+import hmac
+import json
+import os
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .issue import Issue
+from .utils import file_digest, file_stamp
+
+_LEN = struct.Struct(">I")
+MAX_FRAME = 256 * 1024 * 1024  # защита от мусора в потоке
+PAYLOAD_CHUNK = 16 * 1024 * 1024  # кадр данных документа
+TOKEN_ENV = "GOST_PRECHECK_WORK_TOKEN"
+DEFAULT_LISTEN = "127.0.0.1:8770"
+
+
+class ProtocolError(Exception):
+    pass
+
+
+# ------------------------------- кадры ---------------------------------- #
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(min(n - len(buf), 1 << 20))
+        if not chunk:
+            raise ConnectionError("соединение закрыто")
+        buf += chunk
+    return bytes(buf)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (n,) = _LEN.unpack(_recv_exact(sock, _LEN.size))
+    if n > MAX_FRAME:
+        raise ProtocolError(f"слишком длинный кадр: {n}")
+    return _recv_exact(sock, n)
+
+
+def _head(msg: Dict[str, Any]) -> bytes:
+    head = json.dumps(msg, ensure_ascii=False).encode("utf-8")
+    return _LEN.pack(len(head)) + head
+
+
+def send_msg(sock: socket.socket, msg: Dict[str, Any], payload: Optional[bytes] = None):
+    if payload is None:
+        sock.sendall(_head(msg))
+        return
+    parts = [_head(dict(msg, payload=len(payload)))]
+    view = memoryview(payload)
+    for k in range(0, len(payload), PAYLOAD_CHUNK):
+        chunk = view[k:k + PAYLOAD_CHUNK]
+        parts += [_LEN.pack(len(chunk)), chunk]
+    sock.sendall(b"".join(parts))
+
+
+def send_file(sock: socket.socket, msg: Dict[str, Any], path: str):
+    """Как send_msg с payload, но документ читается с диска по кадру за раз."""
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        sock.sendall(_head(dict(msg, payload=size)))
+        left = size
+        while left:
+            chunk = fh.read(min(PAYLOAD_CHUNK, left))
+            if not chunk:
+                raise OSError(f"файл укоротился во время отправки: {path}")
+            sock.sendall(_LEN.pack(len(chunk)) + chunk)
+            left -= len(chunk)
+
+
+def recv_msg(sock: socket.socket, sink=None) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """-> (заголовок, данные). С sink (файл) данные пишутся в него, а не в память."""
+    try:
+        msg = json.loads(_recv_frame(sock).decode("utf-8"))
+    except ValueError as e:
+        raise ProtocolError(f"некорректный заголовок: {e}")
+    if "payload" not in msg:
+        return msg, None
+    left = int(msg["payload"])
+    buf = bytearray() if sink is None else None
+    while left > 0:
+        chunk = _recv_frame(sock)
+        if not chunk or len(chunk) > left:
+            raise ProtocolError("длина данных не совпадает с заголовком")
+        left -= len(chunk)
+        if sink is None:
+            buf += chunk
+        else:
+            sink.write(chunk)
+    return msg, bytes(buf) if sink is None else b""
+
+
+def parse_addr(addr: str, default_host: str = "127.0.0.1") -> Tuple[str, int]:
+    host, _, port = addr.rpartition(":")
+    return host or default_host, int(port)
+
+
+# ---------------------------- координатор -------------------------------- #
+
+class Coordinator:
+    """
+    Очередь files для удалённых воркеров. on_result(index, path, result, error)
+    вызывается из потока соединения; result — кортеж как у analyze_file.
+    """
+
+    def __init__(self, files: List[str], cfg_hash: str,
+                 on_result: Callable[[int, str, Any, Optional[BaseException]], None],
+                 largest_first: bool = True, token: Optional[str] = None):
+        from .scheduler import order_largest_first
+        self.files = files
+        self.cfg_hash = cfg_hash
+        self.token = token
+        self.on_result = on_result
+        order = order_largest_first(files) if largest_first else range(len(files))
+        self._queue = collections.deque(order)
+        self._leased: Dict[int, str] = {}  # index -> воркер
+        self._left = len(files)
+        self._cv = threading.Condition()
+        self.workers: Dict[str, int] = collections.Counter()  # воркер -> файлов
+
+    @property
+    def finished(self) -> bool:
+        with self._cv:
+            return self._left == 0
+
+    def _lease(self, worker: str) -> Optional[int]:
+        with self._cv:
+            if not self._queue:
+                return None
+            i = self._queue.popleft()
+            self._leased[i] = worker
+            return i
+
+    def _take(self, i: int, worker: str) -> bool:
+        with self._cv:
+            if self._leased.get(i) != worker:
+                return False  # задача уже переотдана/выполнена — дубль игнорируем
+            del self._leased[i]
+            self.workers[worker] += 1
+            return True
+
+    def _complete(self):
+        # после on_result: serve() не должен вернуться, пока отчёт не записан
+        with self._cv:
+            self._left -= 1
+            self._cv.notify_all()
+
+    def _release(self, worker: str):
+        """Воркер отвалился — его задачи снова в начало очереди."""
+        with self._cv:
+            lost = [i for i, w in self._leased.items() if w == worker]
+            for i in lost:
+                del self._leased[i]
+                self._queue.appendleft(i)
+            self._cv.notify_all()
+
+    def handle(self, sock: socket.socket, peer: str):
+        msg, _ = recv_msg(sock)
+        if msg.get("op") != "hello":
+            raise ProtocolError("ожидался hello")
+        worker = f"{msg.get('worker') or 'worker'}@{peer}"
+        if self.token and not hmac.compare_digest(str(msg.get("token") or "").encode("utf-8"),
+                                                  self.token.encode("utf-8")):
+            send_msg(sock, {"op": "reject", "error": "неверный токен"})
+            return
+        if msg.get("cfg") != self.cfg_hash:
+            send_msg(sock, {"op": "reject", "error": "конфиг воркера отличается от конфига координатора"})
+            return
+        send_msg(sock, {"op": "welcome"})
+        try:
+            while True:
+                msg, _ = recv_msg(sock)
+                op = msg.get("op")
+                if op == "next":
+                    i = self._lease(worker)
+                    if i is not None:
+                        size, mtime_ns, digest = file_stamp(self.files[i])
+                        send_msg(sock, {"op": "task", "id": i, "path": os.path.abspath(self.files[i]),
+                                        "size": size, "mtime_ns": mtime_ns, "sha1": digest})
+                    elif self.finished:
+                        send_msg(sock, {"op": "done"})
+                        return
+                    else:
+                        # очередь пуста, но чужие задачи ещё в работе — могут вернуться
+                        send_msg(sock, {"op": "wait", "delay": 0.5})
+                elif op == "fetch":
+                    send_file(sock, {"op": "data", "id": msg["id"]}, self.files[int(msg["id"])])
+                elif op in ("result", "error"):
+                    i = int(msg["id"])
+                    if not self._take(i, worker):
+                        continue
+                    try:
+                        if op == "error":
+                            self.on_result(i, self.files[i], None, RuntimeError(f"{msg.get('error')} [{worker}]"))
+                        else:
+                            issues = [Issue(**d) for d in msg.get("issues") or []]
+                            meta = dict(msg.get("debug_meta") or {}, worker=worker)
+                            self.on_result(i, self.files[i], (issues, msg.get("by_category") or {}, meta), None)
+                    finally:
+                        self._complete()
+                else:
+                    raise ProtocolError(f"неизвестная операция: {op!r}")
+        finally:
+            self._release(worker)
+
+    def serve(self, host: str, port: int, on_listen: Optional[Callable[[Tuple[str, int]], None]] = None):
+        """Принимает воркеров, пока все файлы не будут проверены."""
+        coord = self
+
+        class _Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                try:
+                    coord.handle(self.request, "%s:%s" % self.client_address[:2])
+                except (ConnectionError, ProtocolError, OSError) as e:
+                    print(f"[WORK] воркер {self.client_address[0]} отключён: {e}")
+
+        class _Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        with _Server((host, port), _Handler) as srv:
+            if on_listen:
+                on_listen(srv.server_address[:2])
+            t = threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.2}, daemon=True)
+            t.start()
+            with self._cv:
+                while self._left:
+                    self._cv.wait()
+            srv.shutdown()
+
+
+# ------------------------------- воркер --------------------------------- #
+
+def _same_file(path: str, task: Dict[str, Any]) -> bool:
+    """Локальная копия — тот же документ: тот же путь и размер ещё не значат то же содержимое."""
+    try:
+        if os.path.getsize(path) != task.get("size"):
+            return False
+        return file_digest(path) == task.get("sha1")
+    except OSError:
+        return False
+
+
+def _analyze_task(sock: socket.socket, task: Dict[str, Any], cfg: Dict, fetch: bool, pools) -> Dict[str, Any]:
+    from .engine import analyze_file
+
+    path = task["path"]
+    tmp = None
+    if fetch or not _same_file(path, task):
+        send_msg(sock, {"op": "fetch", "id": task["id"]})
+        # расширение важно: по нему лоадер выбирает формат
+        fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(path)[1], prefix="gost-work-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                msg, data = recv_msg(sock, sink=fh)
+            if msg.get("op") != "data" or data is None:
+                raise ProtocolError("ожидались данные документа")
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        path = tmp
+    try:
+        issues, by_cat, debug_meta = analyze_file(path, cfg, pools=pools)
+    finally:
+        if tmp:
+            os.unlink(tmp)
+    return {"op": "result", "id": task["id"], "issues": [i.to_dict() for i in issues],
+            "by_category": by_cat, "debug_meta": debug_meta}
+
+
+def _worker_conn(host: str, port: int, cfg: Dict, cfg_hash: str, name: str, fetch: bool, pools,
+                 on_task: Optional[Callable[[str, Optional[str]], None]], token: Optional[str]) -> int:
+    done = 0
+    with socket.create_connection((host, port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_msg(sock, {"op": "hello", "worker": name, "cfg": cfg_hash, "token": token or ""})
+        msg, _ = recv_msg(sock)
+        if msg.get("op") != "welcome":
+            raise ProtocolError(msg.get("error") or "координатор отказал")
+        while True:
+            send_msg(sock, {"op": "next"})
+            msg, _ = recv_msg(sock)
+            op = msg.get("op")
+            if op == "done":
+                return done
+            if op == "wait":
+                time.sleep(float(msg.get("delay", 0.5)))
+                continue
+            if op != "task":
+                raise ProtocolError(f"неожиданный ответ: {op!r}")
+            try:
+                reply = _analyze_task(sock, msg, cfg, fetch, pools)
+                err = None
+            except (ConnectionError, ProtocolError):
+                raise
+            except Exception as e:
+                reply = {"op": "error", "id": msg["id"], "error": str(e)}
+                err = str(e)
+            send_msg(sock, reply)
+            done += 1
+            if on_task:
+                on_task(msg["path"], err)
+
+
+def run_worker(addr: str, cfg: Dict, jobs: int = 1, fetch: bool = False, name: Optional[str] = None,
+               on_task: Optional[Callable[[str, Optional[str]], None]] = None,
+               token: Optional[str] = None) -> int:
+    """
+    Подключается к координатору jobs соединениями (по задаче на каждое) и
+    проверяет файлы до опустошения очереди; -> сколько файлов обработано.
+    fetch — всегда забирать документ по сети (нет общей файловой системы).
+    token — общий секрет координатора (None — из GOST_PRECHECK_WORK_TOKEN).
+    """
+    from .config import config_fingerprint
+    from .scheduler import SharedPools, resolve_jobs
+
+    host, port = parse_addr(addr)
+    cfg_hash = config_fingerprint(cfg)
+    token = token if token is not None else os.environ.get(TOKEN_ENV)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    jobs = resolve_jobs(jobs)
+    counts: List[int] = []
+    errors: List[BaseException] = []
+
+    def conn(k: int):
+        try:
+            counts.append(_worker_conn(host, port, cfg, cfg_hash, f"{name}/{k}", fetch, pools, on_task,
+                                       token))
+        except BaseException as e:
+            errors.append(e)
+
+    with SharedPools(cfg) as pools:
+        threads = [threading.Thread(target=conn, args=(k,), daemon=True) for k in range(jobs)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    if errors and not counts:
+        raise errors[0]
+    return sum(counts)
+
+
+def is_loopback(host: str) -> bool:
+    import ipaddress
+
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
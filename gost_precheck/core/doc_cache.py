@@ -0,0 +1,202 @@
+# gost_precheck/core/doc_cache.py
+"""
+Кэш разобранных документов (выход load_paragraphs) для повторных проверок.
+
+GUI после смены папки профиля и сервис с другим "config" проверяют тот же
+файл заново — без кэша docx каждый раз распаковывается и разбирается.
+Ключ: (путь, размер, mtime_ns, inode, настройки лоадера) — правила проверки
+(abbr/brands/gost34, орфография) разбор не меняют и кэш не сбрасывают;
+меняют только settings.loader (include_tabs, стили, поля, истории, ...)
+и settings.post_normalize.
+
+Память — LRU по суммарному размеру текста абзацев (settings.doc_cache.max_mb).
+Необязательный второй уровень — pickle в каталоге кэша конфигов
+(settings.doc_cache.disk), переживает перезапуск GUI/сервиса.
+
+Результат общий для всех обращений: абзацы не мутировать; stats отдаются
+поверхностной копией. Частично прочитанные (отмена) документы не кэшируются.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import metrics
+from .loader import load_paragraphs
+
+Loaded = Tuple[List[str], Dict[str, Any]]
+
+DOC_CACHE_DEFAULTS = {
+    "enabled": True,
+    "max_mb": 64,        # текст в памяти (str абзацев)
+    "disk": False,       # второй уровень — pickle в каталоге кэша
+    "disk_max_mb": 256,
+}
+
+# версия формата файлов на диске: менять при изменении структуры stats лоадера
+_DISK_VERSION = 1
+_MB = 1024 * 1024
+
+
+def _settings(cfg: Dict) -> Dict[str, Any]:
+    return {**DOC_CACHE_DEFAULTS, **(cfg.get("settings", {}).get("doc_cache") or {})}
+
+
+def loader_key(cfg: Dict) -> str:
+    """Отпечаток настроек, от которых зависит выход лоадера."""
+    s = cfg.get("settings", {})
+    return json.dumps([s.get("loader") or {}, s.get("post_normalize") or {}],
+                      sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _text_size(paras: List[str]) -> int:
+    return sum(sys.getsizeof(p) for p in paras)
+
+
+class DocumentCache:
+    def __init__(self, max_bytes: int = DOC_CACHE_DEFAULTS["max_mb"] * _MB):
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[Tuple, Tuple[int, Loaded]]" = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def key(path: str, cfg: Dict) -> Tuple:
+        ap = os.path.abspath(path)
+        st = os.stat(ap)
+        return (ap, st.st_size, st.st_mtime_ns, st.st_ino, loader_key(cfg))
+
+    def load(self, path: str, cfg: Dict, token=None) -> Loaded:
+        """Как loader.load_paragraphs, но повторный разбор того же файла — из кэша."""
+        conf = _settings(cfg)
+        if not conf["enabled"]:
+            return load_paragraphs(path, cfg, token=token)
+        self.max_bytes = int(float(conf["max_mb"]) * _MB)
+        key = self.key(path, cfg)
+
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+        if hit is not None:
+            metrics.inc("gost_cache_requests_total", cache="doc", result="hit")
+            return hit[1][0], dict(hit[1][1])
+
+        disk = _disk_path(key) if conf["disk"] else None
+        loaded = _disk_read(disk) if disk is not None else None
+        if loaded is not None:
+            metrics.inc("gost_cache_requests_total", cache="doc", result="disk")
+        else:
+            metrics.inc("gost_cache_requests_total", cache="doc", result="miss")
+            loaded = load_paragraphs(path, cfg, token=token)
+            if loaded[1].get("truncated"):
+                return loaded
+            if disk is not None:
+                _disk_write(disk, loaded, int(float(conf["disk_max_mb"]) * _MB))
+        self._put(key, loaded)
+        return loaded[0], dict(loaded[1])
+
+    def _put(self, key: Tuple, loaded: Loaded):
+        size = _text_size(loaded[0])
+        if size > self.max_bytes:
+            return  # один документ больше всего кэша — не вытесняем ради него остальные
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0]
+            self._mem[key] = (size, loaded)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (s, _) = self._mem.popitem(last=False)
+                self._bytes -= s
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._mem), "bytes": self._bytes}
+
+
+# ------------------------------ диск ------------------------------------ #
+
+def _disk_dir():
+    from .config import _snapshot_dir
+
+    d = _snapshot_dir()
+    return d / "docs" if d is not None else None
+
+
+def _disk_path(key: Tuple):
+    d = _disk_dir()
+    if d is None:
+        return None
+    raw = repr((_DISK_VERSION, sys.version_info[:2], key))
+    return d / f"doc-{hashlib.sha1(raw.encode('utf-8')).hexdigest()}.pickle"
+
+
+def _disk_read(path) -> Optional[Loaded]:
+    try:
+        with open(path, "rb") as fh:
+            loaded = pickle.load(fh)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+        return None
+    try:
+        os.utime(path)  # mtime — время последнего обращения (для вытеснения)
+    except OSError:
+        pass
+    return loaded
+
+
+def _disk_write(path, loaded: Loaded, max_bytes: int):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(loaded, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        _disk_prune(path.parent, max_bytes)
+    except OSError:
+        pass  # кэш — только ускорение
+
+
+def _disk_prune(d, max_bytes: int):
+    """Давно не читанные файлы — прочь, пока каталог не уложится в max_bytes."""
+    files = []
+    for e in os.scandir(d):
+        if e.name.startswith("doc-") and e.name.endswith(".pickle"):
+            try:
+                st = e.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime_ns, st.st_size, e.path))
+    total = sum(f[1] for f in files)
+    for _, size, p in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(p)
+        except OSError:
+            continue
+        total -= size
+
+
+_DEFAULT = DocumentCache()
+
+
+def load(path: str, cfg: Dict, token=None) -> Loaded:
+    """Общий на процесс кэш (GUI, сервис, демон, пакетная проверка)."""
+    return _DEFAULT.load(path, cfg, token=token)
+
+
+def clear():
+    _DEFAULT.clear()
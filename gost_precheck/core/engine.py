@@ -1,34 +1,62 @@
 # gost_precheck/core/engine.py
-from typing import List, Dict, Tuple, Any
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import os
+import time
+from array import array
+from typing import List, Dict, Tuple, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 from .issue import Issue
-from .loader import load_paragraphs
+from .loader import load_paragraphs, iter_txt_paragraphs, txt_streamable
+from .cancel import CancelToken
+from . import doc_cache, metrics, resources, spill
+from .normalize import EditMap
+from .utils import context_slice
 
 # Явные импорты правил — PyInstaller-дружественно
 from .checks import whitespace, punctuation, abbr, brands, gost34, captions, ws_word_digit
-try:
-    from .checks import spell as spell_mod
-except Exception:
-    spell_mod = None
 
-# Бустер «множественных очепяток» (эвристика Damerau-Levenshtein)
-try:
-    from .checks import spell_multi as spell_multi_mod
-except Exception:
-    spell_multi_mod = None
+# Орфография и бустер «множественных очепяток» (Damerau-Levenshtein) подгружаются
+# лениво — только если включены в settings (импорт в функции PyInstaller тоже видит)
+_UNLOADED = object()
+_spell_mod: Any = _UNLOADED
+_spell_multi_mod: Any = _UNLOADED
+
+
+def _spell():
+    global _spell_mod
+    if _spell_mod is _UNLOADED:
+        try:
+            from .checks import spell as mod
+        except Exception:
+            mod = None
+        _spell_mod = mod
+    return _spell_mod
+
+
+def _spell_multi():
+    global _spell_multi_mod
+    if _spell_multi_mod is _UNLOADED:
+        try:
+            from .checks import spell_multi as mod
+        except Exception:
+            mod = None
+        _spell_multi_mod = mod
+    return _spell_multi_mod
 
 # Порядок важен лишь для стабильной сортировки вывода
 REGEX_MODULES = [whitespace, punctuation, abbr, brands, gost34, ws_word_digit, captions]
 
 
-def _regex_task(i: int, p: str, cfg: Dict):
+def _regex_task(i: int, p: str, cfg: Dict, first: bool = True):
+    """first=False — не первое окно длинного абзаца: подписи ищутся только в начале абзаца."""
     out: List[Issue] = []
     nums: List[Any] = []
     errs: List[str] = []
 
     # 1) обычные быстрые правила
     for mod in REGEX_MODULES:
+        if not first and mod is captions:
+            continue
         try:
             out.extend(mod.check(p, i, cfg))
         except Exception as e:
@@ -36,15 +64,16 @@ def _regex_task(i: int, p: str, cfg: Dict):
 
     # 2) сбор номеров подписей для глобальной проверки последовательности
     try:
-        nums = captions.collect_numbers(p, i)
+        if first:
+            nums = captions.collect_numbers(p, i)
     except Exception as e:
         errs.append(f"captions.collect_numbers: {e}")
 
     # 3) бустер орфографии (работает в потоках, если включён в settings.spell_booster.enabled)
     try:
         sb = cfg.get("settings", {}).get("spell_booster", {}) or {}
-        if spell_multi_mod and sb.get("enabled", False):
-            out.extend(spell_multi_mod.check(p, i, cfg))
+        if sb.get("enabled", False) and _spell_multi():
+            out.extend(_spell_multi().check(p, i, cfg))
     except Exception as e:
         errs.append(f"spell_multi.check: {e}")
 
@@ -55,60 +84,523 @@ def _spell_task(i: int, p: str, cfg: Dict):
     errs: List[str] = []
     out: List[Issue] = []
     try:
-        if spell_mod and cfg.get("settings", {}).get("spell", {}).get("enabled", False):
-            out = spell_mod.check(p, i, cfg)
+        if cfg.get("settings", {}).get("spell", {}).get("enabled", False) and _spell():
+            out = _spell().check(p, i, cfg)
     except Exception as e:
         errs.append(f"spell.check: {e}")
     return i, out, errs
 
 
-def analyze_file(path: str, cfg: Dict) -> Tuple[List[Issue], Dict[str, int], Dict[str, Any]]:
-    loaded = load_paragraphs(path, cfg)
-    if isinstance(loaded, tuple) and len(loaded) == 2:
-        paragraphs, loader_stats = loaded
+def _to_original(iss: List[Issue], p: str, edits) -> None:
+    """
+    Абзац изменён нормализацией лоадера: смещения замечаний — в тексте после
+    замен. meta["orig_offset"/"orig_length"/"orig_context"] — то же место в
+    тексте автора (для подсветки в исходном документе).
+    """
+    em = EditMap(edits)
+    orig = em.original(p)
+    for it in iss:
+        a, n = em.span(it.offset, it.length)
+        it.meta["orig_offset"] = a
+        it.meta["orig_length"] = n
+        it.meta["orig_context"] = context_slice(orig, a)
+
+
+def _from_window(iss: List[Issue], win) -> List[Issue]:
+    """
+    Замечания окна -> смещения в абзаце. Из перекрытия соседних окон каждое
+    замечание оставляет только «владелец» его начала ([own_lo, own_hi)) —
+    дубли не появляются, а срабатывания на обрезанных краях окна
+    (^/$, слово без продолжения) приходятся на чужую половину и отбрасываются.
+    """
+    lo, own_lo, own_hi, orig_lo, _ = win
+    out = []
+    for it in iss:
+        off = it.offset + lo
+        if own_lo <= off < own_hi:
+            it.offset = off
+            if "orig_offset" in it.meta:
+                it.meta["orig_offset"] += orig_lo
+            out.append(it)
+    return out
+
+
+def _regex_chunk(items: List[Tuple[int, str, Any, Any]], cfg: Dict, token=None):
+    """
+    Порция абзацев для этапа 1; между абзацами проверяется токен отмены.
+    Элемент: (индекс, текст, правки нормализации или None, окно или None).
+    """
+    out: List[Issue] = []
+    nums: List[Any] = []
+    errs: List[str] = []
+    done = 0
+    for i, p, edits, win in items:
+        if token is not None and token.cancelled:
+            break
+        _, iss, n, e = _regex_task(i, p, cfg, first=win is None or win[0] == 0)
+        if edits is not None and iss:
+            _to_original(iss, p, edits)
+        if win is not None:
+            iss = _from_window(iss, win)
+        out.extend(iss)
+        nums.extend(n)
+        errs.extend(e)
+        done += win is None or win[4]  # абзац окнами — засчитывается последним окном
+    return out, nums, errs, done
+
+
+def _spell_chunk(items: List[Tuple[int, str, Any, Any]], cfg: Dict, token=None):
+    out: List[Issue] = []
+    errs: List[str] = []
+    done = 0
+    for i, p, edits, win in items:
+        if token is not None and token.cancelled:
+            break
+        _, iss, e = _spell_task(i, p, cfg)
+        if edits is not None and iss:
+            _to_original(iss, p, edits)
+        if win is not None:
+            iss = _from_window(iss, win)
+        out.extend(iss)
+        errs.extend(e)
+        done += win is None or win[4]
+    return out, [], errs, done
+
+
+# Поля captions.collect_numbers, нужные captions.numbering_issues
+_NUMBER_KEYS = ("idx", "kind", "num", "raw")
+
+# Средний абзац потокового .txt (байт) — только для оценки числа порций в plan_execution
+_STREAM_PARA_BYTES = 256
+
+# Ячейка таблицы — обычно крошечный абзац: _CELLS_PER_UNIT ячеек «весят» в порции
+# как один абзац, и таблица уходит в работу целиком, а не сотнями мелких порций.
+_CELLS_PER_UNIT = 8
+
+
+def _boundary(p: str, pos: int, floor: int) -> int:
+    """Ближайший к pos слева пробельный символ правее floor (граница слов); нет — pos."""
+    for k in range(pos - 1, floor, -1):
+        if p[k].isspace():
+            return k
+    return pos
+
+
+def _windows(p: str, size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Окна длинного абзаца по границам слов: -> [(lo, hi, own_lo, own_hi)].
+    Соседние окна перекрываются примерно на overlap символов; граница
+    «владения» — середина перекрытия, так что у каждой позиции абзаца
+    ровно одно окно-владелец и запас контекста overlap/2 с обеих сторон.
+    """
+    overlap = max(0, min(overlap, size // 4))
+    n = len(p)
+    out = []
+    lo = own_lo = 0
+    while n - lo > size:
+        hi = _boundary(p, lo + size, lo + size // 2)
+        nxt = _boundary(p, hi - overlap, hi - 2 * overlap)
+        if nxt < hi - overlap:
+            nxt += 1  # окно начинается со слова, не с пробела
+        mid = (nxt + hi) // 2
+        out.append((lo, hi, own_lo, mid))
+        lo, own_lo = nxt, mid
+    out.append((lo, n, own_lo, n))
+    return out
+
+
+def _window_items(i: int, p: str, edits, size: int, overlap: int) -> List[Tuple[int, str, Any, Any]]:
+    """Элементы порций для абзаца: один (i, p, edits, None) или по окну на элемент."""
+    if size <= 0 or len(p) <= size:
+        return [(i, p, edits, None)]
+    em = EditMap(edits) if edits else None
+    ws = _windows(p, size, overlap)
+    out = []
+    for k, (lo, hi, own_lo, own_hi) in enumerate(ws):
+        # правки нормализации, задевающие окно, — в его координатах; пересекающую край
+        # обрезаем по окну, а исходный фрагмент оставляем целым: тогда orig_lo — начало
+        # этой правки в тексте автора, и смещения после неё сходятся с картой всего абзаца
+        local = [(max(a, lo) - lo, min(b, hi) - lo, o) for a, b, o in edits if a < hi and b > lo] if edits else None
+        orig_lo = em.to_original(lo) if em is not None else lo
+        out.append((i, p[lo:hi], local, (lo, own_lo, own_hi, orig_lo, k == len(ws) - 1)))
+    return out
+
+
+def _chunked(paragraphs: List[str], size: int,
+             tbl: Optional[List[int]] = None, row: Optional[List[int]] = None,
+             edits: Optional[Dict[int, Any]] = None,
+             window: int = 0, overlap: int = 0) -> List[List[Tuple[int, str, Any, Any]]]:
+    """
+    Порции (индекс, абзац, правки нормализации или None, окно или None).
+    Абзац длиннее window символов режется на окна (_windows), каждое — отдельная
+    порция: один огромный абзац больше не занимает единственный воркер.
+    """
+    size = max(1, size)
+    edits = edits or {}
+    if tbl is not None and len(tbl) != len(paragraphs):
+        tbl = None
+    chunks: List[List[Tuple[int, str, Any, Any]]] = []
+    cur: List[Tuple[int, str, Any, Any]] = []
+    weight = 0.0
+    for i, p in enumerate(paragraphs):
+        if window and len(p) > window:
+            if cur:
+                chunks.append(cur)
+                cur, weight = [], 0.0
+            chunks.extend([item] for item in _window_items(i, p, edits.get(i), window, overlap))
+            continue
+        w = 1.0 / _CELLS_PER_UNIT if tbl and tbl[i] else 1.0
+        # порция полна — режем, но не посреди строки таблицы
+        if cur and weight + w > size and (not tbl or not tbl[i] or tbl[i] != tbl[i - 1] or row[i] != row[i - 1]):
+            chunks.append(cur)
+            cur, weight = [], 0.0
+        cur.append((i, p, edits.get(i), None))
+        weight += w
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def _run_stage(ex, pool: str, fn, chunks, cfg: Dict, token, on_result, remote_token=None,
+               max_inflight: Optional[int] = None) -> bool:
+    """
+    Отправляет порции в пул и отдаёт результаты on_result по мере готовности.
+    max_inflight — не больше стольких порций в пуле одновременно (chunks может быть
+    генератором: потоковый .txt читается по мере освобождения мест).
+    При отмене снимает незапущенные задачи и возвращает False (результат неполный).
+    """
+    task_token = remote_token if remote_token is not None else token
+    source = iter(chunks)
+    pending: set = set()
+
+    def _fill():
+        while max_inflight is None or len(pending) < max_inflight:
+            items = next(source, None)
+            if items is None:
+                return
+            pending.add(ex.submit(fn, items, cfg, task_token))
+            metrics.gauge_add("gost_pool_inflight_tasks", 1, pool=pool)
+
+    complete = True
+    try:
+        _fill()
+        while pending:
+            # с токеном — опрашиваем, чтобы отмена/дедлайн срабатывали даже при «зависшей» задаче
+            done, pending = wait(pending, timeout=0.1 if token is not None else None,
+                                 return_when=FIRST_COMPLETED)
+            for f in done:
+                metrics.gauge_add("gost_pool_inflight_tasks", -1, pool=pool)
+                on_result(f.result())
+            if token is not None and token.cancelled:
+                complete = False
+                break
+            _fill()
+    finally:
+        for f in pending:
+            f.cancel()
+        metrics.gauge_add("gost_pool_inflight_tasks", -len(pending), pool=pool)
+    return complete
+
+
+def _run_inline(fn, chunks, cfg: Dict, token, on_result) -> bool:
+    """Порции в текущем потоке — без пула (мелкие документы)."""
+    for items in chunks:
+        if token is not None and token.cancelled:
+            return False
+        on_result(fn(items, cfg, token))
+    return True
+
+
+# Выбор исполнителя (settings.executor). Стоимость этапа 1 — символы × вес правил.
+# Правила — чистый Python/re и держат GIL: потоки их не ускоряют, поэтому auto
+# выбирает между «на месте» (без расходов на пул) и процессами (реальный
+# параллелизм, но старт пула и пересылка замечаний). "threads" — только явно.
+# Пороги подобраны по замеру: ~8 млн единиц ≈ 1 с работы этапа 1 в одном потоке.
+EXECUTOR_DEFAULTS = {
+    "mode": "auto",                    # auto | inline | threads | processes
+    "process_min_cost": 8_000_000,     # этап 1 в процессах, если стоимость не меньше
+    "spell_inline_max_chars": 50_000,  # орфография на месте (словарь грузится один раз, не в каждом процессе)
+    "booster_weight": 8,               # вес spell_booster в «правилах»
+    "window_chars": 20_000,            # абзац длиннее — проверяется перекрывающимися окнами (0 — не резать)
+    "window_overlap": 400,             # перекрытие соседних окон, символов
+}
+
+
+def plan_execution(paragraphs: Optional[List[str]], cfg: Dict, n_chunks: int,
+                   chars: Optional[int] = None, batch: int = 1) -> Dict[str, Any]:
+    """
+    Оценка работы по документу → исполнитель для каждого этапа и число воркеров.
+    Явные regex_workers / spell.parallel_workers по-прежнему задают размер пула.
+    Потоковый .txt: paragraphs=None, chars и n_chunks — оценки по размеру файла.
+    batch — сколько документов проверяется одновременно (run_batch, общие пулы).
+    """
+    s = cfg.get("settings", {})
+    ex_cfg = {**EXECUTOR_DEFAULTS, **(s.get("executor") or {})}
+    if paragraphs is not None:
+        chars = sum(len(p) for p in paragraphs)
+    rules = (len(REGEX_MODULES)
+             + len((cfg.get("__rules") or {}).get("brands", ()) or (cfg.get("brands") or {}).get("rules", ()))
+             + len((cfg.get("__rules") or {}).get("gost34", ()) or (cfg.get("gost34") or {}).get("rules", ())))
+    if (s.get("spell_booster") or {}).get("enabled", False):
+        rules += int(ex_cfg["booster_weight"])
+    cost = chars * rules
+    cpus = resources.cpu_limit()
+
+    mode = ex_cfg["mode"]
+    if mode != "auto":
+        regex_mode = spell_mode = mode
     else:
-        paragraphs, loader_stats = loaded, {}
+        # пакет: мелкие документы «на месте» в потоках run_batch держали бы GIL по
+        # очереди, а общий пул процессов уже запущен — пороги стоимости не нужны
+        shared = cpus > 1 and batch > 1
+        # один CPU или одна порция — параллелить нечего
+        multi = cpus > 1 and n_chunks > 1
+        regex_mode = "processes" if (shared or (multi and cost >= ex_cfg["process_min_cost"])) else "inline"
+        spell_mode = "processes" if (shared or (multi and chars >= ex_cfg["spell_inline_max_chars"])) else "inline"
+
+    res: Dict[str, Any] = {"cpus": cpus, "batch": batch}
+
+    def _workers(stage: str, mode: str, configured: int) -> int:
+        if mode == "inline":
+            return 0
+        # не больше, чем порций: 64 процесса на 3 порции — только расходы на старт;
+        # явное значение не урезаем по порциям, но процессы — всегда по памяти
+        limit = None if configured else n_chunks
+        if mode == "threads":
+            return resources.thread_workers(configured, limit)
+        n, info = resources.process_workers(cfg, configured, stage, limit)
+        res.update(info)
+        return n
+
+    return {
+        "regex": regex_mode,
+        "spell": spell_mode,
+        "workers": {
+            "regex": _workers("regex", regex_mode, int(s.get("regex_workers", 0))),
+            "spell": _workers("spell", spell_mode, int((s.get("spell", {}) or {}).get("parallel_workers", 0))),
+        },
+        "cost": {"paragraphs": len(paragraphs) if paragraphs is not None else None,
+                 "chars": chars, "rules": rules, "units": cost},
+        "resources": res,
+    }
+
+
+def _exec_stage(mode: str, workers: int, pools, fn, chunks, cfg: Dict, token, on_result,
+                max_inflight: Optional[int] = None):
+    """Этап на выбранном исполнителе; pools (scheduler.SharedPools) — общие пулы пакета."""
+    if mode == "inline":
+        _run_inline(fn, chunks, cfg, token, on_result)
+        return
+    remote = token.remote() if (token is not None and mode == "processes") else None
+    if pools is not None:
+        ex = pools.threads() if mode == "threads" else pools.processes()
+        _run_stage(ex, mode, fn, chunks, cfg, token, on_result, remote_token=remote, max_inflight=max_inflight)
+        return
+    ex = ThreadPoolExecutor(max_workers=workers) if mode == "threads" else ProcessPoolExecutor(max_workers=workers)
+    metrics.gauge_add("gost_pool_workers", workers, pool=mode)
+    ok = False
+    try:
+        ok = _run_stage(ex, mode, fn, chunks, cfg, token, on_result, remote_token=remote,
+                        max_inflight=max_inflight)
+    finally:
+        ex.shutdown(wait=ok, cancel_futures=True)
+        metrics.gauge_add("gost_pool_workers", -workers, pool=mode)
+
+
+def _record_metrics(n_paragraphs: int, by_rule: Dict[str, int], timing: Dict[str, float]):
+    metrics.inc("gost_documents_total")
+    metrics.inc("gost_paragraphs_total", n_paragraphs)
+    metrics.inc_many("gost_issues_total", "rule_id", by_rule)
+    for stage in ("load", "regex", "spell", "total"):
+        metrics.observe("gost_stage_seconds", timing[f"{stage}_ms"] / 1000.0, stage=stage)
+
+
+def analyze_file(path: str, cfg: Dict,
+                 on_issues: Optional[Callable[[List[Issue]], None]] = None,
+                 token: Optional[CancelToken] = None,
+                 pools=None,
+                 batch: int = 1,
+                 ) -> Tuple[List[Issue], Dict[str, int], Dict[str, Any]]:
+    """
+    on_issues — необязательный колбэк: вызывается с очередной порцией замечаний
+    по мере их готовности (в потоке вызывающего), до финальной сортировки.
+    Нужен для потоковой выдачи (service: NDJSON).
 
-    issues: List[Issue] = []
+    token — CancelToken (дедлайн/ручная отмена). При срабатывании возвращается
+    частичный результат, debug_meta["truncated"] = True.
+
+    pools — scheduler.SharedPools: общие пулы на пакет файлов (не создаются и
+    не останавливаются на каждый файл). batch — сколько файлов пакета
+    проверяется одновременно: при batch > 1 этапы идут в пул процессов
+    независимо от размера документа (см. plan_execution).
+
+    settings.bounded_memory.enabled — вместо списка возвращается
+    spill.SpilledIssues (замечания на диске, итерация в порядке отчёта);
+    любой .txt читается потоком, кэш документов не используется.
+    """
+    def _emit(batch: List[Issue]):
+        if on_issues and batch:
+            on_issues(batch)
+
+    t0 = time.perf_counter()
+    if pools is None:
+        batch = 1  # без общего пула процесс на каждый мелкий документ — только расходы на старт
+    bounded = spill.enabled(cfg)
+    # большой .txt — потоком: абзацы читаются из mmap порциями прямо в этапы,
+    # список абзацев не строится (stats заполняются по ходу первого прохода)
+    stream = txt_streamable(path, cfg)
+    offsets = array("q")  # байтовое смещение каждого абзаца потокового .txt
+    if stream:
+        paragraphs: Optional[List[str]] = None
+        loader_stats: Dict[str, Any] = {"streamed": True}
+    else:
+        # повторная проверка того же файла (другой профиль) — без повторного разбора;
+        # в режиме ограниченной памяти документ после проверки не удерживаем
+        loaded = (load_paragraphs if bounded else doc_cache.load)(path, cfg, token=token)
+        if isinstance(loaded, tuple) and len(loaded) == 2:
+            paragraphs, loader_stats = loaded
+        else:
+            paragraphs, loader_stats = loaded, {}
+
+    if bounded:
+        sp = spill.settings(cfg)
+        issues: Any = spill.SpilledIssues(sp["run_issues"], sp["dir"])
+        _add = issues.add
+    else:
+        issues = []
+        _add = issues.extend
     all_numbers: List[Any] = []
     internal_errors: List[str] = []
+    checked = {"regex": 0, "spell": 0}
+    truncated = bool(loader_stats.get("truncated"))
+
+    def _collect(stage: str):
+        def on_result(res):
+            iss, nums, errs, done = res
+            if stream:
+                for it in iss:
+                    it.meta["byte_offset"] = offsets[it.para_index]
+            _add(iss)
+            _emit(iss)
+            if bounded:
+                # для нумерации нужны только номер и место — заголовок подписи не держим
+                nums = [{k: n[k] for k in _NUMBER_KEYS} for n in nums]
+            all_numbers.extend(nums)
+            internal_errors.extend(errs)
+            checked[stage] += done
+        return on_result
+
+    chunk_size = int(cfg.get("settings", {}).get("chunk_size", 64)) or 64
+    ex_cfg = {**EXECUTOR_DEFAULTS, **(cfg.get("settings", {}).get("executor") or {})}
+    window, overlap = int(ex_cfg["window_chars"]), int(ex_cfg["window_overlap"])
 
-    # Этап 1: потоковые (regex + spell_booster)
-    threads = int(cfg.get("settings", {}).get("regex_workers", 0)) or None
-    if paragraphs:
-        with ThreadPoolExecutor(max_workers=threads) as ex:
-            futs = [ex.submit(_regex_task, i, paragraphs[i], cfg) for i in range(len(paragraphs))]
-            for f in as_completed(futs):
-                idx, iss, nums, errs = f.result()
-                issues.extend(iss)
-                all_numbers.extend(nums)
-                internal_errors.extend(errs)
+    def _txt_chunks(stats: Dict[str, Any], record: bool):
+        batch: List[Tuple[int, str, Any, Any]] = []
+        for i, (text, off, edits) in enumerate(iter_txt_paragraphs(path, cfg, stats, token)):
+            if record:
+                offsets.append(off)
+            if window and len(text) > window:
+                if batch:
+                    yield batch
+                    batch = []
+                for item in _window_items(i, text, edits, window, overlap):
+                    yield [item]
+                continue
+            batch.append((i, text, edits, None))
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    if stream:
+        size = os.path.getsize(path)
+        chunks = None
+        plan = plan_execution(None, cfg, max(1, size // (chunk_size * _STREAM_PARA_BYTES)), chars=size,
+                              batch=batch)
+    else:
+        chunks = _chunked(paragraphs, chunk_size, loader_stats.get("tbl"), loader_stats.get("row"),
+                          loader_stats.get("norm_edits"), window, overlap) if paragraphs else []
+        plan = plan_execution(paragraphs, cfg, len(chunks), batch=batch)
+
+    t_load = time.perf_counter()
+
+    def _stage(name: str, fn, stats: Dict[str, Any]):
+        if stream:
+            # в пуле не больше двух порций на воркер — память не зависит от размера файла
+            source = _txt_chunks(stats, name == "regex")
+            try:
+                _exec_stage(plan[name], plan["workers"][name], pools, fn, source, cfg, token, _collect(name),
+                            max_inflight=2 * max(1, plan["workers"][name]))
+            finally:
+                source.close()  # при отмене — сразу отпустить mmap
+        elif chunks:
+            _exec_stage(plan[name], plan["workers"][name], pools, fn, chunks, cfg, token, _collect(name))
+
+    # Этап 1: regex-правила + spell_booster
+    if not (token is not None and token.cancelled):
+        _stage("regex", _regex_chunk, loader_stats)
+    n_paragraphs = loader_stats.get("kept", 0) if stream else len(paragraphs)
+    truncated = truncated or bool(loader_stats.get("truncated")) or checked["regex"] < n_paragraphs
 
     # Этап 2: нумерация подписей (глобальная последовательность/дубли)
     try:
         scope = cfg.get("settings", {}).get("numbering_scope", "global")
-        issues.extend(captions.numbering_issues(all_numbers, scope=scope))
+        # нумерация подписей — только по основному тексту, не по колонтитулам/сноскам
+        stories = loader_stats.get("stories")
+        if stories:
+            main_end = stories[0]["end"]
+            all_numbers = [n for n in all_numbers if n["idx"] < main_end]
+        num_issues = captions.numbering_issues(all_numbers, scope=scope)
+        _add(num_issues)
+        _emit(num_issues)
     except Exception as e:
         internal_errors.append(f"captions.numbering_issues: {e}")
 
-    # Этап 3: классическая орфография (в отдельных процессах)
+    t_regex = time.perf_counter()
+
+    # Этап 3: классическая орфография (мелкие документы — на месте, крупные — в процессах)
     spell_cfg = cfg.get("settings", {}).get("spell", {}) or {}
-    if spell_mod and spell_cfg.get("enabled", False) and paragraphs:
-        workers = int(spell_cfg.get("parallel_workers", 0)) or None
-        with ProcessPoolExecutor(max_workers=workers) as ex:
-            futs = [ex.submit(_spell_task, i, paragraphs[i], cfg) for i in range(len(paragraphs))]
-            for f in as_completed(futs):
-                idx, iss, errs = f.result()
-                issues.extend(iss)
-                internal_errors.extend(errs)
+    spell_on = bool(spell_cfg.get("enabled", False) and _spell())
+    if spell_on and not (token is not None and token.cancelled):
+        _stage("spell", _spell_chunk, {})  # потоковый .txt — второй проход по файлу
+    if spell_on:
+        truncated = truncated or checked["spell"] < n_paragraphs
+
+    t_spell = time.perf_counter()
 
     # Агрегация
-    by_category: Dict[str, int] = {}
-    for it in issues:
-        by_category[it.category] = by_category.get(it.category, 0) + 1
+    if bounded:
+        issues.finish()  # отсортированы прогонами — при чтении
+        by_category = dict(issues.by_category)
+        by_rule = dict(issues.rule_counts)
+    else:
+        by_category, by_rule = {}, {}
+        for it in issues:
+            by_category[it.category] = by_category.get(it.category, 0) + 1
+            by_rule[it.rule_id] = by_rule.get(it.rule_id, 0) + 1
+        issues.sort(key=spill.sort_key)
 
-    severity_rank = {"ошибка": 0, "предупреждение": 1}
-    issues.sort(key=lambda x: (severity_rank.get(x.severity, 9), x.para_index, x.offset, x.rule_id))
+    timing = {
+        "load_ms": round((t_load - t0) * 1000, 1),
+        "regex_ms": round((t_regex - t_load) * 1000, 1),
+        "spell_ms": round((t_spell - t_regex) * 1000, 1),
+        "total_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    _record_metrics(n_paragraphs, by_rule, timing)
 
-    debug_meta = {"loader_stats": loader_stats, "internal_errors": internal_errors}
+    if not spell_on:
+        plan["spell"] = None
+    debug_meta = {"loader_stats": loader_stats, "internal_errors": internal_errors, "timing": timing,
+                  "plan": plan}
+    if bounded:
+        debug_meta["spill"] = {"issues": len(issues), "runs": issues.n_runs}
+    if truncated:
+        debug_meta["truncated"] = True
+        debug_meta["cancel_reason"] = (token.reason if token is not None else None) or "deadline"
+        debug_meta["checked"] = {
+            "paragraphs": n_paragraphs,
+            "regex": checked["regex"],
+            "spell": checked["spell"] if spell_on else None,
+        }
     return issues, by_category, debug_meta
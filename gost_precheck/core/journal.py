@@ -0,0 +1,129 @@
+# gost_precheck/core/journal.py
+"""
+Журнал пакетной проверки (JSONL) — для продолжения прерванного `check`.
+
+Одна строка на успешно проверенный файл:
+  {"path", "size", "mtime_ns", "digest", "cfg", "gate", "by_category", "t"}
+Строка дописывается сразу после записи отчётов и сбрасывается на диск (fsync),
+поэтому после OOM/перезагрузки/Ctrl-C теряется не больше текущих файлов.
+Оборванная последняя строка при чтении пропускается, а при продолжении
+отрезается — иначе следующая запись приклеилась бы к ней и тоже пропала.
+Размер/mtime/SHA-1 снимаются перед анализом (begin), а не при записи.
+
+Файл считается готовым, если в журнале есть запись с тем же хэшем конфига и
+тем же содержимым: сначала сверяем size+mtime, при расхождении — SHA-1.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .utils import file_digest, file_stamp
+
+
+class Journal:
+    def __init__(self, path: str, cfg_hash: str, resume: bool = False):
+        self.path = path
+        self.cfg_hash = cfg_hash
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = self._read() if resume else {}
+        self._stamps: Dict[str, Tuple[int, int, str]] = {}
+        # без resume начинаем журнал заново; с resume — дописываем
+        if resume:
+            self._cut_torn_tail()
+        self._fh = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _cut_torn_tail(self):
+        """Отрезать оборванную последнюю строку (без завершающего перевода строки)."""
+        try:
+            fh = open(self.path, "r+b")
+        except FileNotFoundError:
+            return
+        with fh:
+            end = fh.seek(0, os.SEEK_END)
+            pos = end
+            while pos > 0:
+                step = min(1 << 16, pos)
+                fh.seek(pos - step)
+                block = fh.read(step)
+                nl = block.rfind(b"\n")
+                if nl >= 0:
+                    pos = pos - step + nl + 1
+                    break
+                pos -= step
+            if pos != end:
+                fh.truncate(pos)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            fh = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return entries
+        with fh:
+            for line in fh:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue  # строка, оборванная при падении
+                if isinstance(e, dict) and "path" in e:
+                    entries[e["path"]] = e  # последняя запись побеждает
+        return entries
+
+    def done(self, path: str) -> Optional[Dict[str, Any]]:
+        """Запись журнала, если файл уже проверен с этим конфигом и не менялся."""
+        e = self.entries.get(os.path.abspath(path))
+        if e is None or e.get("cfg") != self.cfg_hash:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if (st.st_size, st.st_mtime_ns) == (e.get("size"), e.get("mtime_ns")):
+            return e
+        return e if file_digest(path) == e.get("digest") else None
+
+    def begin(self, path: str):
+        """Перед анализом: запомнить, какое содержимое проверяется."""
+        path = os.path.abspath(path)
+        try:
+            stamp = file_stamp(path)
+        except OSError:
+            return
+        with self._lock:
+            self._stamps[path] = stamp
+
+    def record(self, path: str, gate: Dict[str, Any], by_category: Dict[str, int]):
+        path = os.path.abspath(path)
+        with self._lock:
+            stamp = self._stamps.pop(path, None)
+        size, mtime_ns, digest = stamp if stamp is not None else file_stamp(path)
+        e = {
+            "path": path,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "digest": digest,
+            "cfg": self.cfg_hash,
+            "gate": gate,
+            "by_category": by_category,
+            "t": time.time(),
+        }
+        line = json.dumps(e, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.entries[path] = e
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
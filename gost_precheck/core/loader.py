@@ -1,24 +1,12 @@
 # gost_precheck/core/loader.py
-import os, zipfile, re
+import io, os, time, zipfile, re
 from typing import List, Tuple, Dict, Any, Optional
 from xml.etree.ElementTree import iterparse
 
-_EM_DASH = "—"
-_EN_DASH = "–"
-_HYPHEN  = "-"
-
-def _post_normalize(text: str, cfg: Dict) -> str:
-    post = cfg.get("settings", {}).get("post_normalize", {}) or \
-           cfg.get("settings", {}).get("loader", {}).get("post_normalize", {}) or {}
-    if post.get("dashes", False):
-        text = re.sub(r"(?<=\S)\s-\s(?=\S)", f" {_EM_DASH} ", text)
-        text = re.sub(r"(?<=\S)\s–\s(?=\S)", f" {_EM_DASH} ", text)
-    if post.get("quotes", False):
-        text = re.sub(r'(^|[\s(\[])\"', r'\1«', text)
-        text = re.sub(r'\"([\s)\].,;:!?]|$)', r'»\1', text)
-        text = re.sub(r'(^|[\s(\[])\'', r'\1„', text)
-        text = re.sub(r'\'([\s)\].,;:!?]|$)', r'“\1', text)
-    return text
+from .normalize import normalize as _normalize
+
+# stats["norm_edits"] — {индекс абзаца: правки нормализации} только для изменённых
+# абзацев (см. normalize.EditMap): по ним смещения замечаний переводятся в исходный текст.
 
 def _cfg_include_styles(cfg: Dict) -> bool:
     return bool(cfg.get("settings", {}).get("loader", {}).get("include_styles", True))
@@ -27,6 +15,41 @@ def _cfg_include_tabs(cfg: Dict) -> bool:
     # Важно: если False, табы учитываются только в статистике.
     return bool(cfg.get("settings", {}).get("loader", {}).get("include_tabs", True))
 
+# Поля, результат которых не проверяем (сгенерирован Word): оглавление, номера страниц
+_SKIP_FIELDS_DEFAULT = ("TOC", "PAGEREF", "PAGE", "NUMPAGES")
+
+def _cfg_skip_fields(cfg: Dict) -> frozenset:
+    v = cfg.get("settings", {}).get("loader", {}).get("skip_fields", _SKIP_FIELDS_DEFAULT)
+    return frozenset(str(x).upper() for x in (v or ()))
+
+def _cfg_style_filter(cfg: Dict):
+    """
+    settings.loader.styles {"include": [...], "exclude": [...]} — маски fnmatch по
+    идентификатору стиля (pStyle), без учёта регистра; абзац без стиля — "Normal".
+    -> skip(style) -> bool или None, если фильтра нет.
+    """
+    import fnmatch
+
+    conf = cfg.get("settings", {}).get("loader", {}).get("styles") or {}
+    inc = [str(x).lower() for x in conf.get("include") or ()]
+    exc = [str(x).lower() for x in conf.get("exclude") or ()]
+    if not inc and not exc:
+        return None
+    cache: Dict[Optional[str], bool] = {}
+
+    def skip(style: Optional[str]) -> bool:
+        hit = cache.get(style)
+        if hit is None:
+            name = (style or "Normal").lower()
+            hit = cache[style] = bool(
+                (inc and not any(fnmatch.fnmatchcase(name, m) for m in inc))
+                or any(fnmatch.fnmatchcase(name, m) for m in exc))
+        return hit
+    return skip
+
+def _field_keyword(instr: str) -> str:
+    return instr.strip().split(" ", 1)[0].upper() if instr.strip() else ""
+
 _NS_ENDS = {
     "p": "}p",
     "r": "}r",
@@ -37,105 +60,654 @@ _NS_ENDS = {
     "del": "}del",
     "tab": "}tab",
     "br": "}br",
+    "tbl": "}tbl",
+    "tr": "}tr",
+    "tc": "}tc",
+    "fldChar": "}fldChar",
+    "fldSimple": "}fldSimple",
 }
 
-def load_paragraphs(path: str, cfg: Dict) -> Tuple[List[str], Dict[str, Any]]:
+# как часто (в абзацах) лоадер проверяет токен отмены
+_CANCEL_CHECK_EVERY = 256
+
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# Потоковое чтение .txt (очень большие выгрузки): абзацы по одному из mmap,
+# без строки на весь файл и без списков абзацев.
+TXT_STREAM_DEFAULTS = {
+    "stream_min_bytes": 64 * 1024 * 1024,   # с какого размера .txt идёт потоком
+    "stream_max_para_bytes": 1024 * 1024,   # «абзац» длиннее режется по переводам строк
+}
+_TXT_SEP = re.compile(rb"\r?\n\s*\r?\n")
+
+def _cfg_txt_stream(cfg: Dict) -> Dict[str, int]:
+    return {**TXT_STREAM_DEFAULTS, **(cfg.get("settings", {}).get("loader", {}).get("txt_stream") or {})}
+
+def txt_streamable(path: str, cfg: Dict) -> bool:
+    """
+    Проверять ли файл потоком (engine): .txt не меньше stream_min_bytes,
+    в режиме ограниченной памяти (settings.bounded_memory) — любой .txt.
+    """
+    if os.path.splitext(path.lower())[1] != ".txt":
+        return False
+    if (cfg.get("settings", {}).get("bounded_memory") or {}).get("enabled"):
+        return True
+    try:
+        return os.path.getsize(path) >= int(_cfg_txt_stream(cfg)["stream_min_bytes"])
+    except OSError:
+        return False
+
+def _split_long(mm, a: int, b: int, limit: int):
+    """Диапазон [a, b) длиннее limit — куски по последнему \\n до границы (или по границе символа UTF-8)."""
+    while b - a > limit:
+        cut = mm.rfind(b"\n", a, a + limit)
+        if cut <= a:
+            cut = a + limit
+            while cut > a and (mm[cut] & 0xC0) == 0x80:  # не режем посреди символа
+                cut -= 1
+        else:
+            cut += 1
+        yield a, cut
+        a = cut
+    yield a, b
+
+def iter_txt_paragraphs(path: str, cfg: Dict, stats: Optional[Dict[str, Any]] = None, token=None):
+    """
+    Абзацы .txt по одному: -> (текст, смещение начала абзаца в байтах,
+    правки нормализации или None).
+    Файл отображается в память (mmap), разделители абзацев ищутся по байтам,
+    каждый абзац декодируется отдельно — в памяти только текущий абзац.
+    stats (если передан) дополняется счётчиками по мере чтения; при отмене
+    token — stats["truncated"] = True.
+    """
+    import mmap
+
+    limit = max(1024, int(_cfg_txt_stream(cfg)["stream_max_para_bytes"]))
+    st = stats if stats is not None else {}
+    for k in ("p_total", "kept", "blank", "wt", "instr", "deleted", "tabs", "tabs_injected", "br", "parts"):
+        st.setdefault(k, 0)
+    st.setdefault("styles", [])
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        st["xml_bytes"] = size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            seps = _TXT_SEP.finditer(mm)
+            m = None
+            try:
+                while start <= size:
+                    m = next(seps, None)
+                    end = m.start() if m is not None else size
+                    for a, b in _split_long(mm, start, end, limit):
+                        raw = mm[a:b]
+                        text = raw.decode("utf-8", errors="ignore").strip()
+                        if not text:
+                            continue
+                        st["p_total"] += 1
+                        st["kept"] += 1
+                        if token is not None and st["kept"] % _CANCEL_CHECK_EVERY == 0 and token.cancelled:
+                            st["truncated"] = True
+                            return
+                        text, edits = _normalize(text, cfg)
+                        yield text, a + (len(raw) - len(raw.lstrip())), edits
+                    if m is None:
+                        break
+                    start = m.end()
+            finally:
+                seps = m = None  # держат буфер mmap — иначе его не закрыть при досрочном выходе
+
+def _cfg_backend(cfg: Dict) -> str:
+    # expat — по умолчанию; etree (iterparse) оставлен для сверки и на всякий случай
+    return str(cfg.get("settings", {}).get("loader", {}).get("backend", "expat"))
+
+def load_paragraphs(path: str, cfg: Dict, token=None) -> Tuple[List[str], Dict[str, Any]]:
     ext = os.path.splitext(path.lower())[1]
     if ext == ".txt":
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
             text = f.read()
         para_list = [p.strip() for p in re.split(r"\r?\n\s*\r?\n", text) if p.strip()]
-        para_list = [_post_normalize(p, cfg) for p in para_list]
+        norm_edits = {}
+        for i, p in enumerate(para_list):
+            para_list[i], edits = _normalize(p, cfg)
+            if edits:
+                norm_edits[i] = edits
         stats = {
             "p_total": len(para_list), "kept": len(para_list), "blank": 0,
             "wt": 0, "instr": 0, "deleted": 0, "tabs": 0, "tabs_injected": 0, "br": 0, "parts": 0,
-            "styles": []
+            "styles": [], "norm_edits": norm_edits,
         }
         return para_list, stats
 
     if ext != ".docx":
         raise RuntimeError("Поддерживаются только .txt и .docx")
 
-    return _iter_docx_paragraphs(path, cfg)
+    return _load_docx(path, cfg, token=token)
+
+
+# Части-«истории» помимо основного текста (тип связи в word/_rels/document.xml.rels
+# оканчивается на вид). Порядок видов — порядок абзацев в выдаче лоадера.
+_STORY_KINDS = ("header", "footer", "footnotes", "endnotes", "comments")
+_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_COUNTERS = ("p_total", "kept", "blank", "wt", "instr", "deleted", "tabs", "tabs_injected", "br",
+             "skipped_style", "skipped_fields")
+# Поля stats, параллельные списку абзацев (docx): "story" — индекс в stats["stories"],
+# "tbl" — сквозной номер таблицы с 1 (0 — вне таблицы), "row"/"col" — ячейка с 1,
+# "styles" — стиль абзаца.
+
+def _cfg_stories(cfg: Dict) -> List[str]:
+    v = cfg.get("settings", {}).get("loader", {}).get("stories", True)
+    if v is True:
+        return list(_STORY_KINDS)
+    return [k for k in (v or []) if k in _STORY_KINDS]
+
+def _natural_key(name: str):
+    return [(0, int(t), "") if t.isdigit() else (1, 0, t) for t in re.split(r"(\d+)", name)]
+
+def _story_parts(z: zipfile.ZipFile, kinds: List[str]) -> List[Tuple[str, str]]:
+    """-> [(вид, имя части в архиве)] в стабильном порядке: по виду, затем header1 < header2 < header10."""
+    from xml.etree.ElementTree import fromstring
+
+    try:
+        rels = fromstring(z.read("word/_rels/document.xml.rels"))
+    except KeyError:
+        return []
+    names = set(z.namelist())
+    out = []
+    for rel in rels.iter(_REL_NS + "Relationship"):
+        kind = rel.get("Type", "").rsplit("/", 1)[-1]
+        if kind not in kinds or rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        name = target.lstrip("/") if target.startswith("/") else "word/" + target
+        name = os.path.normpath(name).replace(os.sep, "/")
+        if name in names:
+            out.append((kind, name))
+    out = list(dict.fromkeys(out))
+    out.sort(key=lambda kn: (_STORY_KINDS.index(kn[0]), _natural_key(kn[1])))
+    return out
+
+def _load_part(path: str, name: str, cfg: Dict, token=None) -> Tuple[List[str], Dict[str, Any]]:
+    # у каждого потока свой ZipFile — без общей позиции чтения
+    with zipfile.ZipFile(path) as z:
+        with z.open(name) as f:
+            if _cfg_backend(cfg) == "etree":
+                return _iter_docx_paragraphs(f, cfg, token=token)
+            return _expat_docx_paragraphs(f, cfg, token=token)
+
+def _load_docx(path: str, cfg: Dict, token=None) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    word/document.xml + колонтитулы/сноски/примечания. Части-истории разбираются
+    в пуле потоков параллельно с основным текстом; абзацы идут подряд: сначала
+    документ, затем истории (stats["stories"] — диапазоны индексов), так что
+    para_index однозначен и не зависит от порядка завершения потоков.
+    """
+    t0 = time.perf_counter()
+    with zipfile.ZipFile(path) as z:
+        stories = _story_parts(z, _cfg_stories(cfg))
+        size = sum(z.getinfo(n).file_size for n in ["word/document.xml"] + [n for _, n in stories])
+
+    futs = []
+    ex = None
+    if stories:
+        from concurrent.futures import ThreadPoolExecutor
+        from . import resources
+        ex = ThreadPoolExecutor(max_workers=resources.thread_workers(limit=len(stories)),
+                                thread_name_prefix="docx-part")
+    try:
+        futs = [ex.submit(_load_part, path, name, cfg, token) for _, name in stories]
+        paras, stats = _load_part(path, "word/document.xml", cfg, token)
+        stats["stories"] = [{"story": "document", "kind": "document", "part": "word/document.xml",
+                             "start": 0, "end": len(paras)}]
+        stats["story"] = [0] * len(paras)
+        for (kind, name), fut in zip(stories, futs):
+            p, st = fut.result()
+            stats["stories"].append({"story": os.path.splitext(os.path.basename(name))[0], "kind": kind,
+                                     "part": name, "start": len(paras), "end": len(paras) + len(p)})
+            # номера таблиц — сквозные по всем частям
+            shift = max(stats["tbl"], default=0)
+            stats["tbl"].extend(t + shift if t else 0 for t in st["tbl"])
+            stats["norm_edits"].update((i + len(paras), e) for i, e in st["norm_edits"].items())
+            stats["story"].extend([len(stats["stories"]) - 1] * len(p))
+            paras.extend(p)
+            for k in ("row", "col", "styles"):
+                stats[k].extend(st[k])
+            for k in _COUNTERS:
+                stats[k] += st[k]
+            if st.get("truncated"):
+                stats["truncated"] = True
+    finally:
+        if ex is not None:
+            ex.shutdown(wait=True, cancel_futures=True)
+
+    sec = time.perf_counter() - t0
+    stats["parts"] = [n for _, n in stories]
+    stats["backend"] = "etree" if _cfg_backend(cfg) == "etree" else "expat"
+    stats["xml_bytes"] = size
+    stats["mb_s"] = round(size / 1e6 / sec, 1) if sec > 0 else 0.0
+    return paras, stats
+
+
+def story_of(stats: Dict[str, Any], para_index: int) -> Optional[Dict[str, Any]]:
+    """Диапазон stats["stories"], куда попадает абзац (None — данных об историях нет)."""
+    import bisect
+
+    stories = stats.get("stories") or []
+    k = bisect.bisect_right([s["start"] for s in stories], para_index) - 1
+    if k >= 0 and para_index < stories[k]["end"]:
+        return stories[k]
+    return None
+
+
+class _Stop(Exception):
+    """Отмена из обработчика expat (исключение пробрасывается через Parse)."""
+
+
+class _DocxHandler:
+    """
+    Обработчики expat для word/document.xml: дерево не строится, текст
+    копится только внутри w:t. Таблицы диспетчеризации — по полному имени тега
+    ("uri}local"), остальные теги (rPr, lang, закладки, рисунки) — один
+    промах по словарю.
+    """
+
+    def __init__(self, cfg: Dict, token):
+        self.cfg = cfg
+        self.token = token
+        self.keep_styles_meta = _cfg_include_styles(cfg)
+        self.inject_tabs = _cfg_include_tabs(cfg)
+        self.p_total = self.kept = self.blank = self.wt = self.instr = 0
+        self.deleted = self.tabs = self.br = self.tabs_injected = 0
+        self.paras: List[str] = []
+        self.norm_edits: Dict[int, list] = {}
+        self.styles_by_idx: List[Optional[str]] = []
+        self.parts: List[str] = []
+        self.style: Optional[str] = None
+        self.in_t = False
+        self.wt_open = 0
+        self.del_depth = 0    # w:del может быть вложен (правки поверх правок)
+        self.instr_depth = 0
+        self.ppr_depth = 0    # w:tab внутри w:pPr — позиция табуляции, не символ
+        # таблицы: стек [номер, строка, столбец] (вложенные таблицы — глубже по стеку)
+        self.tables = 0
+        self.tstack: List[List[int]] = []
+        self.tbl_by_idx: List[int] = []
+        self.row_by_idx: List[int] = []
+        self.col_by_idx: List[int] = []
+        # пропуски: абзацы по стилю и результаты полей (TOC, PAGEREF, ...)
+        self.style_skip = _cfg_style_filter(cfg)
+        self.skip_fields = _cfg_skip_fields(cfg)
+        self.skip_p = False
+        self.fields: List[List[Any]] = []  # [части инструкции, результат пропускается]
+        self.simple: List[bool] = []       # w:fldSimple: пропускается ли
+        self.skip_depth = 0                # открытых пропускаемых результатов
+        self.skipped_style = self.skipped_fields = 0
+        w = _W + "}"
+        self.start = {
+            w + "t": self._t_start,
+            w + "pStyle": self._pstyle,
+            w + "del": self._del_start,
+            w + "instrText": self._instr_start,
+            w + "pPr": self._ppr_start,
+            w + "tab": self._tab,
+            w + "br": self._br,
+            w + "tbl": self._tbl_start,
+            w + "tr": self._tr_start,
+            w + "tc": self._tc_start,
+            w + "p": self._p_start,
+            w + "fldChar": self._fldchar,
+            w + "fldSimple": self._fldsimple_start,
+        }
+        self.end = {
+            w + "p": self._p_end,
+            w + "t": self._t_end,
+            w + "del": self._del_end,
+            w + "instrText": self._instr_end,
+            w + "pPr": self._ppr_end,
+            w + "tbl": self._tbl_end,
+            w + "fldSimple": self._fldsimple_end,
+        }
+        self._val = w + "val"
+        self._fld_type = w + "fldCharType"
+        self._fld_instr = w + "instr"
+
+    # --- expat --- #
+    def on_start(self, name, attrs):
+        h = self.start.get(name)
+        if h is not None:
+            h(attrs)
+
+    def on_end(self, name):
+        h = self.end.get(name)
+        if h is not None:
+            h()
+
+    def on_text(self, data):
+        if self.in_t:
+            self.parts.append(data)
+        elif self.instr_depth and self.fields:
+            self.fields[-1][0].append(data)
+
+    # --- теги --- #
+    def _p_start(self, attrs):
+        self.skip_p = self.style_skip is not None and self.style_skip(None)
+
+    def _fldchar(self, attrs):
+        kind = attrs.get(self._fld_type)
+        if kind == "begin":
+            self.fields.append([[], False])
+        elif kind == "separate" and self.fields:
+            f = self.fields[-1]
+            if not f[1] and _field_keyword("".join(f[0])) in self.skip_fields:
+                f[1] = True
+                self.skip_depth += 1
+                self.skipped_fields += 1
+        elif kind == "end" and self.fields:
+            if self.fields.pop()[1]:
+                self.skip_depth -= 1
+
+    def _fldsimple_start(self, attrs):
+        skip = _field_keyword(attrs.get(self._fld_instr, "")) in self.skip_fields
+        self.simple.append(skip)
+        if skip:
+            self.skip_depth += 1
+            self.skipped_fields += 1
+
+    def _fldsimple_end(self):
+        if self.simple and self.simple.pop():
+            self.skip_depth -= 1
+
+    def _t_start(self, attrs):
+        if not (self.del_depth or self.instr_depth or self.skip_depth or self.skip_p):
+            self.in_t = True
+            self.wt_open = len(self.parts)
+
+    def _t_end(self):
+        if self.in_t:
+            self.in_t = False
+            if len(self.parts) > self.wt_open:
+                self.wt += 1
 
-def _iter_docx_paragraphs(path: str, cfg: Dict) -> Tuple[List[str], Dict[str, Any]]:
+    def _pstyle(self, attrs):
+        val = attrs.get(self._val)
+        if val:
+            self.style = val
+
+    def _del_start(self, attrs):
+        self.del_depth += 1
+
+    def _del_end(self):
+        self.del_depth -= 1
+        self.deleted += 1
+
+    def _instr_start(self, attrs):
+        self.instr_depth += 1
+
+    def _instr_end(self):
+        self.instr_depth -= 1
+        self.instr += 1
+
+    def _ppr_start(self, attrs):
+        self.ppr_depth += 1
+
+    def _ppr_end(self):
+        self.ppr_depth -= 1
+        if self.style_skip is not None:
+            self.skip_p = self.style_skip(self.style)
+
+    def _tbl_start(self, attrs):
+        self.tables += 1
+        self.tstack.append([self.tables, 0, 0])
+
+    def _tbl_end(self):
+        if self.tstack:
+            self.tstack.pop()
+
+    def _tr_start(self, attrs):
+        if self.tstack:
+            self.tstack[-1][1] += 1
+            self.tstack[-1][2] = 0
+
+    def _tc_start(self, attrs):
+        if self.tstack:
+            self.tstack[-1][2] += 1
+
+    def _tab(self, attrs):
+        if self.ppr_depth or self.skip_depth or self.skip_p:
+            return
+        self.tabs += 1
+        if self.inject_tabs:
+            self.parts.append("\t")
+            self.tabs_injected += 1
+
+    def _br(self, attrs):
+        # перенос строки в пределах абзаца — не добавляем явный '\n' (оставим как есть)
+        self.br += 1
+
+    def _p_end(self):
+        self.p_total += 1
+        para = "".join(self.parts).strip()
+        if self.skip_p:
+            self.skipped_style += 1
+        elif not para:
+            self.blank += 1
+        else:
+            self.kept += 1
+            para, edits = _normalize(para, self.cfg)
+            if edits:
+                self.norm_edits[len(self.paras)] = edits
+            self.paras.append(para)
+            self.styles_by_idx.append(self.style if self.keep_styles_meta else None)
+            tbl, row, col = self.tstack[-1] if self.tstack else (0, 0, 0)
+            self.tbl_by_idx.append(tbl)
+            self.row_by_idx.append(row)
+            self.col_by_idx.append(col)
+        self.parts.clear()
+        self.style = None
+        if self.token is not None and self.p_total % _CANCEL_CHECK_EVERY == 0 and self.token.cancelled:
+            raise _Stop()
+
+
+def _expat_docx_paragraphs(f, cfg: Dict, token=None) -> Tuple[List[str], Dict[str, Any]]:
+    from xml.parsers import expat
+
+    h = _DocxHandler(cfg, token)
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.buffer_size = 1 << 16
+    parser.StartElementHandler = h.on_start
+    parser.EndElementHandler = h.on_end
+    parser.CharacterDataHandler = h.on_text
+    truncated = False
+    try:
+        parser.ParseFile(f)
+    except _Stop:
+        truncated = True
+
+    stats = {
+        "p_total": h.p_total, "kept": h.kept, "blank": h.blank,
+        "wt": h.wt, "instr": h.instr, "deleted": h.deleted, "tabs": h.tabs,
+        "tabs_injected": h.tabs_injected, "br": h.br,
+        "parts": 0,
+        "styles": h.styles_by_idx,
+        "tbl": h.tbl_by_idx, "row": h.row_by_idx, "col": h.col_by_idx,
+        "skipped_style": h.skipped_style, "skipped_fields": h.skipped_fields,
+        "norm_edits": h.norm_edits,
+    }
+    if truncated:
+        stats["truncated"] = True
+    return h.paras, stats
+
+def _iter_docx_paragraphs(f, cfg: Dict, token=None) -> Tuple[List[str], Dict[str, Any]]:
     keep_styles_meta = _cfg_include_styles(cfg)
     inject_tabs      = _cfg_include_tabs(cfg)
 
     p_total = kept = blank = wt = instr = deleted = tabs = br = tabs_injected = 0
     styles_by_idx: List[Optional[str]] = []
+    tbl_by_idx: List[int] = []
+    row_by_idx: List[int] = []
+    col_by_idx: List[int] = []
+    tables = 0
+    tstack: List[List[int]] = []
+    style_skip = _cfg_style_filter(cfg)
+    skip_fields = _cfg_skip_fields(cfg)
+    fields: List[List[Any]] = []  # [части инструкции, результат пропускается]
+    simple: List[bool] = []
+    skip_depth = skipped_style = skipped_fields = 0
+    ppr_depth = 0     # w:tab внутри w:pPr — позиция табуляции, не символ
+    skip_p = False    # абзац пропускается по стилю (известен с концом w:pPr), как в expat
+    W_ = "{" + _W + "}"
 
     paras: List[str] = []
+    norm_edits: Dict[int, list] = {}
     cur_text_parts: List[str] = []
     cur_style: Optional[str] = None
+    truncated = False
 
-    with zipfile.ZipFile(path) as z:
-        with z.open("word/document.xml") as f:
-            for event, elem in iterparse(f, events=("end",)):
-                tag = elem.tag
-
-                if tag.endswith(_NS_ENDS["p"]):
-                    p_total += 1
-                    para = "".join(cur_text_parts).strip()
-                    if not para:
-                        blank += 1
-                    else:
-                        kept += 1
-                        para = _post_normalize(para, cfg)
-                        paras.append(para)
-                        styles_by_idx.append(cur_style if keep_styles_meta else None)
-                    cur_text_parts.clear()
-                    cur_style = None
-                    elem.clear()
-                    continue
-
-                if tag.endswith(_NS_ENDS["pStyle"]):
-                    val = elem.attrib.get("{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val")
-                    if val:
-                        cur_style = val
-                    elem.clear()
-                    continue
-
-                if tag.endswith(_NS_ENDS["del"]):
-                    deleted += 1
-                    elem.clear()
-                    continue
-
-                if tag.endswith(_NS_ENDS["instrText"]):
-                    instr += 1
-                    elem.clear()
-                    continue
-
-                if tag.endswith(_NS_ENDS["tab"]):
-                    tabs += 1
-                    if inject_tabs:
-                        cur_text_parts.append("\t")
-                        tabs_injected += 1
-                    elem.clear()
-                    continue
-
-                if tag.endswith(_NS_ENDS["br"]):
-                    br += 1
-                    # перенос строки в пределах абзаца — не добавляем явный '\n' (оставим как есть)
-                    elem.clear()
-                    continue
-
-                if tag.endswith(_NS_ENDS["t"]):
-                    text = elem.text or ""
-                    if text:
-                        wt += 1
-                        cur_text_parts.append(text)
-                    elem.clear()
-                    continue
+    for event, elem in iterparse(f, events=("start", "end")):
+        tag = elem.tag
+
+        if event == "start":
+            # положение в таблице известно только по открывающим тегам
+            if tag.endswith(_NS_ENDS["tbl"]):
+                tables += 1
+                tstack.append([tables, 0, 0])
+            elif tstack and tag.endswith(_NS_ENDS["tr"]):
+                tstack[-1][1] += 1
+                tstack[-1][2] = 0
+            elif tstack and tag.endswith(_NS_ENDS["tc"]):
+                tstack[-1][2] += 1
+            elif tag.endswith(_NS_ENDS["p"]):
+                skip_p = style_skip is not None and style_skip(None)
+            elif tag.endswith(_NS_ENDS["pPr"]):
+                ppr_depth += 1
+            elif tag.endswith(_NS_ENDS["fldSimple"]):
+                skip = _field_keyword(elem.attrib.get(W_ + "instr", "")) in skip_fields
+                simple.append(skip)
+                if skip:
+                    skip_depth += 1
+                    skipped_fields += 1
+            continue
+
+        if tag.endswith(_NS_ENDS["fldSimple"]):
+            if simple and simple.pop():
+                skip_depth -= 1
+            elem.clear()
+            continue
+
+        if tag.endswith(_NS_ENDS["fldChar"]):
+            kind = elem.attrib.get(W_ + "fldCharType")
+            if kind == "begin":
+                fields.append([[], False])
+            elif kind == "separate" and fields:
+                fl = fields[-1]
+                if not fl[1] and _field_keyword("".join(fl[0])) in skip_fields:
+                    fl[1] = True
+                    skip_depth += 1
+                    skipped_fields += 1
+            elif kind == "end" and fields:
+                if fields.pop()[1]:
+                    skip_depth -= 1
+            elem.clear()
+            continue
+
+        if tag.endswith(_NS_ENDS["tbl"]):
+            if tstack:
+                tstack.pop()
+            elem.clear()
+            continue
+
+        if tag.endswith(_NS_ENDS["pPr"]):
+            ppr_depth -= 1
+            if style_skip is not None:
+                skip_p = style_skip(cur_style)
+            elem.clear()
+            continue
+
+        if tag.endswith(_NS_ENDS["p"]):
+            p_total += 1
+            para = "".join(cur_text_parts).strip()
+            if skip_p:
+                skipped_style += 1
+            elif not para:
+                blank += 1
+            else:
+                kept += 1
+                para, edits = _normalize(para, cfg)
+                if edits:
+                    norm_edits[len(paras)] = edits
+                paras.append(para)
+                styles_by_idx.append(cur_style if keep_styles_meta else None)
+                tbl, row, col = tstack[-1] if tstack else (0, 0, 0)
+                tbl_by_idx.append(tbl)
+                row_by_idx.append(row)
+                col_by_idx.append(col)
+            cur_text_parts.clear()
+            cur_style = None
+            elem.clear()
+            if token is not None and p_total % _CANCEL_CHECK_EVERY == 0 and token.cancelled:
+                truncated = True
+                break
+            continue
+
+        if tag.endswith(_NS_ENDS["pStyle"]):
+            val = elem.attrib.get("{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val")
+            if val:
+                cur_style = val
+            elem.clear()
+            continue
+
+        if tag.endswith(_NS_ENDS["del"]):
+            deleted += 1
+            elem.clear()
+            continue
+
+        if tag.endswith(_NS_ENDS["instrText"]):
+            instr += 1
+            if fields and elem.text:
+                fields[-1][0].append(elem.text)
+            elem.clear()
+            continue
 
+        if tag.endswith(_NS_ENDS["tab"]):
+            if ppr_depth or skip_depth or skip_p:
                 elem.clear()
+                continue
+            tabs += 1
+            if inject_tabs:
+                cur_text_parts.append("\t")
+                tabs_injected += 1
+            elem.clear()
+            continue
+
+        if tag.endswith(_NS_ENDS["br"]):
+            br += 1
+            # перенос строки в пределах абзаца — не добавляем явный '\n' (оставим как есть)
+            elem.clear()
+            continue
+
+        if tag.endswith(_NS_ENDS["t"]):
+            text = elem.text or ""
+            if text and not (skip_depth or skip_p):
+                wt += 1
+                cur_text_parts.append(text)
+            elem.clear()
+            continue
+
+        elem.clear()
 
     stats = {
         "p_total": p_total, "kept": kept, "blank": blank,
         "wt": wt, "instr": instr, "deleted": deleted, "tabs": tabs, "tabs_injected": tabs_injected, "br": br,
         "parts": 0,
         "styles": styles_by_idx,
+        "tbl": tbl_by_idx, "row": row_by_idx, "col": col_by_idx,
+        "skipped_style": skipped_style, "skipped_fields": skipped_fields,
+        "norm_edits": norm_edits,
     }
+    if truncated:
+        stats["truncated"] = True
     return paras, stats
 
 def load_paragraphs_from_ooxml(ooxml: str, cfg: Dict) -> Tuple[List[str], Dict[str, Any], List[Dict]]:
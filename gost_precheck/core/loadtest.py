@@ -0,0 +1,213 @@
+# gost_precheck/core/loadtest.py
+"""
+Нагрузочный прогон сервиса (service.py) по журналу запросов JSONL.
+
+Строка журнала — один запрос к /analyze:
+  {"path": "/data/a.docx", "config": "/profiles/full", "stream": false}
+Необязательные поля: "endpoint" (по умолчанию "/analyze"), "method" ("POST"/"GET").
+Строки без "path" (и не GET) пропускаются и учитываются в отчёте как skipped.
+
+Нагрузка: --concurrency соединений (keep-alive), --rate запросов/с суммарно
+(0 — закрытый цикл, «сколько успеет»). Латентность меряется от отправки
+запроса до последнего байта ответа.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+_TIMING_KEYS = ("load_ms", "regex_ms", "spell_ms", "total_ms")
+
+
+def read_request_log(path: str) -> Tuple[List[Dict[str, Any]], int]:
+    reqs: List[Dict[str, Any]] = []
+    skipped = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(obj, dict):
+                skipped += 1
+                continue
+            method = str(obj.get("method", "POST")).upper()
+            if method == "POST" and not obj.get("path"):
+                skipped += 1
+                continue
+            reqs.append(obj)
+    return reqs, skipped
+
+
+def percentile(sorted_vals: List[float], q: float) -> float:
+    """Nearest-rank перцентиль по заранее отсортированному списку."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def _default_service_script() -> str:
+    # service.py лежит рядом с пакетом gost_precheck (корень репозитория)
+    pkg = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(os.path.dirname(pkg), "service.py")
+
+
+def start_service(port: int, script: Optional[str] = None, timeout: float = 30.0) -> subprocess.Popen:
+    script = script or _default_service_script()
+    if not os.path.isfile(script):
+        raise RuntimeError(f"service.py не найден: {script}")
+    proc = subprocess.Popen(
+        [sys.executable, script, "--host", "127.0.0.1", "--port", str(port)],
+        cwd=os.path.dirname(script) or ".",
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"service.py завершился с кодом {proc.returncode}")
+        try:
+            c = http.client.HTTPConnection("127.0.0.1", port, timeout=1.0)
+            try:
+                c.request("GET", "/health")
+                if c.getresponse().status == 200:
+                    return proc
+            finally:
+                c.close()
+        except OSError:
+            pass
+        time.sleep(0.1)  # и при отказе соединения, и при ответе не 200
+    proc.kill()
+    raise RuntimeError("service.py не ответил на /health")
+
+
+class _Client(threading.local):
+    conn: Optional[http.client.HTTPConnection] = None
+
+
+def _send(local: _Client, host: str, port: int, req: Dict[str, Any], timeout: float):
+    """Возвращает (latency_s, status | None, error | None, timing | None)."""
+    method = str(req.get("method", "POST")).upper()
+    endpoint = req.get("endpoint", "/analyze")
+    body = None
+    if method == "POST":
+        payload = {k: req[k] for k in ("path", "config", "stream") if k in req}
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    t0 = time.perf_counter()
+    for attempt in (0, 1):  # одна повторная попытка, если keep-alive соединение закрыто сервером
+        try:
+            if local.conn is None:
+                local.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+            local.conn.request(method, endpoint, body=body,
+                               headers={"Content-Type": "application/json"} if body else {})
+            resp = local.conn.getresponse()
+            data = resp.read()
+            dt = time.perf_counter() - t0
+            return dt, resp.status, None, _server_timing(data, resp.getheader("Content-Type", ""))
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+            local.conn.close()
+            local.conn = None
+            if attempt:
+                return time.perf_counter() - t0, None, type(e).__name__, None
+        except Exception as e:
+            if local.conn is not None:
+                local.conn.close()
+                local.conn = None
+            return time.perf_counter() - t0, None, type(e).__name__, None
+
+
+def _server_timing(data: bytes, ctype: str) -> Optional[Dict[str, float]]:
+    try:
+        if "ndjson" in ctype:
+            last = data.rstrip().rsplit(b"\n", 1)[-1]
+            obj = json.loads(last.decode("utf-8"))
+        else:
+            obj = json.loads(data.decode("utf-8"))
+        timing = (obj.get("debug") or {}).get("timing")
+        return timing if isinstance(timing, dict) else None
+    except Exception:
+        return None
+
+
+def run_load(url: str, requests: List[Dict[str, Any]], concurrency: int = 4, rate: float = 0.0,
+             repeat: int = 1, timeout: float = 300.0) -> Dict[str, Any]:
+    u = urlparse(url if "://" in url else "http://" + url)
+    host, port = u.hostname or "127.0.0.1", u.port or 80
+    plan = [r for _ in range(max(1, repeat)) for r in requests]
+    local = _Client()
+    t_start = time.perf_counter()
+
+    def one(k: int):
+        if rate > 0:
+            delay = t_start + k / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return _send(local, host, port, plan[k], timeout)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+        results = list(ex.map(one, range(len(plan))))
+    wall = time.perf_counter() - t_start
+
+    lat_ok = sorted(dt for dt, status, err, _ in results if status is not None and status < 400)
+    errors: Dict[str, int] = {}
+    for _, status, err, _ in results:
+        if err is not None:
+            errors[err] = errors.get(err, 0) + 1
+        elif status >= 400:
+            errors[f"HTTP {status}"] = errors.get(f"HTTP {status}", 0) + 1
+
+    timing_sum = {k: 0.0 for k in _TIMING_KEYS}
+    timing_n = 0
+    for _, _, _, timing in results:
+        if timing:
+            timing_n += 1
+            for k in _TIMING_KEYS:
+                timing_sum[k] += float(timing.get(k, 0) or 0)
+
+    return {
+        "requests": len(plan),
+        "ok": len(lat_ok),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(plan) / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(lat_ok, 50) * 1000, 1),
+            "p95": round(percentile(lat_ok, 95) * 1000, 1),
+            "p99": round(percentile(lat_ok, 99) * 1000, 1),
+            "max": round((lat_ok[-1] if lat_ok else 0.0) * 1000, 1),
+        },
+        "server_timing_ms": {k: round(v / timing_n, 1) for k, v in timing_sum.items()} if timing_n else {},
+        "concurrency": concurrency,
+        "rate": rate,
+    }
+
+
+def format_report(rep: Dict[str, Any]) -> str:
+    lat = rep["latency_ms"]
+    errs = "; ".join(f"{k}: {v}" for k, v in sorted(rep["errors"].items())) or "нет"
+    lines = [
+        f"[LOAD] запросов: {rep['requests']}; успешно: {rep['ok']}; ошибки: {errs}",
+        f"[LOAD] {rep['wall_s']} с; {rep['throughput_rps']} req/s "
+        f"(concurrency={rep['concurrency']}, rate={rep['rate'] or 'max'})",
+        f"[LOAD] латентность, мс: p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}",
+    ]
+    st = rep.get("server_timing_ms") or {}
+    if st:
+        lines.append("[LOAD] сервер, среднее, мс: " + " ".join(f"{k}={st[k]}" for k in _TIMING_KEYS if k in st))
+    if rep.get("skipped"):
+        lines.append(f"[LOAD] пропущено строк журнала: {rep['skipped']}")
+    return "\n".join(lines)
@@ -0,0 +1,174 @@
+# gost_precheck/core/metrics.py
+"""
+Лёгкие счётчики в стиле Prometheus (без внешних зависимостей).
+
+Всё хранится в одном процессном реестре под одним локом; горячие места
+(engine) агрегируют локально и сбрасывают в реестр пачкой — накладные
+расходы на документ — единицы микросекунд.
+
+Выдача — текстовый формат exposition 0.0.4 (render()), его отдаёт service: GET /metrics.
+Замеры из дочерних процессов (ProcessPool орфографии) сюда не попадают.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Границы гистограмм по умолчанию (секунды)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+_HELP: Dict[str, str] = {
+    "gost_http_requests_total": "HTTP-запросы к сервису по endpoint и коду ответа",
+    "gost_http_request_seconds": "Латентность HTTP-запросов по endpoint",
+    "gost_http_inflight_requests": "Запросы в обработке (глубина очереди)",
+    "gost_documents_total": "Обработанные документы",
+    "gost_paragraphs_total": "Обработанные абзацы",
+    "gost_issues_total": "Замечания по rule_id",
+    "gost_stage_seconds": "Длительность этапов engine (load/regex/spell/total)",
+    "gost_pool_workers": "Размер пула исполнителей",
+    "gost_pool_inflight_tasks": "Задачи, отправленные в пул и ещё не завершённые",
+    "gost_cache_requests_total": "Обращения к кэшам (result=hit|miss)",
+    "gost_dict_load_seconds": "Время загрузки словарей",
+}
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, object]) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "n")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последний — +Inf
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, v: float):
+        self.counts[bisect_left(self.buckets, v)] += 1
+        self.total += v
+        self.n += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[_LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[_LabelKey, float]] = {}
+        self._hists: Dict[str, Dict[_LabelKey, _Histogram]] = {}
+
+    # ---- запись ----
+
+    def inc(self, name: str, value: float = 1, **labels):
+        k = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[k] = series.get(k, 0) + value
+
+    def inc_many(self, name: str, label: str, counts: Dict[str, int]):
+        """Пакетный инкремент: {значение_метки: n} — одна блокировка на пачку."""
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            for lv, n in counts.items():
+                k = ((label, str(lv)),)
+                series[k] = series.get(k, 0) + n
+
+    def gauge_set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = value
+
+    def gauge_add(self, name: str, delta: float, **labels):
+        k = _key(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[k] = series.get(k, 0) + delta
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels):
+        k = _key(labels)
+        with self._lock:
+            series = self._hists.setdefault(name, {})
+            h = series.get(k)
+            if h is None:
+                h = series[k] = _Histogram(buckets)
+            h.observe(value)
+
+    # ---- чтение ----
+
+    def get(self, name: str, **labels) -> float:
+        """Текущее значение счётчика/gauge (для тестов и отчётов)."""
+        k = _key(labels)
+        with self._lock:
+            for store in (self._counters, self._gauges):
+                if name in store and k in store[name]:
+                    return store[name][k]
+        return 0
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def fmt_labels(k: _LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            items = k + extra
+            if not items:
+                return ""
+            body = ",".join(f'{n}="{_escape(v)}"' for n, v in items)
+            return "{" + body + "}"
+
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(store):
+                    lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for k, v in sorted(store[name].items()):
+                        lines.append(f"{name}{fmt_labels(k)} {_num(v)}")
+            for name in sorted(self._hists):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for k, h in sorted(self._hists[name].items()):
+                    acc = 0
+                    for b, c in zip(h.buckets, h.counts):
+                        acc += c
+                        lines.append(f"{name}_bucket{fmt_labels(k, (('le', _num(b)),))} {acc}")
+                    acc += h.counts[-1]
+                    lines.append(f"{name}_bucket{fmt_labels(k, (('le', '+Inf'),))} {acc}")
+                    lines.append(f"{name}_sum{fmt_labels(k)} {_num(h.total)}")
+                    lines.append(f"{name}_count{fmt_labels(k)} {h.n}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(v: float) -> str:
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+# Процессный реестр по умолчанию
+REGISTRY = Registry()
+
+inc = REGISTRY.inc
+inc_many = REGISTRY.inc_many
+gauge_set = REGISTRY.gauge_set
+gauge_add = REGISTRY.gauge_add
+observe = REGISTRY.observe
+render = REGISTRY.render
+
+
+@contextmanager
+def timed(name: str, **labels):
+    """with timed("gost_stage_seconds", stage="load"): ..."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - t0, **labels)
@@ -0,0 +1,138 @@
+# gost_precheck/core/normalize.py
+"""
+Нормализация абзацев (settings.post_normalize: dashes/quotes) за один проход.
+
+Все замены собраны в одно скомпилированное регулярное выражение с
+альтернативами — текст сканируется один раз, абзац без замен возвращается
+как есть. Каждая замена записывается в карту правок (edits):
+  [(начало в новом тексте, конец в новом тексте, исходный фрагмент), ...]
+По ней смещения замечаний переводятся обратно в текст автора (EditMap) —
+для подсветки и исправления на месте.
+
+Общая для лоадера (что заменить) и checks/post_normalize (о чём предупредить).
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+Edit = Tuple[int, int, str]
+
+_EM_DASH = "—"
+
+# Порядок альтернатив = приоритет в одной позиции (открывающая кавычка раньше закрывающей).
+# Группа -> замена; шаблоны не захватывают соседние символы (только lookaround),
+# поэтому один проход даёт то же, что прежние последовательные re.sub. Тире — две
+# половины: «\s-» и пробел после него, чтобы общий пробел в цепочке «а - - б»
+# достался обоим дефисам (прежние проходы заменяли в ней только первый).
+_RULES = {
+    "dashes": [
+        ("dash", r"(?<=\S)\s[-–](?=\s\S)", f" {_EM_DASH}"),
+        ("dash_tail", r"(?<=\S\s[-–])\s(?=\S)", " "),
+    ],
+    "quotes": [
+        ("dq_open", r"(?:^|(?<=[\s(\[]))\"", "«"),
+        ("dq_close", r"\"(?=[\s)\].,;:!?]|$)", "»"),
+        ("sq_open", r"(?:^|(?<=[\s(\[]))'", "„"),
+        ("sq_close", r"'(?=[\s)\].,;:!?]|$)", "“"),
+    ],
+}
+
+KINDS = {name: kind for kind, rules in _RULES.items() for name, _, _ in rules}
+
+
+def settings(cfg: Dict) -> Dict:
+    s = cfg.get("settings", {})
+    return s.get("post_normalize", {}) or s.get("loader", {}).get("post_normalize", {}) or {}
+
+
+@lru_cache(maxsize=8)
+def _compiled(dashes: bool, quotes: bool):
+    rules = (_RULES["dashes"] if dashes else []) + (_RULES["quotes"] if quotes else [])
+    if not rules:
+        return None, {}
+    pat = re.compile("|".join(f"(?P<{name}>{rx})" for name, rx, _ in rules))
+    return pat, {name: repl for name, _, repl in rules}
+
+
+def _pattern(cfg: Dict):
+    post = settings(cfg)
+    return _compiled(bool(post.get("dashes", False)), bool(post.get("quotes", False)))
+
+
+def normalize(text: str, cfg: Dict) -> Tuple[str, Optional[List[Edit]]]:
+    """-> (новый текст, правки или None, если текст не изменился)."""
+    pat, repl = _pattern(cfg)
+    if pat is None:
+        return text, None
+    m = pat.search(text)
+    if m is None:
+        return text, None
+    out: List[str] = []
+    edits: List[Edit] = []
+    pos = n = 0
+    while m is not None:
+        a, b = m.span()
+        out.append(text[pos:a])
+        n += a - pos
+        new = repl[m.lastgroup]
+        out.append(new)
+        if new != text[a:b]:  # «хвост» тире, уже бывший пробелом, — не правка
+            edits.append((n, n + len(new), text[a:b]))
+        n += len(new)
+        pos = b
+        m = pat.search(text, pos)
+    out.append(text[pos:])
+    return "".join(out), edits
+
+
+def find(text: str, cfg: Dict):
+    """Места, которые normalize заменил бы: -> [(начало, конец, вид правила, замена)]."""
+    pat, repl = _pattern(cfg)
+    if pat is None:
+        return []
+    return [(m.start(), m.end(), KINDS[m.lastgroup], repl[m.lastgroup]) for m in pat.finditer(text)]
+
+
+class EditMap:
+    """Перевод смещений нормализованного текста в смещения исходного."""
+
+    __slots__ = ("edits", "_n_starts", "_shift")
+
+    def __init__(self, edits: List[Edit]):
+        self.edits = [tuple(e) for e in edits]
+        self._n_starts = [e[0] for e in self.edits]
+        # сдвиг (исходный − новый) после k-й правки
+        shift, acc = [], 0
+        for a, b, orig in self.edits:
+            acc += len(orig) - (b - a)
+            shift.append(acc)
+        self._shift = shift
+
+    def to_original(self, pos: int, end: bool = False) -> int:
+        """Внутри заменённого фрагмента — его начало (end=True — его конец)."""
+        k = bisect_right(self._n_starts, pos - 1 if end else pos) - 1
+        if k < 0:
+            return pos
+        a, b, orig = self.edits[k]
+        if pos < b or (end and pos == b):
+            base = a + (self._shift[k - 1] if k else 0)
+            return base + len(orig) if end else base
+        return pos + self._shift[k]
+
+    def span(self, offset: int, length: int) -> Tuple[int, int]:
+        start = self.to_original(offset)
+        end = self.to_original(offset + length, end=True) if length else start
+        return start, max(0, end - start)
+
+    def original(self, text: str) -> str:
+        """Исходный текст по нормализованному."""
+        out, pos = [], 0
+        for a, b, orig in self.edits:
+            out.append(text[pos:a])
+            out.append(orig)
+            pos = b
+        out.append(text[pos:])
+        return "".join(out)
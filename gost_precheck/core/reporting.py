@@ -31,8 +31,69 @@ def _group_rule_stats(issues: Iterable[Issue]) -> Dict[str, int]:
         out[i.rule_id] = out.get(i.rule_id, 0) + 1
     return dict(sorted(out.items(), key=lambda kv: (-kv[1], kv[0])))
 
+_STORY_LABELS = {
+    "header": "верхний колонтитул",
+    "footer": "нижний колонтитул",
+    "footnotes": "сноски",
+    "endnotes": "концевые сноски",
+    "comments": "примечания",
+}
+
+# параллельные абзацам данные лоадера: в .rep.json вместо них — поля у замечаний
+_PARA_POSITION_KEYS = ("story", "tbl", "row", "col", "norm_edits")
+
+def _table_cell(loader_stats: Dict, para_index: int):
+    """(таблица, строка, столбец) или None, если абзац не в таблице."""
+    tbl = loader_stats.get("tbl") or []
+    if para_index < len(tbl) and tbl[para_index]:
+        return tbl[para_index], loader_stats["row"][para_index], loader_stats["col"][para_index]
+    return None
+
+def _where_suffix(loader_stats: Dict, para_index: int) -> str:
+    """« [Таблица 4, строка 12, столбец 3]», « [верхний колонтитул header1, абз.0]»."""
+    from .loader import story_of
+
+    out = ""
+    cell = _table_cell(loader_stats, para_index)
+    if cell is not None:
+        out += " [Таблица %d, строка %d, столбец %d]" % cell
+    st = story_of(loader_stats, para_index)
+    if st is not None and st["kind"] != "document":
+        label = _STORY_LABELS.get(st["kind"], st["kind"])
+        out += f" [{label} {st['story']}, абз.{para_index - st['start']}]"
+    return out
+
+def _issue_dict(it: Issue, loader_stats: Dict) -> Dict:
+    from .loader import story_of
+
+    d = it.to_dict()
+    st = story_of(loader_stats, it.para_index)
+    if st is not None:
+        d["story"] = st["story"]
+    cell = _table_cell(loader_stats, it.para_index)
+    if cell is not None:
+        d["table"] = {"id": cell[0], "row": cell[1], "col": cell[2]}
+    return d
+
 # ---------------- main API ---------------- #
 
+def _write_json(f, payload: Dict, issues: Iterable[Issue], loader_stats: Dict) -> None:
+    """
+    json.dump(payload, indent=2), но payload["issues"] пишется потоком из
+    итератора — список словарей замечаний целиком в памяти не строится.
+    """
+    mark = "\x00issues\x00"
+    head, tail = json.dumps(dict(payload, issues=mark), ensure_ascii=False, indent=2).split(
+        json.dumps(mark), 1)
+    f.write(head)
+    sep = "["
+    for it in issues:
+        f.write(sep + "\n    ")
+        f.write(json.dumps(_issue_dict(it, loader_stats), ensure_ascii=False, indent=2).replace("\n", "\n    "))
+        sep = ","
+    f.write("[]" if sep == "[" else "\n  ]")
+    f.write(tail)
+
 def write_reports(src_path: str,
                   issues: List[Issue],
                   by_category: Dict[str,int],
@@ -43,6 +104,8 @@ def write_reports(src_path: str,
     Пишем два отчёта: <file>.rep и <file>.rep.json.
     - .rep — человекочитаемый краткий отчёт с секциями по категориям.
     - .rep.json — полный, машинный + расширенная диагностика (loader_stats, rule_stats, timing, profile).
+    issues — список или spill.SpilledIssues (режим ограниченной памяти): тогда
+    замечания читаются с диска слиянием отсортированных прогонов, по категориям.
     """
     base, _ = os.path.splitext(src_path)
     txt_path = base + ".rep"
@@ -53,17 +116,26 @@ def write_reports(src_path: str,
     passed = bool(gate.get("pass", False))
 
     # ---- .rep (человекочитаемый) ---- #
-    # Сортируем стабильно: sever/para/offset/rule
-    issues_sorted = sorted(
-        issues,
-        key=lambda x: (_severity_rank(x.severity), x.para_index, x.offset, x.rule_id)
-    )
-
-    # Группируем по категории
+    loader_stats = (debug_meta or {}).get("loader_stats", {})
     by_cat_list = sorted(by_category.items(), key=lambda kv: (-kv[1], kv[0]))
-    cat_to_issues: Dict[str, List[Issue]] = {}
-    for i in issues_sorted:
-        cat_to_issues.setdefault(i.category, []).append(i)
+
+    if hasattr(issues, "iter_category"):
+        # уже отсортированы прогонами на диске — секции читаются слиянием
+        issues_sorted = issues
+        sections = [(cat, issues.by_category[cat], issues.iter_category(cat)) for cat in issues.categories()]
+        rule_stats = dict(sorted(issues.rule_counts.items(), key=lambda kv: (-kv[1], kv[0])))
+    else:
+        # Сортируем стабильно: sever/para/offset/rule
+        issues_sorted = sorted(
+            issues,
+            key=lambda x: (_severity_rank(x.severity), x.para_index, x.offset, x.rule_id)
+        )
+        # Группируем по категории
+        cat_to_issues: Dict[str, List[Issue]] = {}
+        for i in issues_sorted:
+            cat_to_issues.setdefault(i.category, []).append(i)
+        sections = [(cat, len(items), items) for cat, items in cat_to_issues.items()]
+        rule_stats = _group_rule_stats(issues_sorted)
 
     with open(txt_path, "w", encoding="utf-8") as f:
         f.write(f"Файл: {os.path.basename(src_path)}\n")
@@ -77,10 +149,14 @@ def write_reports(src_path: str,
 
         # Секции по категориям (если нет замечаний — заголовки не печатаем)
         idx = 1
-        for cat, items in cat_to_issues.items():
-            f.write(f"== {cat} ({len(items)}) ==\n")
+        for cat, n, items in sections:
+            f.write(f"== {cat} ({n}) ==\n")
             for it in items:
-                pos = f"абз.{it.para_index}:{it.offset}"
+                pos = f"абз.{it.para_index}:{it.offset}" + _where_suffix(loader_stats, it.para_index)
+                if "byte_offset" in it.meta:  # потоковый .txt: где абзац в файле
+                    pos += f" [байт {it.meta['byte_offset']}]"
+                if it.meta.get("orig_offset", it.offset) != it.offset:  # абзац нормализован лоадером
+                    pos += f" [в исходном тексте :{it.meta['orig_offset']}]"
                 ctx = _shorten(it.context or "", 60, 60)
                 repl = ""
                 if it.replacements:
@@ -100,10 +176,10 @@ def write_reports(src_path: str,
         )
 
     # ---- .rep.json (машинный + диагн.) ---- #
-    loader_stats = (debug_meta or {}).get("loader_stats", {})
     timing       = (debug_meta or {}).get("timing", {})           # опционально (если замеряете в engine)
     profile      = (debug_meta or {}).get("profile", None)        # опционально (наименование профиля конфигурации)
     internal_err = (debug_meta or {}).get("internal_errors", [])  # список строк с внутренними исключениями
+    stats_out    = {k: v for k, v in loader_stats.items() if k not in _PARA_POSITION_KEYS}
 
     payload = {
         "version": version,
@@ -116,10 +192,10 @@ def write_reports(src_path: str,
             "warnings": warnings,
             "pass": passed
         },
-        "issues": [i.to_dict() for i in issues_sorted],
-        "rule_stats": _group_rule_stats(issues_sorted),
+        "issues": None,                       # пишется потоком (_write_json)
+        "rule_stats": rule_stats,
         "debug": {
-            "loader_stats": loader_stats,     # p_total/kept/blank/wt/instr/deleted/tabs/br/parts[]
+            "loader_stats": stats_out,        # p_total/kept/blank/wt/instr/deleted/tabs/br/parts[]/stories[]
             "timing": timing,                 # total_ms/load_ms/regex_ms/spell_ms (если есть)
             "profile": profile,               # имя профиля (fast/full), если проброшено из CLI
             "internal_errors": internal_err   # список внутренних ошибок правил/лоадера/движка
@@ -127,4 +203,4 @@ def write_reports(src_path: str,
     }
 
     with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+        _write_json(f, payload, issues_sorted, loader_stats)
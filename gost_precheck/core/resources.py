@@ -0,0 +1,271 @@
+# gost_precheck/core/resources.py
+"""
+Сколько воркеров реально можно запустить.
+
+os.cpu_count() в контейнере возвращает CPU хоста: при квоте в 2 CPU пул
+процессов без явного размера поднимал десятки воркеров, каждый со своей
+копией словаря, — и ловил OOM. Здесь:
+  - CPU: affinity процесса ∩ квота cgroup (v2: cpu.max, v1: cpu.cfs_quota_us);
+  - память: MemAvailable ∩ (лимит cgroup − текущее потребление);
+  - след одного воркера орфографии измеряется (RSS до/после загрузки словарей
+    в пробном процессе) и кэшируется на диске по mtime/размерам словарей.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+_MB = 1024 * 1024
+_CGROUP_ROOT = "/sys/fs/cgroup"
+
+RESOURCES_DEFAULTS = {
+    "memory_fraction": 0.75,     # какую долю доступной памяти отдаём воркерам
+    "worker_overhead_mb": 20,    # интерпретатор + модули в каждом процессе (сверх словарей)
+}
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_paths() -> Tuple[Optional[str], Dict[str, str]]:
+    """-> (путь cgroup v2, {контроллер v1: путь}) из /proc/self/cgroup."""
+    v2, v1 = None, {}
+    for line in (_read("/proc/self/cgroup") or "").splitlines():
+        parts = line.split(":", 2)
+        if len(parts) != 3:
+            continue
+        _, ctrls, path = parts
+        if ctrls == "":
+            v2 = path
+        for c in ctrls.split(","):
+            if c:
+                v1[c] = path
+    return v2, v1
+
+
+def _walk_up(base: str, rel: str) -> List[str]:
+    """Каталоги cgroup от своего до корня: лимит может стоять на любом уровне.
+    Внутри контейнера путь из /proc/self/cgroup часто не смонтирован — тогда корень."""
+    out = []
+    rel = rel.strip("/")
+    while True:
+        d = os.path.join(base, rel) if rel else base
+        if os.path.isdir(d):
+            out.append(d)
+        if not rel:
+            break
+        rel = os.path.dirname(rel)
+    return out
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    v2, v1 = _cgroup_paths()
+    quotas = []
+    if v2 is not None:
+        for d in _walk_up(_CGROUP_ROOT, v2):
+            raw = _read(os.path.join(d, "cpu.max"))
+            if raw:
+                q, _, period = raw.partition(" ")
+                if q != "max" and period:
+                    quotas.append(int(q) / int(period))
+    # v1: контроллер смонтирован как cpu или cpu,cpuacct (часто оба — симлинком)
+    mounts = [m for m in ("cpu", "cpu,cpuacct") if "cpu" in v1 and os.path.isdir(os.path.join(_CGROUP_ROOT, m))]
+    for m in mounts[:1]:
+        for d in _walk_up(os.path.join(_CGROUP_ROOT, m), v1["cpu"]):
+            q, period = _read(os.path.join(d, "cpu.cfs_quota_us")), _read(os.path.join(d, "cpu.cfs_period_us"))
+            if q and period and int(q) > 0:
+                quotas.append(int(q) / int(period))
+    return min(quotas) if quotas else None
+
+
+@functools.lru_cache(maxsize=1)
+def cpu_info() -> Dict[str, Any]:
+    try:
+        affinity = len(os.sched_getaffinity(0))
+    except AttributeError:
+        affinity = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    cpus = affinity if quota is None else max(1, min(affinity, math.ceil(quota)))
+    return {"cpus": max(1, cpus), "affinity": affinity, "cgroup_quota": quota}
+
+
+def cpu_limit() -> int:
+    """Сколько CPU процессу реально доступно (affinity и квота cgroup)."""
+    return cpu_info()["cpus"]
+
+
+def _meminfo_available() -> Optional[int]:
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        if line.startswith("MemAvailable:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def _cgroup_memory_headroom() -> Optional[int]:
+    v2, v1 = _cgroup_paths()
+    rooms = []
+    if v2 is not None:
+        for d in _walk_up(_CGROUP_ROOT, v2):
+            limit, cur = _read(os.path.join(d, "memory.max")), _read(os.path.join(d, "memory.current"))
+            if limit and limit != "max" and cur:
+                rooms.append(int(limit) - int(cur))
+    if "memory" in v1:
+        for d in _walk_up(os.path.join(_CGROUP_ROOT, "memory"), v1["memory"]):
+            limit = _read(os.path.join(d, "memory.limit_in_bytes"))
+            cur = _read(os.path.join(d, "memory.usage_in_bytes"))
+            # «без лимита» в v1 — огромное число около 2^63
+            if limit and cur and int(limit) < (1 << 60):
+                rooms.append(int(limit) - int(cur))
+    return max(0, min(rooms)) if rooms else None
+
+
+def memory_available() -> Optional[int]:
+    """Байт, которые можно занять, не упираясь в лимит cgroup/хоста (None — неизвестно)."""
+    vals = [v for v in (_meminfo_available(), _cgroup_memory_headroom()) if v is not None]
+    return min(vals) if vals else None
+
+
+# ------------------------ след воркера орфографии ------------------------ #
+
+def _rss() -> int:
+    statm = _read("/proc/self/statm")
+    if statm:
+        return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux: КиБ
+
+
+def _footprint_probe(cfg: Dict, parts: Tuple[str, ...]) -> int:
+    """В пробном процессе: прирост RSS от загрузки словарей (parts: "spell", "booster")."""
+    before = _rss()
+    if "spell" in parts:
+        from .checks import spell
+        spell.check("проверка", 0, cfg)  # грузит и кэширует словарь модуля
+    if "booster" in parts:
+        from .checks import spell_multi
+        spell_multi.check("проверка", 0, cfg)
+    return max(0, _rss() - before)
+
+
+def dict_parts(cfg: Dict, stage: Optional[str] = None) -> Tuple[str, ...]:
+    """Какие словари окажутся в процессе этапа stage (None — общий пул обоих этапов)."""
+    s = cfg.get("settings", {})
+    parts = []
+    if stage in (None, "spell") and (s.get("spell") or {}).get("enabled"):
+        parts.append("spell")
+    if stage in (None, "regex") and (s.get("spell_booster") or {}).get("enabled"):
+        parts.append("booster")
+    return tuple(parts)
+
+
+def _dict_stamp(cfg: Dict) -> str:
+    """Ключ замера: настройки орфографии + размеры/mtime файлов словарей."""
+    s = cfg.get("settings", {})
+    dirs = {os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dicts")}
+    for sect in ("spell", "spell_booster"):
+        dd = (s.get(sect) or {}).get("dict_dir")
+        if dd and dd != "auto":
+            dirs.add(dd)
+    files = []
+    for d in sorted(dirs):
+        try:
+            for e in os.scandir(d):
+                if e.is_file():
+                    st = e.stat()
+                    files.append((e.path, st.st_size, st.st_mtime_ns))
+        except OSError:
+            pass
+    for sect in ("spell", "spell_booster"):
+        for k in ("pwl_path", "freq_ru_path"):
+            p = (s.get(sect) or {}).get(k)
+            if p and os.path.isfile(p):
+                st = os.stat(p)
+                files.append((p, st.st_size, st.st_mtime_ns))
+    key = [s.get("spell"), s.get("spell_booster"), sorted(files)]
+    return json.dumps(key, sort_keys=True, ensure_ascii=False, default=str)
+
+
+_FOOTPRINT: Dict[str, int] = {}
+
+
+def dict_footprint(cfg: Dict, parts: Tuple[str, ...]) -> int:
+    """
+    Байт на один процесс сверх базового интерпретатора за словари parts.
+    Замер — один раз на набор словарей (пробный процесс), дальше из кэша
+    (в памяти и в каталоге кэша конфигов).
+    """
+    import hashlib
+    from .config import _snapshot_dir
+
+    if not parts:
+        return 0
+    stamp = _dict_stamp(cfg) + "|" + ",".join(parts)
+    if stamp in _FOOTPRINT:
+        return _FOOTPRINT[stamp]
+    cache_dir = _snapshot_dir()
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = cache_dir / f"footprint-{hashlib.sha1(stamp.encode('utf-8')).hexdigest()}.json"
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                _FOOTPRINT[stamp] = int(json.load(f)["bytes"])
+                return _FOOTPRINT[stamp]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    from concurrent.futures import ProcessPoolExecutor
+    try:
+        with ProcessPoolExecutor(max_workers=1) as ex:
+            size = ex.submit(_footprint_probe, cfg, parts).result()
+    except Exception:
+        size = 0  # замер не удался — ограничиваемся накладными расходами
+    _FOOTPRINT[stamp] = size
+    if cache_file is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({"bytes": size}, f)
+        except OSError:
+            pass
+    return size
+
+
+def process_workers(cfg: Dict, configured: int = 0, stage: Optional[str] = None,
+                    limit: Optional[int] = None) -> Tuple[int, Dict[str, Any]]:
+    """
+    Сколько процессов запускать: configured (или число CPU), но не больше limit
+    и не больше, чем помещается в память при измеренном следе воркера.
+    -> (число, сведения для debug_meta).
+    """
+    rc = {**RESOURCES_DEFAULTS, **(cfg.get("settings", {}).get("resources") or {})}
+    cpus = cpu_limit()
+    n = configured or cpus
+    if limit is not None:
+        n = min(n, limit)
+    per_worker = int(rc["worker_overhead_mb"]) * _MB + dict_footprint(cfg, dict_parts(cfg, stage))
+    avail = memory_available()
+    mem_cap = None
+    if avail is not None:
+        mem_cap = max(1, int(avail * float(rc["memory_fraction"]) // per_worker))
+        n = min(n, mem_cap)
+    return max(1, n), {
+        "cpus": cpus,
+        "cgroup_cpu_quota": cpu_info()["cgroup_quota"],
+        "memory_available_mb": round(avail / _MB) if avail is not None else None,
+        "per_worker_mb": round(per_worker / _MB, 1),
+        "memory_cap": mem_cap,
+    }
+
+
+def thread_workers(configured: int = 0, limit: Optional[int] = None) -> int:
+    """Как умолчание ThreadPoolExecutor (min(32, CPU + 4)), но от реальных CPU."""
+    n = configured or min(32, cpu_limit() + 4)
+    return max(1, min(n, limit) if limit is not None else n)
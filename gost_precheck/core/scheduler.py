@@ -0,0 +1,156 @@
+# gost_precheck/core/scheduler.py
+"""
+Параллельная проверка набора файлов.
+
+- файлы идут в работу от больших к меньшим (LPT: минимизирует общее время);
+- одновременно обрабатывается до `jobs` файлов;
+- пулы исполнителей (потоки regex-этапа, процессы орфографии) общие на весь
+  прогон — без старта/остановки пула на каждый файл;
+- при jobs > 1 даже мелкие файлы проверяются в общем пуле процессов: в потоках
+  пакета правила (чистый Python) выполнялись бы по очереди из-за GIL;
+- результат каждого файла отдаётся колбэку сразу по готовности; порядок вывода
+  вызывающий восстанавливает сам (индекс во входном списке).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .engine import analyze_file
+from . import metrics, resources
+
+
+class SharedPools:
+    """Лениво создаваемые пулы, переиспользуемые analyze_file(pools=...)."""
+
+    def __init__(self, cfg: Dict):
+        s = cfg.get("settings", {})
+        self._cfg = cfg
+        self._threads_n = resources.thread_workers(int(s.get("regex_workers", 0)))
+        self._procs_configured = int((s.get("spell", {}) or {}).get("parallel_workers", 0))
+        self._procs_n = 0  # размер пула процессов — известен при его создании
+        self.resources: Dict[str, Any] = {}  # заполняется при создании пула процессов
+        self._lock = threading.Lock()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._procs: Optional[ProcessPoolExecutor] = None
+
+    def threads(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self._threads_n)
+                metrics.gauge_add("gost_pool_workers", self._threads_n, pool="threads")
+            return self._threads
+
+    def processes(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._procs is None:
+                # процесс держит словари обоих этапов — размер по памяти на оба
+                self._procs_n, self.resources = resources.process_workers(self._cfg, self._procs_configured)
+                self._procs = ProcessPoolExecutor(max_workers=self._procs_n)
+                metrics.gauge_add("gost_pool_workers", self._procs_n, pool="processes")
+            return self._procs
+
+    def close(self, wait: bool = True):
+        with self._lock:
+            if self._threads is not None:
+                self._threads.shutdown(wait=wait, cancel_futures=True)
+                metrics.gauge_add("gost_pool_workers", -self._threads_n, pool="threads")
+                self._threads = None
+            if self._procs is not None:
+                self._procs.shutdown(wait=wait, cancel_futures=True)
+                metrics.gauge_add("gost_pool_workers", -self._procs_n, pool="processes")
+                self._procs = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def order_largest_first(files: List[str]) -> List[int]:
+    """Индексы файлов по убыванию размера (при равенстве — как во входном списке)."""
+    return sorted(range(len(files)), key=lambda i: (-_size(files[i]), i))
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """"i/N" (i от 1 до N) → (i, N)."""
+    try:
+        i, n = (int(x) for x in spec.split("/", 1))
+    except ValueError:
+        raise ValueError(f"шард задаётся как i/N, получено: {spec!r}")
+    if n < 1 or not 1 <= i <= n:
+        raise ValueError(f"номер шарда вне диапазона 1..N: {spec!r}")
+    return i, n
+
+
+def shard_files(files: List[str], index: int, count: int) -> List[str]:
+    """
+    Файлы шарда index из count. Жадная упаковка по размеру: файлы от больших к
+    меньшим, каждый — в наименее загруженный шард (при равенстве — с меньшим
+    номером). Разбиение детерминировано: на всех машинах с одинаковым корпусом
+    получаются непересекающиеся части, вместе покрывающие весь список.
+    Порядок файлов внутри шарда — как во входном списке.
+    """
+    sizes = [_size(f) for f in files]
+    load = [0] * count
+    owner = [0] * len(files)
+    for i in sorted(range(len(files)), key=lambda i: (-sizes[i], files[i])):
+        b = min(range(count), key=lambda k: (load[k], k))
+        owner[i] = b
+        load[b] += sizes[i]
+    return [f for i, f in enumerate(files) if owner[i] == index - 1]
+
+
+def resolve_jobs(jobs: int) -> int:
+    """jobs <= 0 → по числу доступных CPU (affinity и квота cgroup)."""
+    if jobs and jobs > 0:
+        return jobs
+    return resources.cpu_limit()
+
+
+def run_batch(files: List[str], cfg: Dict, jobs: int,
+              on_result: Callable[[int, str, Any, Optional[BaseException]], None],
+              token=None, pools: Optional[SharedPools] = None, largest_first: bool = True,
+              on_start: Optional[Callable[[int, str], None]] = None) -> None:
+    """
+    Проверяет files, вызывая on_result(index, path, result, error) по готовности
+    каждого файла (из рабочего потока). result — кортеж analyze_file.
+    on_start(index, path) — в том же потоке непосредственно перед анализом.
+    Файлы, до которых не дошла очередь из-за отмены, не репортятся.
+    """
+    jobs = resolve_jobs(jobs)
+    width = min(jobs, max(1, len(files)))
+    own_pools = pools is None
+    pools = pools or SharedPools(cfg)
+
+    def one(i: int):
+        if token is not None and token.cancelled:
+            return
+        path = files[i]
+        try:
+            if on_start is not None:
+                on_start(i, path)
+            res = analyze_file(path, cfg, token=token, pools=pools, batch=width)
+        except Exception as e:
+            on_result(i, path, None, e)
+            return
+        on_result(i, path, res, None)
+
+    try:
+        with ThreadPoolExecutor(max_workers=width, thread_name_prefix="batch") as ex:
+            order = order_largest_first(files) if largest_first else range(len(files))
+            for f in [ex.submit(one, i) for i in order]:
+                f.result()
+    finally:
+        if own_pools:
+            pools.close()
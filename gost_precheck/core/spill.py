@@ -0,0 +1,175 @@
+# gost_precheck/core/spill.py
+"""
+Замечания документа с ограниченной памятью (settings.bounded_memory).
+
+Шумный документ на сотни тысяч абзацев даёт миллионы Issue: список в
+analyze_file, его сортировка и ещё две отсортированные копии в write_reports
+занимали гигабайты. SpilledIssues держит в памяти не больше run_issues
+замечаний: заполненный буфер сортируется по ключу отчёта и сбрасывается на
+диск — отдельный «прогон» (run) на каждую категорию. Чтение — слияние
+прогонов (heapq.merge), по категории или по всему документу; в памяти
+только по блоку из каждого прогона.
+
+Порядок совпадает с sorted() по тому же ключу: merge устойчив, а прогоны
+пишутся в порядке поступления замечаний. Маленький документ (всё уместилось
+в один буфер) на диск не пишется вовсе.
+
+Объект перечитывается сколько угодно раз (gate, .rep, .rep.json); временный
+каталог удаляется close() или сборщиком мусора.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .issue import Issue
+
+BOUNDED_MEMORY_DEFAULTS = {
+    "enabled": False,
+    "run_issues": 50_000,   # замечаний в памяти до сброса прогона на диск
+    "dir": None,            # каталог временных файлов (None — системный tmp)
+}
+
+_BLOCK = 64    # замечаний в одной записи pickle (чтение — поблочно)
+_FAN_IN = 16   # больше прогонов у категории — сливаются в один (память слияния ~ _FAN_IN × _BLOCK)
+_SEVERITY_RANK = {"ошибка": 0, "предупреждение": 1}
+
+
+def settings(cfg: Dict) -> Dict[str, Any]:
+    return {**BOUNDED_MEMORY_DEFAULTS, **(cfg.get("settings", {}).get("bounded_memory") or {})}
+
+
+def enabled(cfg: Dict) -> bool:
+    return bool(settings(cfg)["enabled"])
+
+
+def sort_key(it: Issue) -> Tuple:
+    """Порядок замечаний в отчётах: серьёзность, абзац, смещение, правило."""
+    return (_SEVERITY_RANK.get(it.severity, 9), it.para_index, it.offset, it.rule_id)
+
+
+def _write_run(path: str, items: Iterable[Issue]):
+    with open(path, "wb") as fh:
+        block: List[Issue] = []
+        for it in items:
+            block.append(it)
+            if len(block) >= _BLOCK:
+                pickle.dump(block, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                block = []
+        if block:
+            pickle.dump(block, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path: str) -> Iterator[Issue]:
+    with open(path, "rb") as fh:
+        while True:
+            try:
+                block = pickle.load(fh)
+            except EOFError:
+                return
+            yield from block
+
+
+class SpilledIssues:
+    def __init__(self, run_issues: int = BOUNDED_MEMORY_DEFAULTS["run_issues"], tmp_dir: Optional[str] = None):
+        self.run_issues = max(1, int(run_issues))
+        self._tmp_parent = tmp_dir
+        self._dir: Optional[str] = None
+        self._finalizer = None
+        self._buf: List[Issue] = []
+        self._runs: Dict[str, List[str]] = {}      # категория -> файлы прогонов
+        self._mem: Dict[str, List[Issue]] = {}     # последний буфер, если на диск не писали
+        self._min: Dict[str, Tuple] = {}           # категория -> (наименьший ключ, порядок появления)
+        self.by_category: Counter = Counter()
+        self.by_severity: Counter = Counter()
+        self.rule_counts: Counter = Counter()
+        self.total = 0
+        self.n_runs = 0
+
+    # ----------------------------- запись -------------------------------- #
+
+    def add(self, batch: Iterable[Issue]):
+        for it in batch:
+            k = sort_key(it)
+            cur = self._min.get(it.category)
+            if cur is None or k < cur[0]:
+                self._min[it.category] = (k, cur[1] if cur else len(self._min))
+            self.by_category[it.category] += 1
+            self.by_severity[it.severity] += 1
+            self.rule_counts[it.rule_id] += 1
+            self.total += 1
+            self._buf.append(it)
+        if len(self._buf) >= self.run_issues:
+            self._spill()
+
+    def _groups(self) -> Dict[str, List[Issue]]:
+        groups: Dict[str, List[Issue]] = {}
+        for it in self._buf:
+            groups.setdefault(it.category, []).append(it)
+        for items in groups.values():
+            items.sort(key=sort_key)
+        self._buf = []
+        return groups
+
+    def _spill(self):
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="gost-spill-", dir=self._tmp_parent)
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._dir, True)
+        for cat, items in self._groups().items():
+            path = os.path.join(self._dir, f"run-{self.n_runs}-{self._min[cat][1]}.pickle")
+            _write_run(path, items)
+            runs = self._runs.setdefault(cat, [])
+            runs.append(path)
+            if len(runs) >= _FAN_IN:
+                # промежуточное слияние: число одновременно читаемых прогонов ограничено
+                merged = os.path.join(self._dir, f"merged-{self.n_runs}-{self._min[cat][1]}.pickle")
+                _write_run(merged, self.iter_category(cat))
+                for p in runs:
+                    os.unlink(p)
+                self._runs[cat] = [merged]
+        self.n_runs += 1
+
+    def finish(self) -> "SpilledIssues":
+        """Конец документа: остаток буфера — в память (если диск не понадобился) или прогоном."""
+        if self._buf:
+            if self.n_runs:
+                self._spill()
+            else:
+                self._mem = self._groups()
+        return self
+
+    # ----------------------------- чтение -------------------------------- #
+
+    def categories(self) -> List[str]:
+        """Категории в порядке первого замечания по ключу отчёта (как секции .rep)."""
+        return sorted(self._min, key=lambda c: self._min[c])
+
+    def iter_category(self, cat: str) -> Iterator[Issue]:
+        if cat in self._mem:
+            return iter(self._mem[cat])
+        return heapq.merge(*(_read_run(p) for p in self._runs.get(cat, ())), key=sort_key)
+
+    def __iter__(self) -> Iterator[Issue]:
+        # категория — не часть ключа: слияние по категориям в их порядке появления
+        return heapq.merge(*(self.iter_category(c) for c in sorted(self._min, key=lambda c: self._min[c][1])),
+                           key=sort_key)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+        self._runs, self._mem = {}, {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
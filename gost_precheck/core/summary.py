@@ -0,0 +1,59 @@
+# gost_precheck/core/summary.py
+"""
+Сводка по корпусу: сколько файлов прошло/заблокировано, суммы ошибок и
+предупреждений, счётчики по категориям. Сводки частей (шардов) складываются
+merge() — итог не зависит от того, как корпус был разбит.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List
+
+
+def new_summary() -> Dict[str, Any]:
+    return {"files": 0, "pass": 0, "block": 0, "failed": 0, "errors": 0, "warnings": 0,
+            "by_category": {}, "documents": []}
+
+
+def add_file(s: Dict[str, Any], path: str, gate: Dict[str, Any], by_category: Dict[str, int]):
+    s["files"] += 1
+    s["pass" if gate.get("pass") else "block"] += 1
+    s["errors"] += int(gate.get("errors", 0))
+    s["warnings"] += int(gate.get("warnings", 0))
+    cats = s["by_category"]
+    for k, v in (by_category or {}).items():
+        cats[k] = cats.get(k, 0) + int(v)
+    s["documents"].append({"path": path, "errors": int(gate.get("errors", 0)),
+                           "warnings": int(gate.get("warnings", 0)), "pass": bool(gate.get("pass"))})
+
+
+def add_failed(s: Dict[str, Any], path: str, error: str):
+    """Файл, который не удалось проверить (внутренняя ошибка)."""
+    s["files"] += 1
+    s["failed"] += 1
+    s["documents"].append({"path": path, "failed": error})
+
+
+def merge(parts: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    out = new_summary()
+    for p in parts:
+        for k in ("files", "pass", "block", "failed", "errors", "warnings"):
+            out[k] += int(p.get(k, 0))
+        for k, v in (p.get("by_category") or {}).items():
+            out["by_category"][k] = out["by_category"].get(k, 0) + int(v)
+        out["documents"].extend(p.get("documents") or [])
+    out["documents"].sort(key=lambda d: d["path"])
+    return out
+
+
+def write_summary(path: str, s: Dict[str, Any], **meta):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({**meta, **s}, fh, ensure_ascii=False, indent=2)
+
+
+def read_summaries(paths: List[str]) -> List[Dict[str, Any]]:
+    out = []
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as fh:
+            out.append(json.load(fh))
+    return out
@@ -1,6 +1,16 @@
 # gost_precheck/core/terms.py
+"""
+Сбор банка терминов/акронимов (`gost-precheck terms`).
+
+Map-reduce по процессам: файлы (крупные — первыми) режутся на пачки, воркер
+разбирает пачку и возвращает частичный банк; редуктор (merge_banks) в
+главном процессе суммирует счётчики и оставляет не больше EXAMPLES примеров.
+Примеры и порядок терминов привязаны к позиции (номер файла во входном
+списке, номер абзаца) — результат не зависит от числа воркеров и порядка
+готовности пачек и совпадает с последовательным проходом.
+"""
 from __future__ import annotations
-from typing import Dict, List, Iterable
+from typing import Callable, Dict, List, Iterable, Optional, Tuple
 import re, json, csv, os
 from .loader import load_paragraphs
 
@@ -11,6 +21,28 @@ RE_CAP_PHRASE = re.compile(
     r"\b(?:[А-ЯA-Z][а-яa-z0-9]{2,})(?:\s+(?:[А-ЯA-Z][а-яa-z0-9]{2,}|PRO|PRO\.|Server|Windows|Postgres))+?\b"
 )
 
+EXAMPLES = 5        # примеров на термин
+EXAMPLE_CHARS = 200
+_BATCH_MAX = 32     # файлов в одной задаче воркера (меньше пересылок частичных банков)
+
+# Частичный банк: термин -> [count, первая позиция, [(позиция, пример), ...]],
+# позиция — (номер файла, номер абзаца)
+Partial = Dict[str, list]
+
+# «жёсткий» лоадер без фильтров — чтобы ничего не потерять
+FALLBACK_CFG = {
+    "settings": {
+        "loader": {
+            "filters": {
+                "skip_blank": False, "skip_toc": False, "skip_dotty": False,
+                "skip_pure_number": False, "skip_instr_text": True,
+                "skip_deleted_runs": True
+            },
+            "normalize": {"strip": True, "collapse_ws": False, "nbsp_to_space": True}
+        }
+    }
+}
+
 def extract_terms_from_paragraph(p: str) -> List[str]:
     terms: set[str] = set()
     for m in RE_ACRONYM.finditer(p):
@@ -22,49 +54,145 @@ def extract_terms_from_paragraph(p: str) -> List[str]:
             terms.add(s)
     return sorted(terms)
 
-def scan_files(paths: List[str], cfg: Dict | None = None) -> Dict[str, Dict]:
+# ------------------------------- map ------------------------------------ #
+
+_WORKER_CFG: Dict = {}
+
+def _init_worker(cfg: Dict):
+    global _WORKER_CFG
+    _WORKER_CFG = cfg
+
+def _scan_file(fi: int, path: str, cfg: Dict, max_examples: int) -> Partial:
+    part: Partial = {}
+    paras, _ = load_paragraphs(path, cfg)
+    for pi, p in enumerate(paras):
+        for t in extract_terms_from_paragraph(p):
+            meta = part.get(t)
+            if meta is None:
+                meta = part[t] = [0, (fi, pi), []]
+            meta[0] += 1
+            if len(meta[2]) < max_examples:
+                meta[2].append(((fi, pi), p[:EXAMPLE_CHARS]))
+    return part
+
+def _scan_batch(batch: List[Tuple[int, str]], max_examples: int,
+                cfg: Optional[Dict] = None) -> Tuple[Partial, List[Tuple[int, Optional[str]]]]:
+    """Воркер: пачка (номер, путь) -> (частичный банк, [(номер, ошибка или None)])."""
+    cfg = cfg if cfg is not None else _WORKER_CFG
+    part: Partial = {}
+    done = []
+    for fi, path in batch:
+        try:
+            # файл — отдельным банком: в пачке файлы идут не по номеру, а примеры — по позиции
+            merge_banks(part, _scan_file(fi, path, cfg, max_examples), max_examples)
+        except Exception as e:
+            done.append((fi, f"{type(e).__name__}: {e}"))
+            continue
+        done.append((fi, None))
+    return part, done
+
+# ------------------------------ reduce ---------------------------------- #
+
+def merge_banks(dst: Partial, part: Partial, max_examples: int = EXAMPLES) -> Partial:
+    """Влить частичный банк part в dst: счётчики — сумма, примеры — первые по позиции."""
+    for t, (count, first, examples) in part.items():
+        meta = dst.get(t)
+        if meta is None:
+            dst[t] = [count, first, sorted(examples)[:max_examples]]
+            continue
+        meta[0] += count
+        if first < meta[1]:
+            meta[1] = first
+        if examples:
+            meta[2] = sorted(meta[2] + examples)[:max_examples]
+    return dst
+
+def _finish(acc: Partial) -> Dict[str, Dict]:
+    # порядок терминов — по первому вхождению, как при последовательном проходе
+    out: Dict[str, Dict] = {}
+    for t, (count, _, examples) in sorted(acc.items(), key=lambda kv: (kv[1][1], kv[0])):
+        out[t] = {"count": count, "examples": [ex for _, ex in examples]}
+    return out
+
+def _batches(paths: List[str], workers: int) -> List[List[Tuple[int, str]]]:
+    from .scheduler import order_largest_first
+
+    order = order_largest_first(paths)
+    # ~4 пачки на воркер: крупные файлы не собираются в хвост одной задачи
+    size = max(1, min(_BATCH_MAX, len(order) // (workers * 4)))
+    return [[(i, paths[i]) for i in order[k:k + size]] for k in range(0, len(order), size)]
+
+def scan_files(paths: List[str], cfg: Dict | None = None, jobs: int = 1,
+               on_progress: Optional[Callable[[int, int, str, Optional[str]], None]] = None) -> Dict[str, Dict]:
     """
     Возвращает банк терминов:
     {
       "ЕРВУ": {"count": 42, "examples": ["..."]},
       "Postgres PRO": {"count": 12, "examples": ["..."]}
     }
+    jobs — процессов-воркеров (0 — по числу CPU, 1 — в текущем процессе).
+    on_progress(готово, всего, путь, ошибка или None) — после каждого файла
+    (при jobs > 1 — по готовности пачки). Нечитаемые файлы пропускаются.
     """
-    # «жёсткий» лоадер без фильтров — чтобы ничего не потерять
-    fallback_cfg = {
-        "settings": {
-            "loader": {
-                "filters": {
-                    "skip_blank": False, "skip_toc": False, "skip_dotty": False,
-                    "skip_pure_number": False, "skip_instr_text": True,
-                    "skip_deleted_runs": True
-                },
-                "normalize": {"strip": True, "collapse_ws": False, "nbsp_to_space": True}
-            }
-        }
-    }
-    cfg = cfg or fallback_cfg
-    bank: Dict[str, Dict] = {}
-    for path in paths:
-        try:
-            paras = load_paragraphs(path, cfg)
-        except Exception:
-            continue
-        for p in paras:
-            for t in extract_terms_from_paragraph(p):
-                meta = bank.setdefault(t, {"count": 0, "examples": []})
-                meta["count"] += 1
-                if len(meta["examples"]) < 5:
-                    meta["examples"].append(p[:200])
-    return bank
+    from .resources import process_workers
+
+    cfg = cfg or FALLBACK_CFG
+    paths = list(paths)
+    total = len(paths)
+    acc: Partial = {}
+    n_done = 0
+
+    def reduce(part: Partial, done: List[Tuple[int, Optional[str]]]):
+        nonlocal n_done
+        merge_banks(acc, part, EXAMPLES)
+        for fi, err in done:
+            n_done += 1
+            if on_progress is not None:
+                on_progress(n_done, total, paths[fi], err)
+
+    # stage="terms": словарей орфографии в воркерах нет, замерять их след не нужно
+    workers = process_workers(cfg, jobs, stage="terms", limit=total)[0] if total > 1 and jobs != 1 else 1
+    if workers == 1:
+        for fi, path in enumerate(paths):
+            reduce(*_scan_batch([(fi, path)], EXAMPLES, cfg))
+        return _finish(acc)
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cfg,)) as ex:
+        futs = [ex.submit(_scan_batch, b, EXAMPLES) for b in _batches(paths, workers)]
+        for f in as_completed(futs):
+            reduce(*f.result())
+    return _finish(acc)
+
+# ------------------------------ вывод ----------------------------------- #
+
+def _write_terms_json(bank: Dict[str, Dict], f) -> None:
+    # тот же текст, что json.dump({"terms": bank}, ensure_ascii=False, indent=2),
+    # но по термину за раз: строки кодирует C-кодировщик, документ целиком не строится
+    dumps = lambda s: json.dumps(s, ensure_ascii=False)
+    if not bank:
+        f.write('{\n  "terms": {}\n}')
+        return
+    f.write('{\n  "terms": {')
+    sep = "\n"
+    for term, meta in bank.items():
+        f.write(f'{sep}    {dumps(term)}: {{\n      "count": {dumps(meta["count"])},\n      "examples": ')
+        if meta["examples"]:
+            f.write("[\n        " + ",\n        ".join(dumps(ex) for ex in meta["examples"]) + "\n      ]")
+        else:
+            f.write("[]")
+        f.write("\n    }")
+        sep = ",\n"
+    f.write("\n  }\n}")
 
 def write_terms_json_csv(bank: Dict[str, Dict], json_path: str, csv_path: str) -> None:
     os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
     with open(json_path, "w", encoding="utf-8") as f:
-        json.dump({"terms": bank}, f, ensure_ascii=False, indent=2)
+        _write_terms_json(bank, f)
     with open(csv_path, "w", encoding="utf-8", newline="") as f:
         w = csv.writer(f, delimiter=';')
         w.writerow(["term", "count", "example"])
-        for term, meta in sorted(bank.items(), key=lambda kv: (-kv[1]["count"], kv[0])):
-            example = meta["examples"][0] if meta["examples"] else ""
-            w.writerow([term, meta["count"], example])
+        for term in sorted(bank, key=lambda t: (-bank[t]["count"], t)):
+            examples = bank[term]["examples"]
+            w.writerow([term, bank[term]["count"], examples[0] if examples else ""])
@@ -8,3 +8,19 @@ def split_paragraphs_from_txt(text: str):
     import re
     parts = re.split(r'(?:\r?\n){2,}', text)
     return [p.strip('\n\r') for p in parts if p.strip() != ""]
+
+def file_digest(path: str, block: int = 1 << 20) -> str:
+    """SHA-1 содержимого файла (идентичность документа независимо от mtime)."""
+    import hashlib
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def file_stamp(path: str):
+    """(size, mtime_ns, SHA-1) — снимать ДО анализа: правка во время проверки
+    должна оставить запись «устаревшей», а не пометить новое содержимое проверенным."""
+    import os
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns, file_digest(path)
@@ -0,0 +1,109 @@
+# gost_precheck/core/watch_state.py
+"""
+Персистентное состояние watch: path → size, mtime, SHA-1 содержимого, хэш конфига,
+последний результат (gate/by_category). Хранится в SQLite (stdlib).
+
+Проверка «изменился ли файл» идёт по нарастающей стоимости:
+  1) size + mtime_ns совпали и конфиг тот же → пропуск (только stat);
+  2) stat отличается → SHA-1; содержимое прежнее → обновляем stat, пропуск;
+  3) иначе файл нужно проверить.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .utils import file_digest, file_stamp
+
+# (size, mtime_ns, SHA-1) файла на момент перед проверкой
+Stamp = Tuple[int, int, str]
+
+# скрытое имя — сам watcher такие файлы (и -wal/-shm рядом) игнорирует
+DEFAULT_STATE_NAME = ".gost-precheck-watch.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path       TEXT PRIMARY KEY,
+    size       INTEGER NOT NULL,
+    mtime_ns   INTEGER NOT NULL,
+    digest     TEXT NOT NULL,
+    cfg_hash   TEXT NOT NULL,
+    result     TEXT,
+    checked_at REAL NOT NULL
+)
+"""
+
+
+class WatchState:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _row(self, path: str):
+        return self._db.execute(
+            "SELECT size, mtime_ns, digest, cfg_hash FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+    def needs_check(self, path: str, cfg_hash: str) -> Tuple[bool, Stamp]:
+        """-> (нужна ли проверка, снимок файла для record после проверки)."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._row(path)
+        if row is None or row[3] != cfg_hash:
+            return True, file_stamp(path)
+        size, mtime_ns, digest, _ = row
+        if (st.st_size, st.st_mtime_ns) == (size, mtime_ns):
+            return False, (size, mtime_ns, digest)
+        new_digest = file_digest(path)
+        if new_digest != digest:
+            return True, (st.st_size, st.st_mtime_ns, new_digest)
+        # «touch» без изменения содержимого — обновляем stat, чтобы в следующий раз хватило stat
+        with self._lock:
+            self._db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                             (st.st_size, st.st_mtime_ns, path))
+        return False, (st.st_size, st.st_mtime_ns, digest)
+
+    def record(self, path: str, cfg_hash: str, result: Dict[str, Any], stamp: Stamp):
+        """stamp — из needs_check/file_stamp, снятый до проверки."""
+        path = os.path.abspath(path)
+        size, mtime_ns, digest = stamp
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest, cfg_hash, result, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, digest, cfg_hash,
+                 json.dumps(result, ensure_ascii=False), time.time()),
+            )
+
+    def last_result(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT result FROM files WHERE path = ?",
+                                   (os.path.abspath(path),)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def prune_missing(self) -> int:
+        """Удаляет записи об исчезнувших файлах; -> сколько удалено."""
+        with self._lock:
+            paths = [r[0] for r in self._db.execute("SELECT path FROM files")]
+        gone = [(p,) for p in paths if not os.path.exists(p)]
+        if gone:
+            with self._lock:
+                self._db.executemany("DELETE FROM files WHERE path = ?", gone)
+        return len(gone)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
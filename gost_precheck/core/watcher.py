@@ -1,20 +1,304 @@
+import errno, os, time, struct, select, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Tuple
 
-import os, time
-from typing import Callable
+# Собственные выходы (.rep/.rep.json) отсекаются фильтром расширений; дополнительно
+# игнорируем lock-файлы Word (~$doc.docx) и скрытые временные файлы
+_IGNORE_PREFIXES = ("~$", ".")
 
-def watch_folder(path: str, on_file: Callable[[str], None], patterns=(".docx",".txt"), interval=2.0):
-    seen = {}
-    path = os.path.abspath(path)
-    while True:
-        for entry in os.scandir(path):
-            if not entry.is_file():
+
+def _wanted(name: str, patterns) -> bool:
+    return name.lower().endswith(patterns) and not name.startswith(_IGNORE_PREFIXES)
+
+
+def _walk_files(root: str, patterns, recursive: bool) -> Iterator[Tuple[str, os.stat_result]]:
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not entry.name.startswith("."):
+                            stack.append(entry.path)
+                        continue
+                    if entry.is_file() and _wanted(entry.name, patterns):
+                        yield entry.path, entry.stat()
+                except OSError:
+                    continue
+
+
+class _Dispatcher:
+    """
+    Ограниченный пул обработчиков. Один и тот же файл не обрабатывается
+    параллельно: событие во время обработки помечает его «грязным»,
+    и он будет перепроверен сразу после текущего прогона.
+    """
+
+    def __init__(self, on_file: Callable[[str], None], workers: int):
+        self.on_file = on_file
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="watch")
+        self.slots = threading.BoundedSemaphore(max(1, workers) * 4)  # не больше N*4 в очереди
+        self.lock = threading.Lock()
+        self.running: Dict[str, bool] = {}  # path -> dirty
+
+    def submit(self, path: str):
+        with self.lock:
+            if path in self.running:
+                self.running[path] = True
+                return
+            self.running[path] = False
+        self.slots.acquire()
+        self.pool.submit(self._run, path)
+
+    def _run(self, path: str):
+        try:
+            while True:
+                try:
+                    self.on_file(path)
+                except Exception as e:
+                    print(f"[WATCH-ERR] {path}: {e}")
+                with self.lock:
+                    if not self.running.get(path):
+                        del self.running[path]
+                        return
+                    self.running[path] = False
+        finally:
+            self.slots.release()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+class _Debouncer:
+    """Файл отдаётся в обработку, когда он `quiet` секунд не менялся (размер и mtime стабильны)."""
+
+    def __init__(self, quiet: float):
+        self.quiet = quiet
+        self.pending: Dict[str, Tuple[float, int, int]] = {}  # path -> (due, size, mtime_ns)
+
+    def touch(self, path: str):
+        self.pending[path] = (time.monotonic() + self.quiet, -1, -1)
+
+    def due(self) -> Iterator[str]:
+        now = time.monotonic()
+        for path, (when, size, mtime) in list(self.pending.items()):
+            if when > now:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]  # удалён/переименован
+                continue
+            settled = (time.time_ns() - st.st_mtime_ns) >= self.quiet * 1e9
+            if (st.st_size, st.st_mtime_ns) != (size, mtime) and not settled:
+                # ещё пишется — ждём следующего «тихого» окна
+                self.pending[path] = (now + self.quiet, st.st_size, st.st_mtime_ns)
+                continue
+            del self.pending[path]
+            yield path
+
+    def next_timeout(self, default: float) -> float:
+        if not self.pending:
+            return default
+        return max(0.05, min(w for w, _, _ in self.pending.values()) - time.monotonic())
+
+
+# ------------------------------- inotify -------------------------------- #
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    def __init__(self):
+        import ctypes, ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._ctypes = ctypes
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.wd_to_dir: Dict[int, str] = {}
+
+    def add(self, d: str):
+        wd = self._add(self.fd, os.fsencode(d), _WATCH_MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch: {os.strerror(err)}", d)
+        self.wd_to_dir[wd] = d
+
+    def read(self, timeout: float):
+        """-> список (путь, mask); None в списке — переполнение очереди ядра."""
+        r, _, _ = select.select([self.fd], [], [], timeout)
+        if not r:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        out = []
+        pos = 0
+        while pos + _EVENT.size <= len(buf):
+            wd, mask, _cookie, ln = _EVENT.unpack_from(buf, pos)
+            pos += _EVENT.size
+            name = buf[pos:pos + ln].rstrip(b"\0")
+            pos += ln
+            if mask & _IN_Q_OVERFLOW:
+                out.append(None)
+                continue
+            if mask & _IN_IGNORED:
+                self.wd_to_dir.pop(wd, None)
                 continue
-            if not entry.name.lower().endswith(patterns):
+            d = self.wd_to_dir.get(wd)
+            if d is None or not name:
                 continue
-            stat = entry.stat()
-            key = entry.path
-            mtime = stat.st_mtime
-            if key not in seen or seen[key] < mtime:
-                seen[key] = mtime
-                on_file(key)
-        time.sleep(interval)
+            out.append((os.path.join(d, os.fsdecode(name)), mask))
+        return out
+
+    def close(self):
+        os.close(self.fd)
+
+
+# Подкаталог исчез между событием/os.walk и inotify_add_watch — следить не за чем
+_GONE_ERRNOS = {errno.ENOENT, errno.ENOTDIR, errno.EACCES}
+# Кончился лимит fs.inotify.max_user_watches — такое поддерево опрашиваем
+_LIMIT_ERRNOS = {errno.ENOSPC, errno.ENOMEM}
+
+
+def _inotify_loop(root, patterns, recursive, debouncer, dispatcher, interval, stop):
+    ino = _Inotify()
+    unwatched: Dict[str, None] = {}      # корни поддеревьев без watch (опрос), в порядке появления
+    seen: Dict[str, Tuple[int, int]] = {}
+    next_poll = 0.0
+    try:
+        def add(d: str) -> bool:
+            """-> True, если за d следит inotify (иначе — пропущен или ушёл в опрос)."""
+            try:
+                ino.add(d)
+                return True
+            except OSError as e:
+                if d == root:
+                    raise
+                if e.errno in _GONE_ERRNOS:
+                    return False
+                if e.errno not in _LIMIT_ERRNOS:
+                    raise
+                if not unwatched:
+                    print(f"[WATCH] {e.strerror}: лимит inotify (fs.inotify.max_user_watches) исчерпан — "
+                          f"поддеревья без watch опрашиваются каждые {interval}s")
+                unwatched[d] = None
+                return False
+
+        def add_tree(d: str):
+            if not add(d) or not recursive:
+                return
+            for cur, dirs, _files in os.walk(d):
+                dirs[:] = [x for x in dirs if not x.startswith(".") and add(os.path.join(cur, x))]
+
+        def poll_unwatched():
+            nonlocal seen
+            now_seen: Dict[str, Tuple[int, int]] = {}
+            for d in list(unwatched):
+                if not os.path.isdir(d):
+                    del unwatched[d]
+                    continue
+                for p, st in _walk_files(d, patterns, True):
+                    sig = now_seen[p] = (st.st_size, st.st_mtime_ns)
+                    if seen.get(p) != sig:
+                        debouncer.touch(p)
+            seen = now_seen
+
+        add_tree(root)
+        # всё, что уже лежит в папке, — одним проходом
+        for p, _st in _walk_files(root, patterns, recursive):
+            debouncer.touch(p)
+
+        while not (stop and stop.is_set()):
+            timeout = debouncer.next_timeout(interval)
+            if unwatched:
+                now = time.monotonic()
+                if now >= next_poll:
+                    poll_unwatched()
+                    next_poll = now + interval
+                timeout = min(timeout, max(0.05, next_poll - now))
+            for ev in ino.read(timeout):
+                if ev is None:
+                    # очередь ядра переполнена — события потеряны, пересканируем
+                    for p, _st in _walk_files(root, patterns, recursive):
+                        debouncer.touch(p)
+                    continue
+                path, mask = ev
+                if mask & _IN_ISDIR:
+                    if recursive and mask & (_IN_CREATE | _IN_MOVED_TO) \
+                            and not os.path.basename(path).startswith("."):
+                        add_tree(path)
+                        # файлы могли появиться до установки watch
+                        for p, _st in _walk_files(path, patterns, True):
+                            debouncer.touch(p)
+                    continue
+                if _wanted(os.path.basename(path), patterns):
+                    debouncer.touch(path)
+            for p in debouncer.due():
+                dispatcher.submit(p)
+    finally:
+        ino.close()
+
+
+def _poll_loop(root, patterns, recursive, debouncer, dispatcher, interval, stop):
+    seen: Dict[str, Tuple[int, int]] = {}
+    next_scan = 0.0
+    while not (stop and stop.is_set()):
+        now = time.monotonic()
+        if now >= next_scan:
+            for p, st in _walk_files(root, patterns, recursive):
+                sig = (st.st_size, st.st_mtime_ns)
+                if seen.get(p) != sig:
+                    seen[p] = sig
+                    debouncer.touch(p)
+            next_scan = now + interval
+        for p in debouncer.due():
+            dispatcher.submit(p)
+        time.sleep(min(debouncer.next_timeout(interval), max(0.05, next_scan - time.monotonic())))
+
+
+def watch_folder(path: str, on_file: Callable[[str], None], patterns=(".docx", ".txt"), interval=2.0,
+                 recursive: bool = True, debounce: float = 1.0, workers: int = 2,
+                 backend: str = "auto", stop: Optional[threading.Event] = None):
+    """
+    Следит за папкой и вызывает on_file(path) для новых/изменённых файлов.
+
+    backend: "inotify" (Linux), "poll" (опрос раз в interval секунд) или "auto".
+    debounce: файл уходит в обработку, когда столько секунд не меняется.
+    workers: размер пула обработчиков (on_file вызывается из потоков пула).
+    stop: threading.Event для остановки (иначе — бесконечно).
+    """
+    path = os.path.abspath(path)
+    debouncer = _Debouncer(debounce)
+    dispatcher = _Dispatcher(on_file, workers)
+    try:
+        if backend in ("auto", "inotify"):
+            try:
+                _inotify_loop(path, patterns, recursive, debouncer, dispatcher, interval, stop)
+                return
+            except (OSError, AttributeError) as e:
+                if backend == "inotify":
+                    raise
+                print(f"[WATCH] inotify недоступен ({e}) — опрос каждые {interval}s")
+        _poll_loop(path, patterns, recursive, debouncer, dispatcher, interval, stop)
+    finally:
+        dispatcher.shutdown()
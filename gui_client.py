@@ -16,8 +16,9 @@ except Exception:
 
 # Чистые импорты нашей библиотеки
 from gost_precheck.core.config import load_all
-from gost_precheck.core.engine import analyze_file
+from gost_precheck.core.scheduler import run_batch, resolve_jobs
 from gost_precheck.core.reporting import write_reports
+from gost_precheck.core.cancel import CancelToken
 
 APP_TITLE = "gost-precheck — Desktop"
 APP_VERSION = "GOST-21_34-PLUS"
@@ -70,6 +71,7 @@ class App(tk.Tk):
 
         self.q = queue.Queue()
         self.worker = None
+        self.token = None  # CancelToken текущего прогона
 
     def _build_toolbar(self):
         frm = ttk.Frame(self)
@@ -88,6 +90,7 @@ class App(tk.Tk):
         ttk.Button(frm, text="Файлы...", command=self.on_files).pack(side="left", padx=4)
         ttk.Button(frm, text="Папка...", command=self.on_folder).pack(side="left", padx=4)
         ttk.Button(frm, text="Пуск", command=self.on_run).pack(side="left", padx=12)
+        ttk.Button(frm, text="Отмена", command=self.on_cancel).pack(side="left", padx=4)
 
         self.pb = ttk.Progressbar(frm, mode="determinate")
         self.pb.pack(side="left", fill="x", expand=True, padx=10)
@@ -190,7 +193,15 @@ class App(tk.Tk):
         except Exception:
             messagebox.showinfo("Папка", folder)
 
+    def on_cancel(self):
+        if self.token is not None and self.worker and self.worker.is_alive():
+            self.token.cancel()
+            self.status["text"] = "Отмена…"
+
     def on_run(self):
+        if self.worker and self.worker.is_alive():
+            messagebox.showinfo("Выполняется", "Задача ещё идёт")
+            return
         if not self.targets:
             messagebox.showwarning("Нет входных", "Выберите файлы или папку")
             return
@@ -210,42 +221,52 @@ class App(tk.Tk):
         self.pb.configure(maximum=len(files), value=0)
         self.status["text"] = "Работаю…"
 
-        # запускаем в отдельном потоке, UI не замораживаем
-        def worker():
-            for ix, path in enumerate(files, 1):
-                try:
-                    issues, by_cat, debug_meta = analyze_file(path, cfg)
-                    # гейт
-                    errors = sum(1 for i in issues if i.severity == "ошибка")
-                    warnings = sum(1 for i in issues if i.severity == "предупреждение")
-                    gate = {"errors": errors, "warnings": warnings, "pass": errors == 0}
-                    write_reports(path, issues, by_cat, gate, APP_VERSION, debug_meta)
-
-                    if not issues:
-                        # всё равно показать строчку-резюме
-                        self.q.put(("row", (path, "—", "—", "—", "", "", "Нет замечаний", "")))
-                    else:
-                        for it in issues:
-                            self.q.put(("row", (
-                                path,
-                                it.severity,
-                                it.category,
-                                it.rule_id,
-                                it.para_index,
-                                it.offset,
-                                it.message,
-                                it.context
-                            )))
-                except Exception as e:
-                    self.q.put(("row", (path, "ошибка", "внутренняя", "EXC", "", "", str(e), "")))
-                finally:
-                    self.q.put(("tick", None))
-
-            self.q.put(("done", None))
+        token = self.token = CancelToken()
+
+        # несколько файлов параллельно (общие пулы), UI не замораживаем
+        jobs = min(4, resolve_jobs(0))
+
+        def on_result(_i, path, res, err):
+            try:
+                if err is not None:
+                    raise err
+                issues, by_cat, debug_meta = res
+                if debug_meta.get("truncated"):
+                    # частичный результат: отчёт не пишем, чтобы не выдать его за полный
+                    self.q.put(("row", (path, "—", "—", "—", "", "", "Проверка прервана", "")))
+                    return
+                # гейт
+                errors = sum(1 for i in issues if i.severity == "ошибка")
+                warnings = sum(1 for i in issues if i.severity == "предупреждение")
+                gate = {"errors": errors, "warnings": warnings, "pass": errors == 0}
+                write_reports(path, issues, by_cat, gate, APP_VERSION, debug_meta)
+
+                if not issues:
+                    # всё равно показать строчку-резюме
+                    self.q.put(("row", (path, "—", "—", "—", "", "", "Нет замечаний", "")))
+                else:
+                    for it in issues:
+                        self.q.put(("row", (
+                            path,
+                            it.severity,
+                            it.category,
+                            it.rule_id,
+                            it.para_index,
+                            it.offset,
+                            it.message,
+                            it.context
+                        )))
+            except Exception as e:
+                self.q.put(("row", (path, "ошибка", "внутренняя", "EXC", "", "", str(e), "")))
+            finally:
+                self.q.put(("tick", None))
 
-        if self.worker and self.worker.is_alive():
-            messagebox.showinfo("Выполняется", "Задача ещё идёт")
-            return
+        def worker():
+            try:
+                run_batch(files, cfg, jobs, on_result, token=token)
+            except Exception as e:
+                self.q.put(("row", ("", "ошибка", "внутренняя", "EXC", "", "", str(e), "")))
+            self.q.put(("done", token.cancelled))
 
         self.worker = threading.Thread(target=worker, daemon=True)
         self.worker.start()
@@ -260,7 +281,8 @@ class App(tk.Tk):
                 elif kind == "tick":
                     self.pb["value"] = min(self.pb["value"] + 1, self.pb["maximum"])
                 elif kind == "done":
-                    self.status["text"] = f"Готово. {datetime.now().strftime('%H:%M:%S')}"
+                    head = "Отменено." if payload else "Готово."
+                    self.status["text"] = f"{head} {datetime.now().strftime('%H:%M:%S')}"
         except queue.Empty:
             pass
         if self.worker and self.worker.is_alive():
@@ -1,35 +1,97 @@
 # service.py
-import json, os
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import json, os, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from urllib.parse import urlparse, parse_qs
 
 from gost_precheck.core.config import load_all
-from gost_precheck.core.engine import analyze_file
+from gost_precheck.cli import _calc_gate
+from gost_precheck.core import metrics
+from gost_precheck.core.coalesce import AnalysisCoalescer
+from gost_precheck.core.cancel import CancelToken
 
 HOST = "127.0.0.1"
 PORT = 8765
 
+# Известные endpoint'ы — прочие пути сводим в "other", чтобы не раздувать метки
+_ENDPOINTS = ("/health", "/analyze", "/metrics")
+
+# Одинаковые одновременные /analyze (тот же файл + тот же конфиг) считаются один раз,
+# повторы в течение RESULT_TTL секунд отдаются из кэша
+RESULT_TTL = 10.0
+COALESCER = AnalysisCoalescer(ttl=RESULT_TTL)
+
+# settings.bounded_memory: замечаний в одной chunked-записи ответа /analyze
+_CHUNK_ISSUES = 256
+
 def _json(obj, code=200):
     data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
     return code, [("Content-Type","application/json; charset=utf-8"),
                   ("Content-Length", str(len(data)))], data
 
+def _ndjson_line(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n"
+
+def _request_token(req: dict, cfg: dict):
+    # таймаут запроса: {"timeout": сек} в теле, иначе settings.service.timeout_s профиля
+    timeout = req.get("timeout") or (cfg.get("settings", {}).get("service", {}) or {}).get("timeout_s", 0)
+    return CancelToken(float(timeout)) if timeout else None
+
+def _wants_stream(path: str, req: dict) -> bool:
+    # opt-in: POST /analyze?stream=1 или {"stream": true} в теле
+    qs = parse_qs(urlparse(path).query)
+    if qs.get("stream", ["0"])[0].lower() in ("1", "true", "yes"):
+        return True
+    return bool(req.get("stream", False))
+
 class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 — нужен для Transfer-Encoding: chunked (потоковый /analyze)
+    protocol_version = "HTTP/1.1"
+    # заголовки и тело уходят отдельными write — без TCP_NODELAY keep-alive ловит
+    # задержку Nagle + delayed ACK (~40 мс на ответ)
+    disable_nagle_algorithm = True
+    # keep-alive держит поток сервера; простаивающее соединение закрываем через timeout секунд
+    timeout = 30
+
     def log_message(self, fmt, *args):
         # потише
         pass
 
     def do_GET(self):
+        self._instrumented(self._get)
+
+    def do_POST(self):
+        self._instrumented(self._post)
+
+    def _instrumented(self, handler):
+        endpoint = urlparse(self.path).path
+        if endpoint not in _ENDPOINTS:
+            endpoint = "other"
+        metrics.gauge_add("gost_http_inflight_requests", 1)
+        t0 = time.perf_counter()
+        code = 500
+        try:
+            code = handler()
+        finally:
+            metrics.gauge_add("gost_http_inflight_requests", -1)
+            metrics.inc("gost_http_requests_total", endpoint=endpoint, code=code)
+            metrics.observe("gost_http_request_seconds", time.perf_counter() - t0, endpoint=endpoint)
+
+    def _get(self) -> int:
         try:
             if self.path.startswith("/health"):
                 code, hdrs, data = _json({"ok": True, "version": "service-1"})
+            elif self.path.startswith("/metrics"):
+                data = metrics.render().encode("utf-8")
+                code, hdrs = 200, [("Content-Type", "text/plain; version=0.0.4; charset=utf-8"),
+                                   ("Content-Length", str(len(data)))]
             else:
                 code, hdrs, data = _json({"error": "not_found"}, 404)
         except Exception as e:
             code, hdrs, data = _json({"error": str(e)}, 500)
         self.send_response(code); [self.send_header(k,v) for k,v in hdrs]; self.end_headers(); self.wfile.write(data)
+        return code
 
-    def do_POST(self):
+    def _post(self) -> int:
         try:
             if self.path.startswith("/analyze"):
                 length = int(self.headers.get("Content-Length","0"))
@@ -39,25 +101,129 @@ class Handler(BaseHTTPRequestHandler):
                 cfg_root = req.get("config")
                 if not path or not os.path.exists(path):
                     code, hdrs, data = _json({"error":"file_not_found"}, 400)
+                elif _wants_stream(self.path, req):
+                    cfg = load_all(cfg_root)
+                    self._analyze_stream(path, cfg, _request_token(req, cfg))
+                    return 200
                 else:
                     cfg = load_all(cfg_root)
-                    issues, by_cat, debug_meta = analyze_file(path, cfg)
-                    result = {
-                        "file": path,
-                        "by_category": by_cat,
-                        "issues": [i.to_dict() for i in issues],
-                        "debug": debug_meta,
-                    }
-                    code, hdrs, data = _json(result, 200)
+                    res = COALESCER.analyze(path, cfg, token=_request_token(req, cfg))
+                    try:
+                        issues, by_cat, debug_meta = res
+                        if not isinstance(issues, list):
+                            # bounded_memory: замечания на диске — тело пишем по частям, не собирая в память
+                            self._send_json_chunked(path, issues, by_cat, debug_meta)
+                            return 200
+                        result = {
+                            "file": path,
+                            "truncated": bool(debug_meta.get("truncated", False)),
+                            "by_category": by_cat,
+                            "issues": [i.to_dict() for i in issues],
+                            "debug": debug_meta,
+                        }
+                        code, hdrs, data = _json(result, 200)
+                    finally:
+                        COALESCER.release(res)
             else:
                 code, hdrs, data = _json({"error": "not_found"}, 404)
         except Exception as e:
             code, hdrs, data = _json({"error": str(e)}, 500)
         self.send_response(code); [self.send_header(k,v) for k,v in hdrs]; self.end_headers(); self.wfile.write(data)
+        return code
+
+    def _send_json_chunked(self, path: str, issues, by_cat: dict, debug_meta: dict):
+        """Тот же JSON, что и у обычного /analyze, но chunked: по _CHUNK_ISSUES замечаний за запись."""
+        dumps = lambda o: json.dumps(o, ensure_ascii=False)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._write_chunk((f'{{"file": {dumps(path)}, '
+                               f'"truncated": {dumps(bool(debug_meta.get("truncated", False)))}, '
+                               f'"by_category": {dumps(by_cat)}, "issues": [').encode("utf-8"))
+            buf, sep = [], ""
+            for it in issues:
+                buf.append(sep + dumps(it.to_dict()))
+                sep = ", "
+                if len(buf) >= _CHUNK_ISSUES:
+                    self._write_chunk("".join(buf).encode("utf-8"))
+                    buf = []
+            buf.append(f'], "debug": {dumps(debug_meta)}}}')
+            self._write_chunk("".join(buf).encode("utf-8"))
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except OSError:
+            self.close_connection = True
+
+    # ---- потоковая выдача (NDJSON, chunked) ----
+
+    def _write_chunk(self, data: bytes):
+        if not data:
+            return
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _analyze_stream(self, path: str, cfg: dict, token=None):
+        """
+        Одна JSON-строка на объект:
+          {"type":"header", ...} → {"type":"issue", ...}* → {"type":"summary", ...}
+        Замечания идут в порядке готовности (не отсортированы); итоговый
+        порядок и gate — в summary. При сбое посреди потока — {"type":"error"}.
+        """
+        client_gone = []
+
+        def on_issues(batch):
+            buf = b"".join(_ndjson_line(dict(type="issue", **i.to_dict())) for i in batch)
+            try:
+                self._write_chunk(buf)
+            except OSError:
+                client_gone.append(True)
+                raise
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._write_chunk(_ndjson_line({"type": "header", "file": path, "version": "service-1"}))
+            try:
+                res = COALESCER.analyze(path, cfg, on_issues=on_issues, token=token)
+            except Exception as e:
+                if client_gone:  # сбой — запись в сокет: {"type":"error"} писать некуда
+                    self.close_connection = True
+                    return
+                tail = {"type": "error", "error": str(e)}
+            else:
+                issues, by_cat, debug_meta = res
+                try:
+                    tail = {
+                        "type": "summary",
+                        "file": path,
+                        "truncated": bool(debug_meta.get("truncated", False)),
+                        "issues_total": len(issues),
+                        "by_category": by_cat,
+                        "gate": _calc_gate(issues),
+                        "debug": debug_meta,
+                    }
+                finally:
+                    COALESCER.release(res)
+            self._write_chunk(_ndjson_line(tail))
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except OSError:
+            # клиент отключился посреди потока — ответ не дописать, соединение закрываем
+            self.close_connection = True
 
 def main():
-    httpd = HTTPServer((HOST, PORT), Handler)
-    print(f"[svc] listening on http://{HOST}:{PORT}")
+    import argparse
+    ap = argparse.ArgumentParser(prog="service", description="gost-precheck HTTP service")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    args = ap.parse_args()
+
+    httpd = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"[svc] listening on http://{args.host}:{args.port}", flush=True)
     httpd.serve_forever()
 
 if __name__ == "__main__":